@@ -0,0 +1,13 @@
+"""Frame builders shared by the unit tests (toolbox is on sys.path via conftest.py)."""
+
+from __future__ import annotations
+
+from lib.homiq_frame import Frame, compute_crc_dec, encode_frame
+
+
+def frame(cmd: str, val: str, src: str, dst: str, pkt: str, top: str = "s") -> Frame:
+    return Frame(cmd, val, src, dst, pkt, top, str(compute_crc_dec(cmd, val, src, dst, pkt, top)))  # type: ignore[arg-type]
+
+
+def wire(cmd: str, val: str, src: str, dst: str, pkt: str, top: str = "s") -> bytes:
+    return encode_frame(cmd, val, src, dst, pkt, top, compute_crc_dec(cmd, val, src, dst, pkt, top)).encode("ascii")  # type: ignore[arg-type]
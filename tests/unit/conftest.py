@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+# toolbox modules are imported as `lib.*`, like the cli scripts do
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "toolbox"))
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+import os
+import socket
+import warnings
+
+from lib import aio_transports as at
+from lib.homiq_frame import decode_frame
+from lib.transports import TcpTransport
+
+from _frames import wire
+
+
+def test_tcp_frame_iterator_with_auto_ack() -> None:
+    received: list[bytes] = []
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.write(wire("I.3", "1", "0H", "0", "42", "s") + wire("O.1", "1", "05", "0", "7", "a"))
+        await writer.drain()
+        received.append(await reader.readuntil(b"\r\n"))
+        writer.close()
+
+    async def run() -> list[str]:
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        t = await at.open_tcp("127.0.0.1", port)
+        try:
+            return [f.cmd async for f in at.aiter_frames(t, auto_ack=True)]
+        finally:
+            await t.close()
+            server.close()
+            await server.wait_closed()
+
+    cmds = asyncio.run(run())
+    assert cmds == ["I.3", "O.1"]
+    ack = decode_frame(received[0].decode("ascii"))
+    assert ack is not None and (ack.top, ack.src, ack.dst, ack.pkt) == ("a", "0", "0H", "42")
+
+
+def test_fd_transport_over_pty() -> None:
+    master, slave = os.openpty()
+    try:
+        import tty
+
+        tty.setraw(slave)
+
+        async def run() -> bytes:
+            t = await at.open_fd(master)
+            try:
+                os.write(slave, wire("UD", "u", "05", "0", "3", "a"))
+                frames = at.aiter_frames(t)
+                f = await asyncio.wait_for(frames.__anext__(), 2.0)
+                await at.send_frame(t, f)
+                return await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(None, os.read, slave, 64), 2.0)
+            finally:
+                await t.close()
+
+        assert asyncio.run(run()) == wire("UD", "u", "05", "0", "3", "a")
+    finally:
+        os.close(master)
+        os.close(slave)
+
+
+def test_tcp_transport_failed_reconnect_closes_its_socket() -> None:
+    srv = socket.create_server(("127.0.0.1", 0))
+    port = srv.getsockname()[1]
+    t = TcpTransport("127.0.0.1", port)
+    srv.close()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        for _ in range(3):
+            try:
+                t.reconnect()
+            except OSError:
+                pass
+        gc.collect()
+    assert t._sock is None
+    assert not [w for w in caught if issubclass(w.category, ResourceWarning)]
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from lib.bus_daemon import DaemonConfig, Gateway, start_listeners
+from lib.homiq_frame import FrameStreamParser
+
+from _frames import wire
+
+
+def test_gateway_acks_forwards_and_reconnects(tmp_path: Path) -> None:
+    async def run() -> None:
+        from_daemon: asyncio.Queue[bytes] = asyncio.Queue()
+        conns = 0
+
+        async def moxa(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            nonlocal conns
+            conns += 1
+            if conns == 1:
+                writer.close()  # drop the first connection to force a reconnect
+                return
+            parser = FrameStreamParser()
+            writer.write(wire("I.3", "1", "0H", "0", "42", "s"))
+            await writer.drain()
+            while chunk := await reader.read(4096):
+                for f in parser.push(chunk):
+                    await from_daemon.put(f.to_wire())
+
+        moxa_srv = await asyncio.start_server(moxa, "127.0.0.1", 0)
+        host, port = moxa_srv.sockets[0].getsockname()[:2]
+        gw = Gateway("hqp", host, port, backoff_initial_s=0.01)
+
+        servers = await start_listeners([gw], DaemonConfig(listen_port_base=0, unix_dir=str(tmp_path)))
+        task = asyncio.create_task(gw.run())
+        try:
+            reader, writer = await asyncio.open_unix_connection(str(tmp_path / "hqp.sock"))
+            await asyncio.wait_for(gw.connected.wait(), 2.0)
+            while gw.stats.connects < 2:
+                await asyncio.sleep(0.01)
+
+            ack = await asyncio.wait_for(from_daemon.get(), 2.0)
+            assert ack == wire("I.3", "1", "0", "0H", "42", "a")
+            # the client's command is forwarded, its ACK is not (daemon already ACKed)
+            writer.write(wire("O.1", "1", "0", "0H", "7", "s") + wire("I.3", "1", "0", "0H", "42", "a"))
+            await writer.drain()
+            fwd = await asyncio.wait_for(from_daemon.get(), 2.0)
+            assert fwd == wire("O.1", "1", "0", "0H", "7", "s")
+            await asyncio.sleep(0.05)
+            assert gw.stats.client_acks_dropped == 1
+            assert gw.stats.reconnects == 1
+            snap = gw.snapshot()
+            assert snap["acks_sent"] == 1 and snap["frames_rx"] == 1
+            writer.close()
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            for srv in servers:
+                srv.close()
+            moxa_srv.close()
+
+    asyncio.run(run())
+
+
+def test_subscriber_receives_bus_frames() -> None:
+    async def run() -> bytes:
+        ready = asyncio.Event()
+
+        async def moxa(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            await ready.wait()
+            writer.write(wire("I.5", "0", "0H", "0", "9", "a"))
+            await writer.drain()
+            await reader.read()
+
+        moxa_srv = await asyncio.start_server(moxa, "127.0.0.1", 0)
+        host, port = moxa_srv.sockets[0].getsockname()[:2]
+        gw = Gateway("hqp", host, port)
+        local = await asyncio.start_server(gw.serve_client, "127.0.0.1", 0)
+        task = asyncio.create_task(gw.run())
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", local.sockets[0].getsockname()[1])
+            while not gw.subscribers:
+                await asyncio.sleep(0.01)
+            ready.set()
+            data = await asyncio.wait_for(reader.readuntil(b"\r\n"), 2.0)
+            writer.close()
+            return data
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            local.close()
+            moxa_srv.close()
+
+    assert asyncio.run(run()) == wire("I.5", "0", "0H", "0", "9", "a")
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from lib.bus_timing import BusTiming, LatencyHistogram
+
+from _frames import frame
+
+
+def test_histogram_percentiles_within_bucket_precision() -> None:
+    h = LatencyHistogram()
+    for ms in range(1, 101):
+        h.record(ms / 1000.0)
+    assert h.count == 100
+    assert abs(h.percentile(0.50) - 0.050) <= 0.050 / 16 + 1e-6
+    assert abs(h.percentile(0.99) - 0.099) <= 0.099 / 16 + 1e-6
+    assert h.percentile(1.0) == 0.100
+    s = h.summary_ms()
+    assert abs(s["mean"] - 50.5) < 1e-9
+    assert s["min"] == 1.0 and s["max"] == 100.0
+
+
+def test_histogram_clamps_out_of_range_values() -> None:
+    h = LatencyHistogram(max_s=1.0)
+    h.record(0.0)
+    h.record(5.0)
+    assert h.count == 2
+    assert h.counts[0] == 1 and h.counts[-1] == 1
+    assert h.percentile(1.0) == 5.0
+    assert LatencyHistogram().percentile(0.5) == 0.0
+
+
+def test_pairs_acks_and_counts_retries() -> None:
+    bt = BusTiming(pending_timeout_s=1.0)
+    # our command to 05: two tries, answered 10 ms after the second
+    bt.observe(frame("O.1", "1", "0", "05", "7"), 10.000)
+    bt.observe(frame("O.1", "1", "0", "05", "7"), 10.126)
+    bt.observe(frame("O.1", "1", "05", "0", "7", "a"), 10.136)
+    # module 0H event answered by the controller after 4 ms
+    bt.observe(frame("I.3", "1", "0H", "0", "42"), 10.200)
+    bt.observe(frame("I.3", "1", "0", "0H", "42", "a"), 10.204)
+    # ACK lost: the module sends the event again
+    bt.observe(frame("I.3", "1", "0H", "0", "42"), 10.330)
+    bt.observe(frame("I.3", "1", "0", "0H", "42", "a"), 10.333)
+    # ACK for something never seen
+    bt.observe(frame("O.2", "0", "06", "0", "9", "a"), 10.400)
+
+    rep = bt.report()
+    m05 = rep["modules"]["05"]
+    assert (m05["exchanges"], m05["retries"], m05["answered"]) == (1, 1, 1)
+    assert abs(m05["module_ack_ms"]["max"] - 136.0) < 1e-6
+    assert abs(m05["module_rtt_ms"]["max"] - 10.0) < 1e-6
+    m0h = rep["modules"]["0H"]
+    assert (m0h["exchanges"], m0h["retries"], m0h["answered"]) == (1, 1, 2)
+    assert abs(m0h["controller_ack_ms"]["max"] - 4.0) < 1e-6
+    assert rep["retries"] == 2 and rep["exchanges"] == 2
+    assert rep["retry_rate"] == 0.5
+    assert rep["late_acks"] == 1
+    assert rep["pending"] == 0
+
+
+def test_unanswered_exchanges_expire() -> None:
+    bt = BusTiming(pending_timeout_s=1.0)
+    bt.observe(frame("O.1", "1", "0", "05", "7"), 0.0)
+    bt.expire(0.5)
+    assert bt.report()["pending"] == 1
+    bt.expire(2.0)
+    rep = bt.report()
+    assert rep["pending"] == 0
+    assert rep["modules"]["05"]["unanswered"] == 1
+    # the same key later is a new exchange, not a retry
+    bt.observe(frame("O.1", "1", "0", "05", "7"), 3.0)
+    assert rep["modules"]["05"]["retries"] == 0
+    assert bt.modules["05"].exchanges == 2
+
+
+def test_bus_utilization() -> None:
+    bt = BusTiming(baud=1000)  # 100 bytes/s
+    frames = [frame("O.1", "1", "0", "05", str(i + 1)) for i in range(5)]
+    for i, f in enumerate(frames):
+        bt.observe(f, i * 0.1)
+    n = sum(len(f.body) + 6 for f in frames)
+    rep = bt.report(duration_s=2.0)
+    assert rep["bytes"] == n
+    assert abs(rep["bus_utilization_pct"] - n / 200.0 * 100.0) < 1e-9
+    assert abs(rep["bus_utilization_peak_pct"] - n) < 1e-9
+    assert rep["frame_gap_ms"]["count"] == 4
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from lib.capture import DIR_RX, DIR_TX, CaptureReader, CaptureWriter, capture_files
+
+from _frames import frame
+
+
+T0 = 1_769_594_400.0  # fixed epoch, one record per second below
+
+
+def _write_hour(out: Path, **kw: object) -> CaptureWriter:
+    w = CaptureWriter(out, block_records=100, block_seconds=1e9, **kw)  # type: ignore[arg-type]
+    for i in range(3600):
+        src = "0H" if i % 3 == 0 else "05"
+        cmd = f"I.{i % 4}" if i % 2 == 0 else "O.1"
+        w.write(frame(cmd, str(i % 2), src, "0", str(i % 511 + 1)), T0 + i)
+        if i % 50 == 0:
+            w.write(frame(cmd, "1", "0", src, "1", "a"), T0 + i, DIR_TX)
+    return w
+
+
+def test_roundtrip_and_indexed_query_reads_only_candidate_blocks(tmp_path: Path) -> None:
+    w = _write_hour(tmp_path, rotate_seconds=0, rotate_bytes=0)
+    w.close()
+    (path,) = w.files
+    r = CaptureReader(path)
+    assert r.indexed
+    assert r.records == 3600 + 72
+    assert r.time_range() == (T0, T0 + 3599)
+
+    all_recs = list(r.iter_records())
+    assert len(all_recs) == r.records
+    assert all_recs[0].frame == frame("I.0", "0", "0H", "0", "1")
+    assert sum(1 for x in all_recs if x.direction == DIR_TX) == 72
+
+    r = CaptureReader(path)
+    hits = list(r.iter_records(t_from=T0 + 600, t_to=T0 + 900, src="0H", cmd="I.*", direction=DIR_RX))
+    expected = [
+        i for i in range(600, 901) if i % 3 == 0 and i % 2 == 0
+    ]
+    assert [int(h.ts - T0) for h in hits] == expected
+    assert all(h.frame.src == "0H" and h.frame.cmd.startswith("I.") for h in hits)
+    # 300 s window with 100-record blocks touches only a handful of blocks
+    assert r.blocks_read <= 5 < len(r.blocks)
+
+    r = CaptureReader(path)
+    assert list(r.iter_records(cmd="UD")) == []
+    assert r.blocks_read == 0
+
+
+def test_unclosed_file_is_scanned(tmp_path: Path) -> None:
+    w = _write_hour(tmp_path, rotate_seconds=0, rotate_bytes=0)
+    w.flush()
+    (path,) = w.files
+    # simulate a crash: no index/trailer, plus a torn block header at the end
+    with path.open("ab") as fh:
+        fh.write(b"HQBK\x00\x00")
+    r = CaptureReader(path)
+    assert not r.indexed
+    assert r.records == 3600 + 72
+    hits = list(r.iter_records(t_from=T0 + 10, t_to=T0 + 20, src="05"))
+    assert [int(h.ts - T0) for h in hits if h.direction == DIR_RX] == [i for i in range(10, 21) if i % 3]
+
+
+def test_rotation_by_time_and_size(tmp_path: Path) -> None:
+    w = _write_hour(tmp_path / "by_time", rotate_seconds=900, rotate_bytes=0)
+    w.close()
+    assert len(w.files) == 4
+    files = capture_files([tmp_path / "by_time"])
+    assert files == sorted(w.files)
+    assert sum(CaptureReader(p).records for p in files) == 3600 + 72
+
+    w = _write_hour(tmp_path / "by_size", rotate_seconds=0, rotate_bytes=4096)
+    w.close()
+    assert len(w.files) > 1
+    assert sum(CaptureReader(p).records for p in w.files) == 3600 + 72
@@ -8,6 +8,8 @@ import sys
 def _load_extractor_module():
     repo_root = Path(__file__).resolve().parents[3]
     mod_path = repo_root / "Reverse engineering" / "tools" / "homiq_extract_db.py"
+    # shares TableWriter with homiq_extract_mysql_dump.py next to it
+    sys.path.insert(0, str(mod_path.parent))
     spec = importlib.util.spec_from_file_location("homiq_extract_db", mod_path)
     assert spec and spec.loader
     module = importlib.util.module_from_spec(spec)
@@ -109,3 +111,219 @@ def test_expand_actions_bitmask() -> None:
     addrs = {e["trigger"]["address"] for e in expanded}
     assert addrs == {"0H.1", "0H.3"}
 
+
+
+_ARRAY_OIDS = {1007, 1009}  # int4[], text[]
+
+
+class _FakeCursor:
+    def __init__(self, tables: dict[str, tuple[list[tuple[str, int]], list[tuple]]], csv_text: str = "", log=None, pks=None) -> None:
+        self.tables = tables
+        self.log = log if log is not None else []
+        self.pks = pks or {}
+        self.csv_text = csv_text
+        self.description: list[tuple[str, int]] = []
+        self._rows: list = []
+        self.itersize = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        pass
+
+    def execute(self, sql: str, params=None) -> None:
+        self.log.append(sql)
+        if "PRIMARY KEY" in sql:
+            self._rows = [{"table_name": t, "column_name": c} for t, cols in self.pks.items() if t in params[0] for c in cols]
+            return
+        if "information_schema" in sql:
+            self._rows = [{"table_name": t} for t in params[0] if t in self.tables]
+            return
+        if "pg_type" in sql:
+            self._rows = [(oid,) for oid in params[0] if oid in _ARRAY_OIDS]
+            return
+        if "pg_export_snapshot" in sql:
+            self._rows = [{"snapshot": "00000003-0000001B-1"}]
+            return
+        if sql.startswith("SET TRANSACTION"):
+            return
+        name = sql.split('"')[1]
+        cols, rows = self.tables[name]
+        self.description = cols
+        self._rows = [] if "LIMIT 0" in sql else rows
+
+    def fetchall(self):
+        return self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def copy_expert(self, sql: str, fh) -> None:
+        fh.write(self.csv_text.encode("utf-8"))
+
+
+class _FakeConn:
+    def __init__(self, tables, csv_text: str = "", pks=None) -> None:
+        self.tables = tables
+        self.csv_text = csv_text
+        self.pks = pks
+        self.log: list[str] = []
+        self.session: dict = {}
+
+    def cursor(self, name=None, cursor_factory=None):
+        return _FakeCursor(self.tables, self.csv_text, self.log, self.pks)
+
+    def set_session(self, **kw) -> None:
+        self.session = kw
+
+    def rollback(self) -> None:
+        pass
+
+
+class _FakePool:
+    def __init__(self, tables) -> None:
+        self.conns = [_FakeConn(tables) for _ in range(3)]
+        self.out = 0
+
+    def getconn(self):
+        self.out += 1
+        return self.conns[self.out - 1]
+
+    def putconn(self, conn) -> None:
+        self.out -= 1
+
+
+def test_export_streaming_writes_tables_and_entities(tmp_path: Path) -> None:
+    import json
+
+    mod_cols = [("m_master", 1043), ("m_adr", 1043), ("m_type", 1043), ("m_name", 1043)]
+    tables = {
+        "modules": (mod_cols, [("HQP", "0H", "O", "Relays")]),
+        "masters": ([("m_id", 23)], [(1,), (2,)]),
+    }
+    meta = _mod.export_streaming(_FakeConn(tables), tmp_path, source="test", fmt="ndjson", itersize=1)
+
+    assert meta["counts"]["masters"] == 2 and meta["counts"]["cron"] == 0
+    assert {k: meta["export"][k] for k in ("mode", "itersize", "table_format", "jobs")} == {
+        "mode": "cursor",
+        "itersize": 1,
+        "table_format": "ndjson",
+        "jobs": 1,
+    }
+    lines = (tmp_path / "tables" / "masters.ndjson").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(x) for x in lines] == [{"m_id": 1}, {"m_id": 2}]
+    assert (tmp_path / "entities.json").exists()
+    assert (tmp_path / "tables" / "_derived.json").exists()
+
+    meta = _mod.export_streaming(_FakeConn(tables), tmp_path / "one", source="test", single_file=True)
+    combined = json.loads((tmp_path / "one" / "export.json").read_text(encoding="utf-8"))
+    assert combined["tables"]["masters"] == [{"m_id": 1}, {"m_id": 2}]
+    assert combined["tables"]["_derived"] == {"actions_expanded": []}
+
+
+def test_copy_rows_cast_by_column_type() -> None:
+    cols = [("id", 23), ("on", 16), ("t", 1114), ("v", 701), ("name", 1043)]
+    conn = _FakeConn({"x": (cols, [])})
+    conn.csv_text = '1,t,2024-01-02 03:04:05,1.5,"a,b"\n2,f,\\N,\\N,\\N\n'
+    rows = list(_mod.iter_table_rows_copy(conn, "x"))
+    assert rows[0] == {"id": 1, "on": True, "t": _mod.dt.datetime(2024, 1, 2, 3, 4, 5), "v": 1.5, "name": "a,b"}
+    assert rows[1] == {"id": 2, "on": False, "t": None, "v": None, "name": None}
+
+
+def test_copy_rows_cast_json_numeric_and_fall_back_for_arrays() -> None:
+    from decimal import Decimal
+
+    cols = [("id", 23), ("cfg", 3802), ("j", 114), ("amount", 1700)]
+    conn = _FakeConn({"x": (cols, [])})
+    conn.csv_text = '1,"{""a"": [1, 2]}","[1]",12.50\n2,\\N,null,\\N\n'
+    rows = list(_mod.iter_table_rows_copy(conn, "x"))
+    assert rows == [
+        {"id": 1, "cfg": {"a": [1, 2]}, "j": [1], "amount": Decimal("12.50")},
+        {"id": 2, "cfg": None, "j": None, "amount": None},
+    ]
+
+    # no COPY cast for arrays: the table is read through the cursor instead
+    conn = _FakeConn({"y": ([("id", 23), ("tags", 1009)], [(1, ["a", "b"])])})
+    conn.csv_text = '1,"{a,b}"\n'
+    assert list(_mod.iter_table_rows_copy(conn, "y")) == [{"id": 1, "tags": ["a", "b"]}]
+
+
+def test_export_streaming_concurrent_shares_snapshot(tmp_path: Path) -> None:
+    tables = {t: ([("id", 23)], [(i,) for i in range(n)]) for n, t in enumerate(["masters", "macro", "cron", "global"], 1)}
+    serial = _mod.export_streaming(_FakeConn(tables), tmp_path / "serial", source="test")
+    pool = _FakePool(tables)
+    meta = _mod.export_streaming(_FakeConn(tables), tmp_path / "par", source="test", pool=pool, jobs=3)
+
+    assert meta["counts"] == serial["counts"]
+    assert list(meta["counts"]) == list(_mod.CORE_TABLES)
+    assert meta["export"]["jobs"] == 3 and meta["export"]["snapshot"] == "00000003-0000001B-1"
+    assert set(meta["export"]["table_seconds"]) == set(_mod.CORE_TABLES)
+    assert pool.out == 0
+    for c in pool.conns:
+        assert c.session == {"isolation_level": "REPEATABLE READ", "readonly": True}
+        assert c.log[0].startswith("SET TRANSACTION SNAPSHOT")
+    for t in tables:
+        assert (tmp_path / "par" / "tables" / f"{t}.json").read_text() == (tmp_path / "serial" / "tables" / f"{t}.json").read_text()
+
+
+def test_incremental_export_rewrites_only_changed_tables(tmp_path: Path) -> None:
+    import json
+    import os
+
+    mod_cols = [("m_id", 23), ("m_master", 1043), ("m_adr", 1043), ("m_type", 1043), ("m_name", 1043)]
+    tables = {
+        "modules": (mod_cols, [(1, "HQP", "0H", "O", "Relays"), (2, "HQP", "05", "O", "Hall")]),
+        "masters": ([("m_id", 23)], [(1,), (2,)]),
+        "cron": ([("c_what", 1043)], [("x",)]),
+    }
+    pks = {"modules": ["m_id"], "masters": ["m_id"]}
+    _mod.export_streaming(_FakeConn(tables, pks=pks), tmp_path, source="test", incremental=True)
+    assert (tmp_path / "manifest.json").exists() and not (tmp_path / "changes.json").exists()
+
+    untouched = tmp_path / "tables" / "masters.json"
+    os.utime(untouched, ns=(1, 1))
+    tables["modules"] = (mod_cols, [(1, "HQP", "0H", "O", "Relays 1"), (3, "HQP", "0A", "O", "Garage")])
+    meta = _mod.export_streaming(_FakeConn(tables, pks=pks), tmp_path, source="test", incremental=True)
+
+    assert meta["export"]["changed"] == ["modules", "entities"]
+    assert untouched.stat().st_mtime_ns == 1
+    assert not list((tmp_path / "tables").glob("*.tmp"))
+    changes = json.loads((tmp_path / "changes.json").read_text(encoding="utf-8"))
+    mods = changes["tables"]["modules"]
+    assert [r["m_id"] for r in mods["added"]] == [3]
+    assert [r["m_id"] for r in mods["removed"]] == [2]
+    assert mods["modified"][0]["key"] == "[1]"
+    assert mods["modified"][0]["changes"] == {"m_name": ["Relays", "Relays 1"]}
+    ent = changes["entities"]
+    assert [e["address"] for e in ent["added"]] == ["0A"]
+    assert [e["address"] for e in ent["removed"]] == ["05"]
+    assert [m["key"] for m in ent["modified"]] == ["module:HQP:0H"]
+    rows = json.loads((tmp_path / "tables" / "modules.json").read_text(encoding="utf-8"))
+    assert [r["m_id"] for r in rows] == [1, 3]
+
+
+def test_row_hashes_only_in_incremental_manifests(tmp_path: Path) -> None:
+    import json
+
+    mod_cols = [("m_id", 23), ("m_master", 1043), ("m_adr", 1043), ("m_type", 1043), ("m_name", 1043)]
+    tables = {"modules": (mod_cols, [(1, "HQP", "0H", "O", "Relays"), (2, "HQP", "05", "O", "Hall")])}
+    pks = {"modules": ["m_id"]}
+
+    def manifest(d: Path) -> dict:
+        return json.loads((d / "manifest.json").read_text(encoding="utf-8"))
+
+    _mod.export_streaming(_FakeConn(tables, pks=pks), tmp_path / "inc", source="test", fmt="ndjson", incremental=True)
+    _mod.export_streaming(_FakeConn(tables, pks=pks), tmp_path, source="test", fmt="ndjson")
+    full = manifest(tmp_path)["tables"]["modules"]
+    assert "row_hashes" not in full
+    assert full["digest"] == manifest(tmp_path / "inc")["tables"]["modules"]["digest"]
+
+    # an incremental run on top of a plain export hashes the old file for the diff
+    tables["modules"] = (mod_cols, [(1, "HQP", "0H", "O", "Relays 1"), (2, "HQP", "05", "O", "Hall")])
+    meta = _mod.export_streaming(_FakeConn(tables, pks=pks), tmp_path, source="test", fmt="ndjson", incremental=True)
+    assert meta["export"]["changed"] == ["modules", "entities"]
+    mods = json.loads((tmp_path / "changes.json").read_text(encoding="utf-8"))["tables"]["modules"]
+    assert mods["added"] == [] and mods["removed"] == []
+    assert [m["key"] for m in mods["modified"]] == ["[1]"]
+    assert "row_hashes" in manifest(tmp_path)["tables"]["modules"]
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+
+def _tools_dir() -> Path:
+    return Path(__file__).resolve().parents[2] / "tools"
+
+
+# sibling imports (homiq_sql_toc) resolve like when run as a script
+sys.path.insert(0, str(_tools_dir()))
+
+
+def _load_module():
+    mod_path = _tools_dir() / "homiq_extract_mysql_dump.py"
+    spec = importlib.util.spec_from_file_location("homiq_extract_mysql_dump", mod_path)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)  # type: ignore[attr-defined]
+    return module
+
+
+_mod = _load_module()
+extract_mysql_dump = _mod.extract_mysql_dump
+
+DUMP = """-- MySQL dump 10.13
+/*!40101 SET NAMES utf8 */;
+DROP TABLE IF EXISTS `HDevLibOut`;
+INSERT INTO `HDevLibOut` (`id`,`name`,`val`) VALUES (1,'Salon \\\\ lampa',NULL),(2,'Kuchnia',1.5);
+INSERT INTO `HDevLibOut` (`id`,`name`,`val`) VALUES (3,'Łazienka',7);
+INSERT INTO `HLog` VALUES (1,'x'),(2,'y');
+"""
+
+
+def _write_dump(tmp_path: Path) -> Path:
+    p = tmp_path / "dump.sql"
+    p.write_text(DUMP, encoding="utf-8")
+    return p
+
+
+def test_streamed_json_array_matches_rows(tmp_path: Path) -> None:
+    out = tmp_path / "out"
+    meta = extract_mysql_dump(_write_dump(tmp_path), out)
+    assert meta["counts"] == {"HDevLibOut": 3, "HLog": 2}
+    assert meta["table_format"] == "json"
+    rows = json.loads((out / "tables" / "HDevLibOut.json").read_text(encoding="utf-8"))
+    assert rows == [
+        {"id": 1, "name": "Salon \\ lampa", "val": None},
+        {"id": 2, "name": "Kuchnia", "val": 1.5},
+        {"id": 3, "name": "Łazienka", "val": 7},
+    ]
+    assert json.loads((out / "tables" / "HLog.json").read_text(encoding="utf-8")) == [
+        {"_values": [1, "x"]},
+        {"_values": [2, "y"]},
+    ]
+    assert json.loads((out / "meta.json").read_text(encoding="utf-8"))["counts"] == meta["counts"]
+
+
+def test_ndjson_with_table_filter_and_progress(tmp_path: Path) -> None:
+    out = tmp_path / "out"
+    seen = []
+    meta = extract_mysql_dump(
+        _write_dump(tmp_path), out, only_tables={"HLog"}, fmt="ndjson", progress=seen.append, progress_interval_s=0
+    )
+    lines = (out / "tables" / "HLog.ndjson").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(x) for x in lines] == [{"_values": [1, "x"]}, {"_values": [2, "y"]}]
+    assert not (out / "tables" / "HDevLibOut.ndjson").exists()
+    assert meta["stats"]["rows"] == 2
+    final = seen[-1]
+    assert final.bytes_read == final.bytes_total == len(DUMP.encode("utf-8"))
+    assert final.rows == 2
+    assert "rows/s" in final.line()
+
+
+def test_fast_value_parser_matches_reference() -> None:
+    fast = _mod._parse_sql_value_list
+    ref = _mod._parse_sql_value_list_reference
+    samples = [
+        "(1,'a',NULL,-2.5,1e3,'',0x1F)",
+        "(1,'a,b','c\\'d\\\\e\\n') , (2 , 'x' ,null);",
+        "(),(1,),( 'sp ace' ,7)",
+        "(1,'Łódź','tab\\there'),(2,'plain')\n",
+        "junk(1)",
+        "(1)(2)",
+        "('a' 'b')",
+        "(1,'unterminated",
+    ]
+    for s in samples:
+        try:
+            expected = ref(s)
+        except ValueError:
+            try:
+                fast(s)
+            except ValueError:
+                continue
+            raise AssertionError(f"fast parser accepted {s!r}")
+        assert fast(s) == expected, s
+    assert fast("(1,'a,b',NULL)") == [[1, "a,b", None]]
+
+
+def test_parallel_jobs_keep_dump_order(tmp_path: Path) -> None:
+    lines = ["-- MySQL dump 10.13", "CREATE TABLE `HLog` (`id` int);", ""]
+    for i in range(60):
+        table = "HLog" if i % 3 else "HDevLibOut"
+        lines.append(f"INSERT INTO `{table}` VALUES ({i},'r{i}\\n'),({i},'s{i}');")
+        if i % 10 == 0:
+            lines.append("/*!40000 ALTER TABLE `HLog` ENABLE KEYS */;")
+    sql = tmp_path / "dump.sql"
+    sql.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    serial = extract_mysql_dump(sql, tmp_path / "serial", fmt="ndjson")
+    parallel = extract_mysql_dump(sql, tmp_path / "parallel", fmt="ndjson", jobs=2, chunk_bytes=200)
+    assert parallel["counts"] == serial["counts"] == {"HDevLibOut": 40, "HLog": 80}
+    for table in ("HLog", "HDevLibOut"):
+        a = (tmp_path / "serial" / "tables" / f"{table}.ndjson").read_text(encoding="utf-8")
+        b = (tmp_path / "parallel" / "tables" / f"{table}.ndjson").read_text(encoding="utf-8")
+        assert a == b
+    workers = parallel["stats"]["workers"]
+    assert parallel["stats"]["jobs"] == 2
+    assert sum(w["rows"] for w in workers.values()) == 120
+    assert sum(w["chunks"] for w in workers.values()) > 1
+
+
+def test_statement_splitter_is_quote_aware(tmp_path: Path) -> None:
+    sql = tmp_path / "dump.sql"
+    sql.write_bytes(
+        b"-- comment; not a statement\n"
+        b"/*!40101 SET NAMES utf8 */;\n"
+        b"CREATE TABLE `t;x` (`a` int COMMENT 'x;y');\n\n"
+        b"INSERT INTO `HWeb` VALUES (1,'a;b\\';c'),\n(2,\"q;\");\n"
+        b"INSERT INTO `HLog` VALUES (3,'z');\n"
+        b"INSERT INTO `HWeb` VALUES (4,'unterminated;"
+    )
+    data = sql.read_bytes()
+    stmts = [data[a:b] for a, b in _mod._iter_statement_spans(data)]
+    assert stmts[0].startswith(b"CREATE TABLE `t;x`") and stmts[0].endswith(b"'x;y');")
+    assert stmts[1] == b"INSERT INTO `HWeb` VALUES (1,'a;b\\';c'),\n(2,\"q;\");"
+    assert stmts[3] == b"INSERT INTO `HWeb` VALUES (4,'unterminated;"
+    assert len(stmts) == 4
+
+    spans = list(_mod._iter_insert_spans(data, {"HWeb"}))
+    assert [data[a:b][:20] for a, b in spans] == [b"INSERT INTO `HWeb` V"] * 2
+
+    sql.write_bytes(data[: spans[1][0]])  # drop the truncated INSERT
+    meta = extract_mysql_dump(sql, tmp_path / "out", only_tables={"HWeb"}, fmt="ndjson")
+    assert meta["counts"] == {"HWeb": 2}
+    rows = [json.loads(x) for x in (tmp_path / "out" / "tables" / "HWeb.ndjson").read_text().splitlines()]
+    assert rows == [{"_values": [1, "a;b';c"]}, {"_values": [2, '"q;"']}]
+
+
+def test_toc_sidecar_built_once_and_reused(tmp_path: Path) -> None:
+    sql = _write_dump(tmp_path)
+    first = extract_mysql_dump(sql, tmp_path / "a", only_tables={"HLog"})
+    assert first["index"]["state"] == "built"
+    toc = json.loads((tmp_path / "dump.sql.toc.json").read_text(encoding="utf-8"))
+    assert [(e["table"], e["rows"]) for e in toc["entries"]] == [("HDevLibOut", 2), ("HDevLibOut", 1), ("HLog", 2)]
+    for e in toc["entries"]:
+        assert sql.read_bytes()[e["offset"] : e["offset"] + e["length"]].startswith(b"INSERT INTO `" + e["table"].encode())
+
+    second = extract_mysql_dump(sql, tmp_path / "b", only_tables={"HDevLibOut"})
+    assert second["index"]["state"] == "loaded"
+    assert second["counts"] == {"HDevLibOut": 3}
+    assert _mod.list_tables(sql).tables()["HDevLibOut"] == {"statements": 2, "bytes": toc["entries"][0]["length"] + toc["entries"][1]["length"], "rows": 3}
+
+    # a changed dump invalidates the sidecar
+    sql.write_text(DUMP + "INSERT INTO `HLog` VALUES (3,'z');\n", encoding="utf-8")
+    third = extract_mysql_dump(sql, tmp_path / "c", only_tables={"HLog"})
+    assert third["index"]["state"] == "built"
+    assert third["counts"] == {"HLog": 3}
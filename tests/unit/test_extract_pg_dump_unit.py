@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+
+def _tools_dir() -> Path:
+    return Path(__file__).resolve().parents[2] / "tools"
+
+
+sys.path.insert(0, str(_tools_dir()))
+
+
+def _load_module():
+    spec = importlib.util.spec_from_file_location("homiq_extract_pg_dump", _tools_dir() / "homiq_extract_pg_dump.py")
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)  # type: ignore[attr-defined]
+    return module
+
+
+_mod = _load_module()
+
+DUMP = """--
+-- PostgreSQL database dump
+--
+
+CREATE TABLE public.modules (m_id integer, m_adr text, m_name text);
+
+COPY public.modules (m_id, m_adr, m_name) FROM stdin;
+1\t0H\tSalon
+2\t05\tRoleta\\tgóra
+3\t\\N\t
+\\.
+
+COPY public."Empty" (a) FROM stdin;
+\\.
+
+COPY public.outputs (o_id, o_name) FROM stdin;
+7\tLampa\\\\1
+\\.
+
+SELECT pg_catalog.setval('public.modules_m_id_seq', 3, true);
+"""
+
+
+def test_copy_blocks_to_json_with_toc(tmp_path: Path) -> None:
+    sql = tmp_path / "homiq.sql"
+    sql.write_text(DUMP, encoding="utf-8")
+
+    toc = _mod.list_tables(sql)
+    assert {k: v["rows"] for k, v in toc.tables().items()} == {"modules": 3, "Empty": 0, "outputs": 1}
+
+    meta = _mod.extract_pg_dump(sql, tmp_path / "out", only_tables={"modules", "outputs"})
+    assert meta["index"]["state"] == "loaded"
+    assert meta["counts"] == {"modules": 3, "outputs": 1}
+    rows = json.loads((tmp_path / "out" / "tables" / "modules.json").read_text(encoding="utf-8"))
+    assert rows == [
+        {"m_id": "1", "m_adr": "0H", "m_name": "Salon"},
+        {"m_id": "2", "m_adr": "05", "m_name": "Roleta\tgóra"},
+        {"m_id": "3", "m_adr": None, "m_name": ""},
+    ]
+    outputs = (tmp_path / "out" / "tables" / "outputs.json").read_text(encoding="utf-8")
+    assert json.loads(outputs) == [{"o_id": "7", "o_name": "Lampa\\1"}]
+    assert not (tmp_path / "out" / "tables" / "Empty.json").exists()
+
+
+def test_copy_field_escapes_are_utf8_bytes() -> None:
+    # "ó" is C3 B3 in UTF-8, written as octal or hex byte escapes
+    assert _mod._copy_field("g\\303\\263ra") == "góra"
+    assert _mod._copy_field("g\\xc3\\xb3ra\\tx") == "góra\tx"
+    assert _mod._copy_field("\\101\\x42\\\\") == "AB\\"
+    assert _mod._copy_field("\\N") is None
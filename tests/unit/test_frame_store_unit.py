@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from lib.capture import DIR_RX, DIR_TX
+from lib.frame_store import FrameStore
+from lib.homiq_frame import Frame
+
+from _frames import frame
+
+
+T0 = 1_800_000_000.0  # minute-aligned
+
+
+def _traffic() -> list[tuple[float, int, Frame, bool]]:
+    return [
+        # 0H event, ACK lost once: first try + retry + our ACK
+        (T0 + 1.0, DIR_RX, frame("I.3", "1", "0H", "0", "42"), True),
+        (T0 + 1.126, DIR_RX, frame("I.3", "1", "0H", "0", "42"), True),
+        (T0 + 1.13, DIR_TX, frame("I.3", "1", "0", "0H", "42", "a"), True),
+        # our command to 0H answered by the module
+        (T0 + 2.0, DIR_TX, frame("O.1", "1", "0", "0H", "7"), True),
+        (T0 + 2.01, DIR_RX, frame("O.1", "1", "0H", "0", "7", "a"), True),
+        # next minute: 05 temperature, one CRC failure
+        (T0 + 61.0, DIR_RX, frame("T.0", "21.5", "05", "0", "1"), True),
+        (T0 + 62.0, DIR_RX, frame("T.0", "21.5", "05", "0", "2"), False),
+        # same PKT much later is a new event, not a retry
+        (T0 + 600.0, DIR_RX, frame("I.3", "0", "0H", "0", "42"), True),
+    ]
+
+
+def test_rollups_and_retry_rate(tmp_path: Path) -> None:
+    db = tmp_path / "h.db"
+    with FrameStore(db) as store:
+        recs = _traffic()
+        assert store.append(recs[:4]) == 4
+        assert store.append(recs[4:]) == 4  # retry tracking spans batches
+
+    with FrameStore(db, readonly=True) as store:
+        r = store.retry_rate("0H", T0, T0 + 3600)
+        assert (r["frames"], r["sends"], r["retries"], r["acks"]) == (6, 3, 1, 2)
+        assert r["retry_rate"] == 0.25
+        assert store.retry_rate("0H", T0, T0 + 3600, cmd="I.*")["retries"] == 1
+        assert store.retry_rate("0H", T0 + 120, T0 + 3600)["retries"] == 0  # minute bounds
+        assert store.retry_rate("ZZ")["frames"] == 0
+
+        by_mod = {r["module"]: r for r in store.rollup(group_by=("module",))}
+        assert set(by_mod) == {"0H", "05"}
+        assert by_mod["05"]["crc_bad"] == 1 and by_mod["05"]["sends"] == 1
+
+        per_min = store.rollup(module="0H", group_by=("minute", "cmd"))
+        assert [(r["minute"], r["cmd"], r["frames"]) for r in per_min] == [
+            (T0, "I.3", 3),
+            (T0, "O.1", 2),
+            (T0 + 600, "I.3", 1),
+        ]
+
+        rows = list(store.frames(src="0H", cmd="I.*"))
+        assert [r["retry"] for r in rows] == [False, True, False]
+        assert rows[0] == {
+            "ts": T0 + 1.0, "dir": "rx", "src": "0H", "dst": "0", "cmd": "I.3",
+            "val": "1", "pkt": "42", "top": "s", "crc_ok": True, "retry": False,
+        }
+        assert len(list(store.frames(T0 + 60, T0 + 120))) == 2
+
+
+def test_strings_are_dictionary_encoded_across_reopen(tmp_path: Path) -> None:
+    db = tmp_path / "h.db"
+    with FrameStore(db) as store:
+        store.append(_traffic())
+    with FrameStore(db) as store:
+        store.append([(T0 + 700.0, DIR_RX, frame("UD", "1", "0K", "0", "3"), True)])
+        assert store.info()["frames"] == 9
+
+    conn = sqlite3.connect(db)
+    strings = dict(conn.execute("SELECT s, id FROM strings"))
+    assert sorted(strings) == ["0", "05", "0H", "0K", "I.3", "O.1", "T.0", "UD"]
+    assert len(set(strings.values())) == len(strings)
+    assert conn.execute("SELECT typeof(src), typeof(cmd) FROM frames LIMIT 1").fetchone() == ("integer", "integer")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
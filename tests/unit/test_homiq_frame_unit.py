@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from lib import homiq_frame as hf
+
+from _frames import wire
+
+
+def _random_payloads(n: int, seed: int = 1) -> list[str]:
+    rnd = random.Random(seed)
+    alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz._-"
+    return ["".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 24))) for _ in range(n)]
+
+
+def test_crc8_table_matches_bitwise_oracles() -> None:
+    for i in range(256):
+        ch = chr(i)
+        assert hf.crc8_table(ch) == hf.crc8_maxim_1wire(ch) == hf.crc8_homiq_lsb_poly18(ch)
+    for p in _random_payloads(500):
+        exp = hf.crc8_homiq_lsb_poly18(p)
+        assert hf.crc8_table(p) == exp
+        b = p.encode("ascii")
+        assert hf.crc8_table(b) == exp
+        assert hf.crc8_table(bytearray(b)) == exp
+        assert hf.crc8_table(memoryview(b)) == exp
+
+
+def test_crc8_table_non_latin_str_keeps_reference_semantics() -> None:
+    p = "O.3ŀ1"
+    assert hf.crc8_table(p) == hf.crc8_maxim_1wire(p)
+
+
+def test_known_ack_example_from_wiki() -> None:
+    req = hf.decode_frame("<;I.3;1;0H;0;42;s;143;>")
+    assert req is not None
+    ack = hf.decode_frame(hf.make_ack(req))
+    assert ack is not None
+    assert (ack.src, ack.dst, ack.top) == ("0", "0H", "a")
+    assert hf.validate_crc(ack)
+    assert hf.make_ack_frame(req) == ack
+    assert hf.make_ack_frame(req).to_wire() == hf.make_ack(req).encode("ascii")
+
+
+def test_crc8_batch_pure_python_fallback() -> None:
+    payloads = _random_payloads(200)
+    assert hf.crc8_batch(payloads, use_numpy=False) == [hf.crc8_maxim_1wire(p) for p in payloads]
+    assert hf.crc8_batch([], use_numpy=False) == []
+
+
+def test_crc8_batch_numpy_matches_reference() -> None:
+    pytest.importorskip("numpy")
+    payloads = _random_payloads(300) + ["", "x"]
+    assert hf.crc8_batch(payloads, use_numpy=True) == [hf.crc8_maxim_1wire(p) for p in payloads]
+
+
+def test_validate_crc_batch() -> None:
+    good = hf.decode_frame(hf.encode_frame("O.3", "1", "0", "0H", "12", "s", hf.compute_crc_dec("O.3", "1", "0", "0H", "12", "s")))
+    bad = hf.Frame(cmd="O.3", val="1", src="0", dst="0H", pkt="12", top="s", crc="999")
+    junk = hf.Frame(cmd="O.3", val="1", src="0", dst="0H", pkt="12", top="s", crc="x")
+    assert good is not None
+    assert hf.validate_crc_batch([good, bad, junk], use_numpy=False) == [True, False, False]
+
+
+def _legacy_split(data: str) -> list[hf.Frame]:
+    # previous str-based parser, kept here as the reference behaviour
+    buf = data
+    out: list[hf.Frame] = []
+    while True:
+        begin = buf.find("<;")
+        if begin < 0:
+            break
+        end = buf.find(";>", begin)
+        if end < 0:
+            break
+        raw = buf[begin : end + 2]
+        buf = buf[end + 2 :]
+        f = hf.decode_frame(raw)
+        if f is not None:
+            out.append(f)
+    return out
+
+
+def test_stream_parser_matches_legacy_on_arbitrary_chunking() -> None:
+    rnd = random.Random(7)
+    stream = b"junk\r\n" + b"".join(
+        wire(f"O.{i % 10}", str(i % 2), "0", "0H", str(i % 511 + 1), "s") + (b"xx" if i % 13 == 0 else b"")
+        for i in range(300)
+    ) + b"<;broken;>\r\n<;I.3;1;0H;0;42"
+    expected = _legacy_split(stream.decode("ascii"))
+
+    p = hf.FrameStreamParser()
+    got: list[hf.Frame] = []
+    i = 0
+    while i < len(stream):
+        step = rnd.randint(1, 97)
+        got.extend(p.push(stream[i : i + step]))
+        i += step
+    assert got == expected
+    assert p.frames == 300
+    assert p.bad_frames == 1
+    assert p.garbage_bytes == len(b"junk") + len(b"xx") * len(range(0, 300, 13))
+    assert p.pending == len(b"<;I.3;1;0H;0;42")
+
+
+def test_stream_parser_drops_junk_without_frame_start() -> None:
+    p = hf.FrameStreamParser()
+    assert p.push(b"abc" * 100 + b"<") == []
+    assert p.pending == 1
+    assert p.garbage_bytes == 300
+    frames = p.push(b";I.3;1;0H;0;42;s;143;>\r\n")
+    assert [f.cmd for f in frames] == ["I.3"]
+    assert p.pending == 0
+
+
+def test_stream_parser_resync_policies() -> None:
+    good = wire("O.1", "1", "0", "0H", "5", "s")
+
+    p = hf.FrameStreamParser(max_buffer=32, resync="next_start")
+    assert p.push(b"<;" + b"A" * 40 + b"<;UD;u") == []
+    assert p.resyncs == 1
+    assert p.dropped_bytes == 42
+    assert p.pending == len(b"<;UD;u")
+
+    p = hf.FrameStreamParser(max_buffer=32, resync="drop")
+    assert p.push(b"<;" + b"A" * 40) == []
+    assert p.pending == 0
+    assert p.dropped_bytes == 42
+    assert [f.cmd for f in p.push(good)] == ["O.1"]
+
+    with pytest.raises(ValueError):
+        hf.FrameStreamParser(resync="bogus")  # type: ignore[arg-type]
+
+
+def test_frame_keeps_dataclass_like_api() -> None:
+    import pickle
+    from dataclasses import FrozenInstanceError
+
+    f = hf.Frame(cmd="O.3", val="1", src="0", dst="0H", pkt="12", top="s", crc="143")
+    g = hf.Frame("O.3", "1", "0", "0H", "12", "s", "143")
+    assert f == g and hash(f) == hash(g)
+    assert f != hf.Frame("O.3", "0", "0", "0H", "12", "s", "143")
+    assert (f.cmd, f.val, f.src, f.dst, f.pkt, f.top, f.crc) == ("O.3", "1", "0", "0H", "12", "s", "143")
+    assert repr(f) == "Frame(cmd='O.3', val='1', src='0', dst='0H', pkt='12', top='s', crc='143')"
+    assert f.to_dict()["dst"] == "0H"
+    assert pickle.loads(pickle.dumps(f)) == f
+    with pytest.raises(FrozenInstanceError):
+        f.cmd = "O.4"  # type: ignore[misc]
+    assert not hasattr(f, "__dict__")
+
+
+def test_frame_bytes_views_and_crc() -> None:
+    raw = wire("UD", "u", "0", "05", "7", "s")
+    f = hf.decode_frame_bytes(raw)
+    assert f is not None
+    assert f == hf.decode_frame(raw.decode("ascii"))
+    assert f.to_wire() == raw
+    assert f.field_view("dst").tobytes() == b"05"
+    assert f.crc_payload_bytes() == f.crc_payload().encode("ascii")
+    assert hf.validate_crc(f)
+
+    odd = hf.Frame(cmd="A;B", val="1", src="0", dst="0H", pkt="1", top="s", crc="0")
+    assert odd.cmd == "A;B"
+    assert odd.crc_payload_bytes() == odd.crc_payload().encode("ascii")
+
+
+def test_decode_frame_field_rules() -> None:
+    assert hf.decode_frame("<;O.3;1;0;0H;12;x;143;>") is None
+    assert hf.decode_frame("<;O.3;1;0;0H;12;s;>") is None
+    assert hf.decode_frame("<;>") is None
+    f = hf.decode_frame("  <;O.3;1;0;0H;12;a;143;extra;>\r\n")
+    assert f is not None and f.crc == "143" and f.top == "a"
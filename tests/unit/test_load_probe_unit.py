@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+
+from lib.aio_transports import open_tcp
+from lib.load_probe import run_probe
+from lib.replay import ReplayItem, ReplayServer
+
+from _frames import frame
+
+
+def _idle_bus() -> list[ReplayItem]:
+    # one frame now, one an hour later: keeps the stand-in session open
+    return [
+        ReplayItem(0.0, frame("T.0", "21.5", "0H", "0", "1", "a")),
+        ReplayItem(3600.0, frame("T.0", "21.5", "0H", "0", "2", "a")),
+    ]
+
+
+def _probe(rates: list[float], **server_kw: object) -> tuple[dict, dict]:
+    async def run():
+        server = ReplayServer(_idle_bus, retry=False, **server_kw)
+        srv = await server.start()
+        t = await open_tcp("127.0.0.1", srv.sockets[0].getsockname()[1])
+        try:
+            rep = await run_probe(t, "0H", cmd="O.3", val="1", rates=rates, step_s=0.5, retry_interval_s=0.05, max_tries=5)
+        finally:
+            await t.close()
+            srv.close()
+        return rep, (server.sessions[0].report() if server.sessions else {})
+
+    return asyncio.run(run())
+
+
+def test_probe_finds_knee_of_rate_limited_master() -> None:
+    rep, _ = _probe([5, 10, 80, 160], ack_rate=30.0)
+    assert rep["knee_rate_hz"] == 10
+    assert rep["saturated_at_hz"] == 80
+    # stops after the first saturated step
+    assert [s["rate_hz"] for s in rep["steps"]] == [5, 10, 80]
+    ok, sat = rep["steps"][1], rep["steps"][2]
+    assert ok["success_rate"] == 1.0 and ok["first_try_rate"] == 1.0 and ok["retries"] == 0
+    assert sat["first_try_rate"] < 0.99 and sat["retries"] > 0
+    assert sat["sent"] == 40
+
+
+def test_probe_measures_ack_latency() -> None:
+    rep, _ = _probe([20], ack_delay_s=0.01)
+    step = rep["steps"][0]
+    assert rep["saturated_at_hz"] is None and rep["knee_rate_hz"] == 20
+    assert step["acked"] == step["sent"] == 10
+    assert 10.0 <= step["latency_ms"]["p50"] < 45.0
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import urllib.request
+
+from lib.homiq_frame import FrameStreamParser
+from lib.metrics import CONTENT_TYPE, BusMetrics, MetricsHTTPServer
+
+from _frames import frame
+
+
+def _samples(text: str) -> dict[str, float]:
+    out = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            out[name] = float(value)
+    return out
+
+
+def test_cardinality_is_capped_with_other() -> None:
+    m = BusMetrics(top_src=2, top_cmd=8)
+    for src in ("01", "02", "03", "04"):
+        m.observe(frame("I.1", "1", src, "0", "1"), True, 0.0)
+    m.observe(frame("I.1", "1", "01", "0", "2"), True, 0.0)
+    m.observe(frame("ZZ", "1", "05", "0", "3"), False, 0.0)  # bad CRC never gets a slot
+
+    s = _samples(m.render())
+    assert s['homiq_frames_total{src="01",cmd="I.1",top="s"}'] == 2
+    assert s['homiq_frames_total{src="02",cmd="I.1",top="s"}'] == 1
+    assert s['homiq_frames_total{src="other",cmd="I.1",top="s"}'] == 2
+    assert s['homiq_frames_total{src="other",cmd="other",top="s"}'] == 1
+    assert s['homiq_label_slots{label="src"}'] == 2
+    assert s['homiq_label_slots{label="cmd"}'] == 1
+    assert s["homiq_crc_failures_total"] == 1
+
+
+def test_ack_latency_histogram_and_counters() -> None:
+    parser = FrameStreamParser()
+    list(parser.push(b"junk<;I.1;1;0H;0;1;s;0;>\r\n"))
+    m = BusMetrics(parser=parser)
+    m.observe(frame("O.1", "1", "0", "05", "7"), True, 1.000)
+    m.observe(frame("O.1", "1", "0", "05", "7"), True, 1.126)  # retry
+    m.observe(frame("O.1", "1", "05", "0", "7", "a"), True, 1.130)
+    m.observe(frame("I.3", "1", "0H", "0", "42"), True, 2.000)
+    m.observe(frame("I.3", "1", "0", "0H", "42", "a"), True, 2.003)
+    m.acks_sent = 1
+    m.reconnects = 2
+
+    text = m.render()
+    assert text.endswith("# EOF\n")
+    s = _samples(text)
+    assert s["homiq_retries_total"] == 1
+    assert s["homiq_exchanges_total"] == 2
+    assert s["homiq_transport_reconnects_total"] == 2
+    assert s["homiq_parser_garbage_bytes_total"] == 4
+    assert s['homiq_ack_latency_seconds_count{kind="module"}'] == 1
+    assert s['homiq_ack_latency_seconds_bucket{kind="module",le="0.1"}'] == 0
+    assert s['homiq_ack_latency_seconds_bucket{kind="module",le="0.2"}'] == 1
+    assert s['homiq_ack_latency_seconds_bucket{kind="controller",le="0.002"}'] == 0
+    assert s['homiq_ack_latency_seconds_bucket{kind="controller",le="0.005"}'] == 1
+    assert abs(s['homiq_ack_latency_seconds_sum{kind="module"}'] - 0.130) < 1e-6
+    buckets = [v for k, v in s.items() if k.startswith('homiq_ack_latency_seconds_bucket{kind="module"')]
+    assert buckets == sorted(buckets)
+
+
+def test_http_endpoint() -> None:
+    m = BusMetrics()
+    m.observe(frame("HB", "1", "0H", "0", "1"), True, 0.0)
+    server = MetricsHTTPServer(m, "127.0.0.1", 0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as r:
+            assert r.headers["Content-Type"] == CONTENT_TYPE
+            body = r.read().decode("utf-8")
+    finally:
+        server.close()
+    assert 'homiq_frames_total{src="0H",cmd="HB",top="s"} 1' in body
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from lib.capture import DIR_TX, CaptureWriter
+from lib.homiq_frame import Frame, FrameStreamParser, make_ack
+from lib.replay import ReplayServer, iter_recording
+
+from _frames import frame
+
+
+def _write_jsonl(path: Path, n: int, with_ts: bool) -> None:
+    with path.open("w", encoding="utf-8") as fh:
+        fh.write("--- not a frame ---\n")
+        for i in range(n):
+            o: dict[str, object] = frame(f"I.{i % 8}", "1", "0H", "0", str(i + 1)).to_dict()
+            o["crc_ok"] = True
+            if with_ts:
+                o["ts"] = 1000.0 + i * 0.05
+            fh.write(json.dumps(o) + "\n")
+
+
+async def _client(port: int, ack_every: int) -> tuple[int, list[Frame]]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    parser = FrameStreamParser()
+    got: list[Frame] = []
+    seen = 0
+    while chunk := await reader.read(4096):
+        for f in parser.push(chunk):
+            got.append(f)
+            seen += 1
+            if f.top == "s" and int(f.pkt) % ack_every == 0:
+                writer.write(make_ack(f).encode("ascii"))
+    writer.close()
+    return seen, got
+
+
+def test_replay_asap_with_module_retries(tmp_path: Path) -> None:
+    src = tmp_path / "sniff.jsonl"
+    _write_jsonl(src, 20, with_ts=False)
+
+    async def run():
+        server = ReplayServer(lambda: iter_recording([src]), speed=0, retry=True, retry_interval_s=0.02, max_tries=3)
+        srv = await server.start()
+        seen, got = await _client(srv.sockets[0].getsockname()[1], ack_every=2)
+        srv.close()
+        return server.sessions[0].report(), got
+
+    rep, got = asyncio.run(run())
+    assert rep["frames_sent"] == 20
+    assert rep["acked"] == 10
+    assert rep["unacked"] == 10
+    # every odd pkt is sent max_tries times
+    assert rep["retries_sent"] == 20
+    assert len(got) == 40
+    assert rep["ack_latency_ms"]["max"] < 1000
+
+
+def test_replay_scaled_time_from_capture_and_command_acks(tmp_path: Path) -> None:
+    w = CaptureWriter(tmp_path, rotate_bytes=0, rotate_seconds=0)
+    for i in range(11):
+        w.write(frame("O.1", str(i % 2), "05", "0", str(i + 1), "a"), 2000.0 + i * 0.1)
+        w.write(frame("O.1", "1", "0", "05", "1", "a"), 2000.0 + i * 0.1, DIR_TX)
+    w.close()
+
+    async def run():
+        server = ReplayServer(lambda: iter_recording([tmp_path]), speed=10.0)
+        srv = await server.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", srv.sockets[0].getsockname()[1])
+        writer.write(frame("O.3", "1", "0", "0H", "4").to_wire())
+        start = time.monotonic()
+        data = b""
+        while chunk := await reader.read(4096):
+            data += chunk
+        elapsed = time.monotonic() - start
+        srv.close()
+        return FrameStreamParser().push(data), elapsed, server.sessions[0].report()
+
+    frames, elapsed, rep = asyncio.run(run())
+    # 1.0 s of traffic at 10x
+    assert 0.08 <= elapsed < 0.6
+    assert rep["frames_sent"] == 11  # TX records (our ACKs) are not replayed
+    assert rep["client_commands_acked"] == 1
+    ack = [f for f in frames if f.cmd == "O.3"]
+    assert len(ack) == 1 and (ack[0].src, ack[0].dst, ack[0].top) == ("0H", "0", "a")
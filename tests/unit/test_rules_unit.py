@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from lib.homiq_frame import Frame
+from lib.rules import Effect, MacroStep, RuleIndex
+
+
+def _action(module: str, bit: int, state: str, out: str, value: str, **kw: object) -> dict:
+    return {
+        "trigger": {"master": "HQP", "address": f"{module}.{bit}", "bit": bit},
+        "conditions": {"input_state": state, "input_module_state": ""},
+        "effect": {
+            "master": "HQP",
+            "address": out,
+            "value": value,
+            "delay_s": kw.get("delay", 0),
+            "macro": kw.get("macro", ""),
+            "name": "x",
+        },
+        "active": kw.get("active", 1),
+    }
+
+
+def test_lookup_exact_wildcard_and_inactive() -> None:
+    index = RuleIndex.build(
+        [
+            _action("0H", 1, "1", "05.3", "1"),
+            _action("0H", 1, "", "05.4", "0", delay=2),
+            _action("0H", 1, "0", "05.3", "0"),
+            _action("0H", 2, "1", "0A", "u"),
+            _action("0H", 3, "1", "05.0", "1", active=0),
+        ]
+    )
+    on = index.lookup("HQP", "0H", 1, "1")
+    assert [(e.module, e.cmd, e.value) for e in on] == [("05", "O.3", "1"), ("05", "O.4", "0")]
+    assert on[1].delay_s == 2.0
+    assert [e.cmd for e in index.lookup("HQP", "0H", 1, "0")] == ["O.4", "O.3"]
+    assert [e.cmd for e in index.lookup("HQP", "0H", 1, "7")] == ["O.4"]
+    assert index.lookup("HQP", "0H", 2, "1") == (Effect("HQP", "0A", "UD", "u", 0.0, "", "x"),)
+    assert index.lookup("HQP", "0H", 3, "1") == ()
+    assert index.lookup("HQP", "0H", 9, "1") == ()
+
+    f = Frame("I.2", "1", "0H", "0", "7", "s", "0")
+    assert index.lookup_frame(f, "HQP") == index.lookup("HQP", "0H", 2, "1")
+    assert index.lookup_frame(Frame("I.2", "1", "0H", "0", "7", "a", "0"), "HQP") == ()
+    assert index.lookup_frame(Frame("O.2", "1", "0H", "0", "7", "s", "0"), "HQP") == ()
+
+
+def test_save_load_round_trip_and_macros(tmp_path: Path) -> None:
+    # column order as in docs/AI_AGENT_KNOWLEDGE.md (FAQ-5); names do not matter
+    cols = ("c_name", "c_symbol", "c_sleep", "c_value", "c_state", "c_cmd")
+    macro_rows = [
+        dict(zip(cols, ("_Roleta w górę stop", "_RUE", -1, "s", "U", "UD"))),
+        dict(zip(cols, ("_Roleta w dół stop", "_RDE", -1, "s", "D", "UD"))),
+    ]
+    actions = [_action("0H", 0, "1", "", "", macro="_RUE"), _action("0H", 1, "1", "", "", macro="_M9")]
+    index = RuleIndex.build(actions, macro_rows)
+    assert index.lookup("HQP", "0H", 0, "1")[0].macro == "_RUE"
+    assert index.macros == {"_RUE": [MacroStep("_Roleta w górę stop", "_RUE", -1.0, "s", "U", "UD")]}
+    assert index.stats()["macros_unresolved"] == 1
+
+    for name in ("rules.json", "rules.json.gz"):
+        path = tmp_path / name
+        index.save(path)
+        loaded = RuleIndex.load(path)
+        assert loaded.lookup("HQP", "0H", 0, "1") == index.lookup("HQP", "0H", 0, "1")
+        assert loaded.macros == index.macros
+        assert loaded.stats() == index.stats()
+
+
+def test_from_export_reads_derived_and_ndjson_tables(tmp_path: Path) -> None:
+    tables = tmp_path / "tables"
+    tables.mkdir()
+    derived = {"actions_expanded": [_action("0H", 4, "1", "05.1", "1", macro="_M1")]}
+    (tables / "_derived.json").write_text(json.dumps(derived), encoding="utf-8")
+    row = {"n": "Scena", "s": "_M1", "sl": "0", "v": "1", "st": "", "c": "O.1"}
+    (tables / "macro.ndjson").write_text(json.dumps(row) + "\n", encoding="utf-8")
+    index = RuleIndex.from_export(tmp_path)
+    assert index.lookup("HQP", "0H", 4, "1")[0].cmd == "O.1"
+    assert index.macros == {"_M1": [MacroStep("Scena", "_M1", 0.0, "1", "", "O.1")]}
+
+    # an undocumented macro layout fails instead of being guessed at
+    (tables / "macro.ndjson").write_text(json.dumps({"k": "_M1", "v": 1}) + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="documented layout"):
+        RuleIndex.from_export(tmp_path)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from lib.aio_transports import open_tcp
+from lib.homiq_frame import Frame, FrameStreamParser, compute_crc_dec, encode_frame
+from lib.sender import PacketCounter, PipelinedSender
+
+
+def test_packet_counter_per_dst_cmd_wraps_at_511() -> None:
+    c = PacketCounter()
+    assert [c.next("0H", "O.1") for _ in range(3)] == [1, 2, 3]
+    assert c.next("0H", "O.2") == 1
+    assert c.next("05", "O.1") == 1
+    for _ in range(507):
+        c.next("0H", "O.1")
+    assert c.next("0H", "O.1") == 511
+    assert c.next("0H", "O.1") == 1
+
+
+async def _module_stub(ignore_first: set[str], delay_s: float, seen: list[str]) -> asyncio.AbstractServer:
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        parser = FrameStreamParser()
+        dropped: set[tuple[str, str]] = set()
+
+        async def ack_later(f: Frame) -> None:
+            await asyncio.sleep(delay_s)
+            writer.write(_ack_from_module(f))
+            await writer.drain()
+
+        while chunk := await reader.read(4096):
+            for f in parser.push(chunk):
+                seen.append(f"{f.dst}/{f.cmd}/{f.pkt}")
+                if f.cmd in ignore_first and (f.cmd, f.pkt) not in dropped:
+                    dropped.add((f.cmd, f.pkt))
+                    continue
+                asyncio.create_task(ack_later(f))
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def _ack_from_module(f: Frame) -> bytes:
+    # module answers: src=module (request dst), dst=request src
+    crc = compute_crc_dec(f.cmd, f.val, f.dst, f.src, f.pkt, "a")
+    return encode_frame(f.cmd, f.val, f.dst, f.src, f.pkt, "a", crc).encode("ascii")
+
+
+def test_pipelined_sender_keeps_commands_in_flight_and_retries() -> None:
+    async def run():
+        seen: list[str] = []
+        srv = await _module_stub({"O.2"}, 0.05, seen)
+        port = srv.sockets[0].getsockname()[1]
+        t = await open_tcp("127.0.0.1", port)
+        try:
+            async with PipelinedSender(t, retry_interval_s=0.1, max_tries=5) as s:
+                start = time.monotonic()
+                cmds = [("0H", f"O.{i % 4}", "1") for i in range(20)]
+                results = await s.send_many(cmds)
+                return results, time.monotonic() - start, s.stats, seen
+        finally:
+            await t.close()
+            srv.close()
+
+    results, elapsed, stats, seen = asyncio.run(run())
+    assert all(r.ok for r in results)
+    assert [(r.dst, r.cmd) for r in results] == [("0H", f"O.{i % 4}") for i in range(20)]
+    # five commands to O.2 lose their first frame and need one retry each
+    assert stats.retries == 5
+    assert {r.tries for r in results if r.cmd == "O.2"} == {2}
+    assert [r.pkt for r in results if r.cmd == "O.1"] == ["1", "2", "3", "4", "5"]
+    # 20 sequential round-trips would take >= 1 s
+    assert elapsed < 0.8
+    assert len(seen) == 25
+
+
+def test_pipelined_sender_gives_up_after_max_tries() -> None:
+    async def run():
+        async def silent(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            await reader.read()
+
+        srv = await asyncio.start_server(silent, "127.0.0.1", 0)
+        t = await open_tcp("127.0.0.1", srv.sockets[0].getsockname()[1])
+        try:
+            async with PipelinedSender(t, retry_interval_s=0.01, max_tries=3) as s:
+                r = await s.send("0H", "O.1", "1", on_first_write=lambda: written.append(s.stats.frames_sent))
+                hb = await s.send("0H", "HB", "0")
+                return r, hb
+        finally:
+            await t.close()
+            srv.close()
+
+    written: list[int] = []
+    r, hb = asyncio.run(run())
+    assert not r.ok and r.tries == 3
+    assert written == [1]  # once, after the first try was written
+    assert not hb.ok and hb.tries == 1
+
+
+class _FlakyTransport:
+    """Feeds scripted chunks to read(), then fails it like a reset link."""
+
+    def __init__(self, chunks: list[bytes]) -> None:
+        self.chunks = chunks
+        self.sent: list[bytes] = []
+        self.fail = asyncio.Event()
+
+    async def send(self, data: bytes) -> None:
+        self.sent.append(data)
+
+    async def read(self, n: int = 4096) -> bytes:
+        if self.chunks:
+            return self.chunks.pop(0)
+        await self.fail.wait()
+        raise ConnectionResetError("link reset")
+
+    async def close(self) -> None:
+        pass
+
+
+def test_pipelined_sender_skips_bad_crc_and_fails_pending_on_read_error() -> None:
+    good = encode_frame("I.1", "1", "0H", "0", "7", "s", compute_crc_dec("I.1", "1", "0H", "0", "7", "s")).encode("ascii")
+    bad = good.replace(b";I.1;1;", b";I.1;0;")  # value flipped, CRC of the original
+
+    async def run():
+        t = _FlakyTransport([bad, good])
+        async with PipelinedSender(t, retry_interval_s=0.05, max_tries=15, auto_ack=True) as s:
+            task = asyncio.create_task(s.send("0H", "O.1", "1"))
+            await asyncio.sleep(0.01)
+            start = time.monotonic()
+            t.fail.set()
+            r = await task
+            return r, time.monotonic() - start, s.stats, t.sent
+
+    r, elapsed, stats, sent = asyncio.run(run())
+    assert stats.crc_bad == 1 and stats.acks_sent == 1
+    assert [d for d in sent if b";a;" in d] == [_ack_of(good)]
+    # the read error ends the command instead of running out its 15 tries
+    assert not r.ok and r.tries == 1 and elapsed < 0.05
+
+
+def _ack_of(wire: bytes) -> bytes:
+    f = FrameStreamParser().push(wire)[0]
+    crc = compute_crc_dec(f.cmd, f.val, "0", f.src, f.pkt, "a")
+    return encode_frame(f.cmd, f.val, "0", f.src, f.pkt, "a", crc).encode("ascii")
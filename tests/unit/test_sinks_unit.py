@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import csv
+import io
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from lib.capture import DIR_RX, DIR_TX, CaptureReader, capture_files
+from lib.homiq_frame import Frame
+from lib.replay import iter_jsonl
+from lib.sinks import BatchedWriter, Sink, TextSink, open_sink
+
+from _frames import frame
+
+
+def _records(n: int) -> list[tuple[float, int, Frame, bool]]:
+    out = []
+    for i in range(n):
+        f = frame("I.1", str(i % 2), "0H", "0", str(i + 1))
+        out.append((1000.0 + i, DIR_RX, f, True))
+        out.append((1000.0 + i, DIR_TX, frame("I.1", str(i % 2), "0", "0H", str(i + 1), "a"), True))
+    return out
+
+
+def test_every_sink_kind_writes_all_records(tmp_path: Path) -> None:
+    recs = _records(50)
+    text = io.StringIO()
+    sinks = [
+        TextSink(text),
+        open_sink(f"ndjson:{tmp_path / 'f.jsonl'}"),
+        open_sink(f"csv:{tmp_path / 'f.csv'}"),
+        open_sink(f"capture:{tmp_path / 'cap'}"),
+        open_sink(f"sqlite:{tmp_path / 'f.db'}"),
+    ]
+    w = BatchedWriter(sinks, batch_records=16, flush_interval_s=0.01)
+    for r in recs:
+        assert w.put(r)
+    w.close()
+
+    st = w.stats()
+    assert st["written"] == st["queued"] == 100 and st["dropped"] == 0 and not st["errors"]
+    assert st["batches"] >= 1 and st["max_batch"] <= 100
+
+    lines = text.getvalue().splitlines()
+    assert len(lines) == 50 and lines[0].endswith("OK")  # console: RX only
+
+    items = list(iter_jsonl(tmp_path / "f.jsonl"))  # replay skips "dir": "tx"
+    assert len(items) == 50 and items[0].ts == 1000.0 and items[0].frame == recs[0][2]
+
+    rows = list(csv.DictReader((tmp_path / "f.csv").open(encoding="utf-8")))
+    assert len(rows) == 100 and rows[1]["dir"] == "tx" and rows[0]["crc_ok"] == "1"
+
+    got = [rec for p in capture_files([tmp_path / "cap"]) for rec in CaptureReader(p).iter_records()]
+    assert len(got) == 100 and got[1].direction == DIR_TX
+
+    conn = sqlite3.connect(tmp_path / "f.db")
+    assert conn.execute("SELECT count(*), sum(dir = 0) FROM frames").fetchone() == (100, 50)
+    conn.close()
+
+
+class _SlowSink(Sink):
+    name = "slow"
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.records = 0
+
+    def write_batch(self, records) -> None:
+        self.release.wait(5)
+        self.records += len(records)
+
+
+class _BrokenSink(Sink):
+    name = "broken"
+
+    def write_batch(self, records) -> None:
+        raise OSError("disk full")
+
+
+def test_full_queue_drops_instead_of_blocking() -> None:
+    slow = _SlowSink()
+    w = BatchedWriter([slow, _BrokenSink()], max_queue=100, batch_records=10, flush_interval_s=0.01)
+    recs = _records(500)
+    t0 = time.perf_counter()
+    accepted = sum(w.put(r) for r in recs)
+    elapsed = time.perf_counter() - t0
+    slow.release.set()
+    w.close()
+
+    st = w.stats()
+    assert elapsed < 1.0
+    assert accepted + st["dropped"] == 1000
+    assert st["dropped"] >= 1000 - 100 - 10  # at most one batch in the sink + a full queue
+    assert slow.records == accepted == st["written"]
+    assert st["errors"] == {"broken": st["batches"]}
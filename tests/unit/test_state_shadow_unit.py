@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from lib.state_shadow import StateChange, StateShadow
+
+from _frames import frame
+
+
+def test_only_changes_are_published() -> None:
+    shadow = StateShadow(master="HQP", clock=lambda: 100.0)
+    got: list[StateChange] = []
+    unsubscribe = shadow.subscribe(got.append)
+
+    frames = [
+        frame("I.3", "1", "0H", "0", "42"),
+        frame("I.3", "1", "0H", "0", "42"),  # module retry
+        frame("O.2", "1", "0", "05", "7"),  # our command: intention only
+        frame("O.2", "1", "05", "0", "7", "a"),  # ACK = new output state
+        frame("O.2", "1", "05", "0", "7", "a"),  # repeated ACK
+        frame("T.0", "21.5", "06", "0", "10", "a"),
+        frame("UD", "u", "0A", "0", "3"),
+        frame("HB", "1", "0H", "0", "1"),  # not state
+        frame("I.3", "0", "0H", "0", "43"),
+    ]
+    for f in frames:
+        shadow.update(f)
+
+    assert [(c.module, c.cmd, c.old, c.new) for c in got] == [
+        ("0H", "I.3", None, "1"),
+        ("05", "O.2", None, "1"),
+        ("06", "T.0", None, "21.5"),
+        ("0A", "UD", None, "u"),
+        ("0H", "I.3", "1", "0"),
+    ]
+    assert all(c.master == "HQP" and c.ts == 100.0 for c in got)
+    assert shadow.get("05", "O.2") == "1" and shadow.get("05", "O.2", master="HQB") is None
+    assert shadow.module_state("0H") == {"I.3": "0"}
+    st = shadow.stats()
+    assert st["changes"] == 5 and st["unchanged"] == 2 and st["modules"] == 4
+
+    unsubscribe()
+    shadow.update(frame("I.3", "1", "0H", "0", "44"))
+    assert len(got) == 5
+
+
+def test_snapshot_warm_start(tmp_path: Path) -> None:
+    path = tmp_path / "state.json"
+    now = [0.0]
+    shadow = StateShadow(master="HQP", snapshot_path=path, snapshot_interval_s=10.0, clock=lambda: now[0])
+    shadow.update(frame("O.1", "1", "05", "0", "1", "a"), ts=1.0)
+    assert not path.exists()
+    now[0] = 12.0
+    shadow.update(frame("O.2", "1", "05", "0", "2", "a"), ts=12.0)
+    assert path.exists()
+    shadow.update(frame("T.0", "20.0", "06", "0", "3", "a"), ts=13.0)
+    shadow.close()
+
+    warm = StateShadow(master="HQP", snapshot_path=path)
+    assert warm.load()
+    got: list[StateChange] = []
+    warm.subscribe(got.append)
+    assert warm.module_state("05") == {"O.1": "1", "O.2": "1"}
+    assert warm.get("06", "T.0") == "20.0"
+    assert sorted(ts for *_, ts in warm.items()) == [1.0, 12.0, 13.0]
+    # already-known state after a restart publishes nothing
+    warm.update(frame("O.1", "1", "05", "0", "9", "a"))
+    assert got == []
+    assert not StateShadow().load(tmp_path / "missing.json")
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from lib.transports import TcpTransport
+from lib.write_scheduler import (
+    AsyncScheduledTransport,
+    FrameSuperseded,
+    ScheduledTransport,
+    WriteScheduler,
+)
+
+from _frames import wire
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.t = 100.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def test_acks_first_merge_and_pacing() -> None:
+    clock = _Clock()
+    s = WriteScheduler(bytes_per_s=1000.0, clock=clock)
+    cmd1 = wire("O.1", "1", "0", "0H", "1", "s")
+    cmd1_newer = wire("O.1", "0", "0", "0H", "2", "s")
+    cmd2 = wire("O.2", "1", "0", "0H", "1", "s")
+    ack = wire("I.3", "1", "0", "0H", "42", "a")
+
+    assert s.push(cmd1, "w1") == []
+    s.push(cmd2)
+    assert s.push(cmd1_newer, "w1b") == ["w1"]
+    s.push(cmd2)  # identical pending frame: written once
+    s.push(ack)
+    assert s.depth == 3
+
+    first = s.pop_ready()
+    assert first is not None and first.data == ack
+    # budget: len(ack) bytes at 1000 B/s before the next write
+    assert s.pop_ready() is None
+    assert s.next_delay() == pytest.approx(len(ack) / 1000.0)
+    clock.t += len(ack) / 1000.0
+    second = s.pop_ready()
+    assert second is not None and second.data == cmd1_newer and second.waiters == ["w1b"]
+    clock.t += 1.0
+    third = s.pop_ready()
+    assert third is not None and third.data == cmd2
+    assert s.pop_ready() is None and s.next_delay() is None
+
+    m = s.metrics()
+    assert (m["written"], m["merged"], m["duplicates"], m["queue_depth_max"]) == (3, 1, 1, 3)
+
+
+def test_frames_per_s_budget() -> None:
+    clock = _Clock()
+    s = WriteScheduler(bytes_per_s=None, frames_per_s=10.0, clock=clock)
+    s.push(wire("O.1", "1", "0", "0H", "1", "s"))
+    s.push(wire("O.2", "1", "0", "0H", "1", "s"))
+    assert s.pop_ready() is not None
+    assert s.next_delay() == pytest.approx(0.1)
+
+
+def test_async_scheduled_transport_supersedes_older_command() -> None:
+    class Sink:
+        def __init__(self) -> None:
+            self.sent: list[bytes] = []
+
+        async def send(self, data: bytes) -> None:
+            self.sent.append(data)
+
+        async def read(self, n: int = 4096) -> bytes:
+            return b""
+
+        async def close(self) -> None:
+            pass
+
+    async def run() -> tuple[list[bytes], object]:
+        sink = Sink()
+        t = AsyncScheduledTransport(sink, WriteScheduler(bytes_per_s=2000.0))
+        ack = asyncio.create_task(t.send(wire("I.1", "1", "0", "05", "1", "a")))
+        old = asyncio.create_task(t.send(wire("UD", "u", "0", "05", "1", "s")))
+        await asyncio.sleep(0)
+        new = asyncio.create_task(t.send(wire("UD", "s", "0", "05", "2", "s")))
+        res = await asyncio.gather(ack, old, new, return_exceptions=True)
+        await t.close()
+        return sink.sent, res[1]
+
+    sent, old_result = asyncio.run(run())
+    assert isinstance(old_result, FrameSuperseded)
+    assert sent == [wire("I.1", "1", "0", "05", "1", "a"), wire("UD", "s", "0", "05", "2", "s")]
+
+
+def test_blocking_scheduled_transport_writes_in_background() -> None:
+    class Sink:
+        def __init__(self) -> None:
+            self.sent: list[bytes] = []
+            self.closed = threading.Event()
+
+        def write(self, data: bytes) -> None:
+            self.sent.append(data)
+
+        def read(self, n: int = 4096) -> bytes:
+            return b""
+
+        def close(self) -> None:
+            self.closed.set()
+
+    sink = Sink()
+    t = ScheduledTransport(sink, WriteScheduler(bytes_per_s=100000.0))
+    frames = [wire(f"O.{i}", "1", "0", "0H", "1", "s") for i in range(5)]
+    for f in frames:
+        t.write(f)
+    assert t.flush(2.0)
+    t.close()
+    assert sink.sent == frames
+    assert sink.closed.is_set()
+
+
+def test_scheduled_transport_survives_writes_to_a_closed_transport() -> None:
+    srv = socket.create_server(("127.0.0.1", 0))
+    inner = TcpTransport("127.0.0.1", srv.getsockname()[1])
+    peer, _ = srv.accept()
+    inner.close()  # as after a failed reconnect()
+    with pytest.raises(ConnectionError):
+        inner.write(b"x")
+
+    t = ScheduledTransport(inner, WriteScheduler(bytes_per_s=100000.0))
+    t.write(wire("I.1", "1", "0", "05", "1", "a"))
+    assert t.flush(2.0)
+    assert t.write_errors == 1
+
+    # the writer thread is still alive and writes once the link is back
+    inner.reconnect()
+    peer2, _ = srv.accept()
+    frame = wire("I.2", "1", "0", "05", "2", "a")
+    t.write(frame)
+    assert t.flush(2.0)
+    peer2.settimeout(2.0)
+    assert peer2.recv(4096) == frame
+    t.close()
+    for s in (peer, peer2, srv):
+        s.close()
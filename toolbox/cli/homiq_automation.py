@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+# Bootstrap imports (folder has a space)
+TOOLBOX_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TOOLBOX_DIR))
+
+from lib.aio_transports import open_serial, open_tcp  # noqa: E402
+from lib.automation import AutomationEngine  # noqa: E402
+from lib.rules import Effect, RuleIndex  # noqa: E402
+from lib.sender import MAX_TRIES, RETRY_INTERVAL_S, SendResult  # noqa: E402
+
+
+def parse_tcp(s: str) -> tuple[str, int]:
+    if ":" not in s:
+        raise ValueError("Expected HOST:PORT")
+    host, port = s.rsplit(":", 1)
+    return host, int(port)
+
+
+def log_effect(e: Effect, r: Optional[SendResult]) -> None:
+    stamp = time.strftime("%H:%M:%S")
+    if r is None:
+        print(f"{stamp} DRY {e.module:<4} {e.cmd:<6} val={e.value!r} {e.name}")
+    elif r.ok:
+        print(f"{stamp} OK  {e.module:<4} {e.cmd:<6} val={e.value!r} tries={r.tries} {r.latency_s * 1000:.1f}ms {e.name}")
+    else:
+        print(f"{stamp} ERR {e.module:<4} {e.cmd:<6} val={e.value!r} tries={r.tries} no ACK {e.name}", file=sys.stderr)
+
+
+async def _report(engine: AutomationEngine, interval_s: float) -> None:
+    while True:
+        await asyncio.sleep(interval_s)
+        print(json.dumps(engine.stats.report(), ensure_ascii=False), file=sys.stderr)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    index = RuleIndex.load(args.rules)
+    print(f"Loaded {json.dumps(index.stats())}", file=sys.stderr)
+    if args.tcp:
+        host, port = parse_tcp(args.tcp)
+        t = await open_tcp(host, port)
+    else:
+        t = await open_serial(args.serial, baud=args.baud)
+
+    engine = AutomationEngine(
+        t,
+        index,
+        master=args.master,
+        src=args.src,
+        ack_events=not args.no_ack,
+        retry_interval_s=args.retry_interval,
+        max_tries=args.max_tries,
+        dry_run=args.dry_run,
+        on_effect=log_effect,
+    )
+    tasks: list[asyncio.Task[Any]] = []
+    if args.stats_interval > 0:
+        tasks.append(asyncio.create_task(_report(engine, args.stats_interval)))
+    if args.seconds > 0:
+        tasks.append(asyncio.create_task(asyncio.sleep(args.seconds)))
+        tasks[-1].add_done_callback(lambda _t: engine.stop())
+    try:
+        stats = await engine.run()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await t.close()
+    return stats.report()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Run the legacy action rules on a live Homiq bus (replaces the legacy server's automation).")
+    g = ap.add_mutually_exclusive_group(required=True)
+    g.add_argument("--tcp", help="HOST:PORT (Moxa, homiq_busd or homiq_replay)")
+    g.add_argument("--serial", help="Serial device, e.g. /dev/ttyUSB0")
+    ap.add_argument("--baud", type=int, default=115200)
+    ap.add_argument("--rules", required=True, help="Rule index from homiq_rules.py compile")
+    ap.add_argument("--master", required=True, help="Master id of this bus as in the DB (a_input_master), e.g. HQP")
+    ap.add_argument("--src", default="0", help="SRC of sent commands (default 0)")
+    ap.add_argument("--no-ack", action="store_true", help="Do not ACK module frames (something else on the bus does, e.g. homiq_busd)")
+    ap.add_argument("--dry-run", action="store_true", help="Match and log effects without sending")
+    ap.add_argument("--retry-interval", type=float, default=RETRY_INTERVAL_S)
+    ap.add_argument("--max-tries", type=int, default=MAX_TRIES)
+    ap.add_argument("--stats-interval", type=float, default=60.0, help="Print engine stats to stderr every N s (0 = off)")
+    ap.add_argument("--seconds", type=int, default=0, help="Stop after N seconds (0 = run forever)")
+    args = ap.parse_args()
+
+    try:
+        rep = asyncio.run(run(args))
+    except KeyboardInterrupt:
+        return
+    print(json.dumps(rep, ensure_ascii=False), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
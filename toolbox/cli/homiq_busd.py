@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Bootstrap imports (folder has a space)
+TOOLBOX_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TOOLBOX_DIR))
+
+from lib.bus_daemon import DaemonConfig, Gateway, start_listeners  # noqa: E402
+
+
+def parse_tcp(s: str) -> tuple[str, int]:
+    if ":" not in s:
+        raise ValueError("Expected HOST:PORT")
+    host, port = s.rsplit(":", 1)
+    return host, int(port)
+
+
+def parse_gw(s: str) -> tuple[str, str, int]:
+    # NAME=HOST:PORT (NAME defaults to HOST_PORT)
+    name, _, addr = s.rpartition("=")
+    host, port = parse_tcp(addr)
+    return (name or f"{host}_{port}"), host, port
+
+
+async def _report(gateways: list[Gateway], interval_s: float) -> None:
+    while True:
+        await asyncio.sleep(interval_s)
+        print(json.dumps({"gateways": [g.snapshot() for g in gateways]}, ensure_ascii=False), file=sys.stderr)
+
+
+async def run(args: argparse.Namespace, gateways: list[Gateway]) -> None:
+    cfg = DaemonConfig(listen_host=args.listen_host, listen_port_base=args.listen_port, unix_dir=args.unix_dir)
+    servers = await start_listeners(gateways, cfg)
+    for i, g in enumerate(gateways):
+        where = []
+        if cfg.listen_port_base:
+            where.append(f"tcp://{cfg.listen_host}:{cfg.listen_port_base + i}")
+        if cfg.unix_dir:
+            where.append(f"unix://{Path(cfg.unix_dir) / (g.name + '.sock')}")
+        print(f"{g.name}: {g.host}:{g.port} -> {', '.join(where) or '(no listeners)'}", file=sys.stderr)
+
+    tasks = [asyncio.create_task(g.run()) for g in gateways]
+    if args.stats_interval > 0:
+        tasks.append(asyncio.create_task(_report(gateways, args.stats_interval)))
+    try:
+        if args.seconds:
+            await asyncio.sleep(args.seconds)
+        else:
+            await asyncio.gather(*tasks)
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for s in servers:
+            s.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        description="Keep persistent connections to several Homiq gateways (Moxa ports), auto-ACK, "
+        "and share each bus with local clients over TCP or unix sockets."
+    )
+    ap.add_argument("--gw", action="append", required=True, help="NAME=HOST:PORT (repeat per master), e.g. hqp=10.10.20.201:4001")
+    ap.add_argument("--listen-host", default="127.0.0.1", help="Local listen address (default 127.0.0.1)")
+    ap.add_argument(
+        "--listen-port",
+        type=int,
+        default=14001,
+        help="Local TCP port for the first gateway; next gateways use +1, +2... (0 = disabled, default 14001)",
+    )
+    ap.add_argument("--unix-dir", default="", help="Also serve <dir>/<NAME>.sock per gateway")
+    ap.add_argument("--no-ack", action="store_true", help="Do not auto-ACK TOP=s frames (clients must ACK)")
+    ap.add_argument("--backoff-max", type=float, default=30.0, help="Max reconnect backoff in seconds (default 30)")
+    ap.add_argument("--stats-interval", type=float, default=60.0, help="Print per-gateway stats to stderr every N s (0 = off)")
+    ap.add_argument("--seconds", type=int, default=0, help="Stop after N seconds (0 = run forever)")
+    args = ap.parse_args()
+
+    if not args.listen_port and not args.unix_dir:
+        ap.error("enable at least one of --listen-port / --unix-dir")
+
+    # built here so the summary still prints when Ctrl-C interrupts asyncio.run()
+    gateways = [
+        Gateway(name, host, port, auto_ack=not args.no_ack, backoff_max_s=args.backoff_max)
+        for name, host, port in (parse_gw(s) for s in args.gw)
+    ]
+    try:
+        asyncio.run(run(args, gateways))
+    except KeyboardInterrupt:
+        pass
+
+    if gateways:
+        print("\n--- summary ---", file=sys.stderr)
+        print(json.dumps({"gateways": [g.snapshot() for g in gateways]}, ensure_ascii=False, indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
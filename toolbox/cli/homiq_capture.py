@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import sys
+from pathlib import Path
+from typing import Any, Optional
+
+# Bootstrap imports (folder has a space)
+TOOLBOX_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TOOLBOX_DIR))
+
+from lib.capture import DIR_RX, DIR_TX, CaptureReader, capture_files  # noqa: E402
+
+
+def parse_time(s: str, ref_ts: Optional[float]) -> float:
+    """
+    ISO datetime ("2026-01-28T10:00") or time of day ("10:00", "10:00:30");
+    a time of day is taken on the local date of `ref_ts` (start of capture).
+    """
+
+    try:
+        return dt.datetime.fromisoformat(s).timestamp()
+    except ValueError:
+        pass
+    t = dt.time.fromisoformat(s)
+    day = dt.date.fromtimestamp(ref_ts) if ref_ts is not None else dt.date.today()
+    return dt.datetime.combine(day, t).timestamp()
+
+
+def cmd_info(args: argparse.Namespace) -> None:
+    out: list[dict[str, Any]] = []
+    for p in capture_files(args.paths):
+        r = CaptureReader(p)
+        t0, t1 = r.time_range()
+        out.append(
+            {
+                "file": str(p),
+                "bytes": p.stat().st_size,
+                "indexed": r.indexed,
+                "blocks": len(r.blocks),
+                "records": r.records,
+                "from": dt.datetime.fromtimestamp(t0).isoformat() if t0 is not None else None,
+                "to": dt.datetime.fromtimestamp(t1).isoformat() if t1 is not None else None,
+                "src": r.src_dict,
+                "cmd": r.cmd_dict,
+            }
+        )
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+
+
+def cmd_query(args: argparse.Namespace) -> None:
+    direction = {"rx": DIR_RX, "tx": DIR_TX}.get(args.dir)
+    matched = 0
+    blocks_read = 0
+    blocks_total = 0
+    for p in capture_files(args.paths):
+        r = CaptureReader(p)
+        ref = r.time_range()[0]
+        t_from = parse_time(args.t_from, ref) if args.t_from else None
+        t_to = parse_time(args.t_to, ref) if args.t_to else None
+        for rec in r.iter_records(t_from=t_from, t_to=t_to, src=args.src, cmd=args.cmd, direction=direction):
+            matched += 1
+            f = rec.frame
+            if args.json:
+                out: dict[str, Any] = f.to_dict()
+                out["ts"] = rec.ts
+                out["dir"] = "tx" if rec.direction == DIR_TX else "rx"
+                print(json.dumps(out, ensure_ascii=False))
+            else:
+                stamp = dt.datetime.fromtimestamp(rec.ts).isoformat(timespec="milliseconds")
+                d = "TX" if rec.direction == DIR_TX else "RX"
+                print(f"{stamp} {d} {f.src:>4} -> {f.dst:<4} top={f.top} pkt={f.pkt:>3} {f.cmd:<6} val={f.val!r}")
+            if args.limit and matched >= args.limit:
+                break
+        blocks_read += r.blocks_read
+        blocks_total += len(r.blocks)
+        if args.limit and matched >= args.limit:
+            break
+    print(json.dumps({"matched": matched, "blocks_read": blocks_read, "blocks_total": blocks_total}), file=sys.stderr)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Inspect and query binary Homiq captures (.hqc, homiq_sniff --capture).")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("info", help="Per-file summary: time range, blocks, records, seen SRC/CMD")
+    p.add_argument("paths", nargs="+", help=".hqc files or directories")
+    p.set_defaults(func=cmd_info)
+
+    p = sub.add_parser("query", help="Print matching frames (reads only candidate blocks)")
+    p.add_argument("paths", nargs="+", help=".hqc files or directories")
+    p.add_argument("--src", help="SRC value or pattern (e.g. 0H)")
+    p.add_argument("--cmd", help="CMD value or pattern (e.g. 'I.*')")
+    p.add_argument("--from", dest="t_from", help="Start: ISO datetime or HH:MM[:SS] on the capture's date")
+    p.add_argument("--to", dest="t_to", help="End (inclusive): ISO datetime or HH:MM[:SS]")
+    p.add_argument("--dir", choices=["rx", "tx"], help="Only received (rx) or sent (tx) frames")
+    p.add_argument("--json", action="store_true", help="Output JSON lines")
+    p.add_argument("--limit", type=int, default=0, help="Stop after N matches (0 = all)")
+    p.set_defaults(func=cmd_query)
+
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
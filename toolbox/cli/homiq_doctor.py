@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
 import sys
 import time
@@ -13,7 +14,10 @@ from typing import Any
 TOOLBOX_DIR = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(TOOLBOX_DIR))
 
-from lib.homiq_frame import FrameStreamParser, make_ack, validate_crc  # noqa: E402
+from lib.aio_transports import open_serial, open_tcp  # noqa: E402
+from lib.bus_timing import BusTiming  # noqa: E402
+from lib.homiq_frame import FrameStreamParser, decode_frame, make_ack, validate_crc  # noqa: E402
+from lib.load_probe import DEFAULT_RATES, ProbeStep, run_probe  # noqa: E402
 from lib.transports import SerialTransport, TcpTransport  # noqa: E402
 
 
@@ -24,6 +28,61 @@ def parse_tcp(s: str) -> tuple[str, int]:
     return host, int(port)
 
 
+def _log_step(step: ProbeStep) -> None:
+    r = step.report()
+    print(
+        f"{r['rate_hz']:7.1f}/s sent {r['sent']:5d} ok {r['success_rate']:6.1%} first-try {r['first_try_rate']:6.1%} "
+        f"p50 {r['latency_ms']['p50']:7.1f}ms p95 {r['latency_ms']['p95']:7.1f}ms{'  SATURATED' if r['saturated'] else ''}",
+        file=sys.stderr,
+    )
+
+
+async def probe(args: argparse.Namespace) -> dict[str, Any]:
+    if args.tcp:
+        host, port = parse_tcp(args.tcp)
+        t = await open_tcp(host, port)
+    else:
+        t = await open_serial(args.serial, baud=args.baud)
+    try:
+        return await run_probe(
+            t,
+            args.probe,
+            cmd=args.probe_cmd,
+            val=args.probe_val,
+            rates=[float(x) for x in args.probe_rates.split(",") if x.strip()],
+            step_s=args.probe_step,
+            auto_ack=args.ack,
+            on_step=_log_step,
+        )
+    finally:
+        await t.close()
+
+
+def probe_report(args: argparse.Namespace) -> dict[str, Any]:
+    start = time.time()
+    rep = asyncio.run(probe(args))
+    report: dict[str, Any] = {
+        "tool": "homiq_doctor",
+        "mode": "probe",
+        "duration_s": time.time() - start,
+        "transport": {"type": "tcp", "address": args.tcp} if args.tcp else {"type": "serial", "port": args.serial, "baud": args.baud},
+        "probe": rep,
+        "hints": [],
+    }
+    hints: list[str] = report["hints"]
+    steps = rep["steps"]
+    if steps and steps[0]["acked"] == 0:
+        hints.append(f"Module {args.probe} did not ACK {args.probe_cmd} at all: wrong address, or the command is not answered.")
+    elif rep["saturated_at_hz"] is None:
+        hints.append("No saturation up to the highest probed rate; extend --probe-rates to find the knee.")
+    elif rep["knee_rate_hz"] is not None:
+        hints.append(
+            f"ACKs degrade between {rep['knee_rate_hz']:g} and {rep['saturated_at_hz']:g} commands/s; "
+            "keep sustained traffic to this module below the knee."
+        )
+    return report
+
+
 def main() -> None:
     ap = argparse.ArgumentParser(description="Collect diagnostics from Homiq link and output a JSON report.")
     g = ap.add_mutually_exclusive_group(required=True)
@@ -33,8 +92,21 @@ def main() -> None:
     ap.add_argument("--seconds", type=int, default=30)
     ap.add_argument("--ack", action="store_true", help="Auto-ACK TOP=s while diagnosing")
     ap.add_argument("--out", default="", help="Write report JSON to file (optional)")
+    ap.add_argument("--probe", default="", metavar="MODULE", help="Active load probe: send commands to MODULE at increasing rates")
+    ap.add_argument("--probe-cmd", default="HB", help="Probe command; must be harmless, e.g. HB or O.n with its current value (default HB)")
+    ap.add_argument("--probe-val", default="1", help="Probe value (default 1)")
+    ap.add_argument(
+        "--probe-rates",
+        default=",".join(f"{r:g}" for r in DEFAULT_RATES),
+        help="Comma-separated commands/s per step (default %(default)s)",
+    )
+    ap.add_argument("--probe-step", type=float, default=5.0, help="Seconds per probe step (default 5)")
     args = ap.parse_args()
 
+    if args.probe:
+        write_report(probe_report(args), args.out)
+        return
+
     if args.tcp:
         host, port = parse_tcp(args.tcp)
         t = TcpTransport(host, port)
@@ -44,7 +116,9 @@ def main() -> None:
         transport_desc = {"type": "serial", "port": args.serial, "baud": args.baud}
 
     parser = FrameStreamParser()
+    timing = BusTiming()
     start = time.time()
+    start_mono = time.monotonic()
 
     frames = 0
     crc_bad = 0
@@ -57,7 +131,9 @@ def main() -> None:
             chunk = t.read(4096)
             if not chunk:
                 continue
+            now = time.monotonic()
             for f in parser.push(chunk):
+                timing.observe(f, now)
                 frames += 1
                 top_counts[f.top] += 1
                 src_counts[f.src] += 1
@@ -65,13 +141,19 @@ def main() -> None:
                 if not validate_crc(f):
                     crc_bad += 1
                 if args.ack and f.top == "s":
-                    t.write(make_ack(f).encode("ascii"))
+                    ack = make_ack(f)
+                    t.write(ack.encode("ascii"))
+                    ack_frame = decode_frame(ack)
+                    if ack_frame is not None:
+                        timing.observe(ack_frame, time.monotonic())
     except KeyboardInterrupt:
         pass
     finally:
         t.close()
 
     duration = time.time() - start
+    timing.expire(time.monotonic())
+    timing_report = timing.report(time.monotonic() - start_mono)
     report: dict[str, Any] = {
         "tool": "homiq_doctor",
         "duration_s": duration,
@@ -82,6 +164,7 @@ def main() -> None:
         "top_counts": dict(top_counts),
         "top_src": src_counts.most_common(20),
         "top_cmd": cmd_counts.most_common(30),
+        "timing": timing_report,
         "hints": [],
     }
 
@@ -94,10 +177,19 @@ def main() -> None:
         hints.append("You observed TOP=s frames but auto-ACK was disabled; devices may retry and flood.")
     if top_counts.get("a", 0) == 0 and frames > 0:
         hints.append("No ACK frames observed: could be one-way traffic or gateway not acknowledging.")
+    if timing_report["bus_utilization_peak_pct"] > 50.0:
+        hints.append("Bus utilization peaked above 50% of 115200 baud: expect collisions, retries and late ACKs.")
+    for addr, m in timing_report["modules"].items():
+        if m["exchanges"] >= 10 and m["retry_rate"] > 0.2:
+            hints.append(f"Module {addr}: {m['retry_rate']:.0%} of frames are retries (lost frames or missing ACKs).")
+
+    write_report(report, args.out)
+
 
-    if args.out:
-        Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-        print(f"Wrote report: {args.out}")
+def write_report(report: dict[str, Any], out: str) -> None:
+    if out:
+        Path(out).write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote report: {out}")
     else:
         print(json.dumps(report, ensure_ascii=False, indent=2))
 
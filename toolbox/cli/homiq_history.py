@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+# Bootstrap imports (folder has a space)
+TOOLBOX_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TOOLBOX_DIR))
+
+from lib.capture import CAPTURE_SUFFIX, DIR_RX, DIR_TX, CaptureReader, capture_files  # noqa: E402
+from lib.frame_store import FrameStore, Record  # noqa: E402
+from lib.homiq_frame import Frame, validate_crc  # noqa: E402
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_time(s: str) -> float:
+    """ISO datetime ("2026-01-28T10:00") or a duration back from now ("7d", "12h", "30m")."""
+
+    if s and s[-1] in _UNITS and s[:-1].replace(".", "", 1).isdigit():
+        return time.time() - float(s[:-1]) * _UNITS[s[-1]]
+    return dt.datetime.fromisoformat(s).timestamp()
+
+
+def time_range(args: argparse.Namespace) -> tuple[Optional[float], Optional[float]]:
+    t_from = parse_time(args.since) if args.since else (parse_time(args.t_from) if args.t_from else None)
+    t_to = parse_time(args.t_to) if args.t_to else None
+    return t_from, t_to
+
+
+def _iso(ts: float) -> str:
+    return dt.datetime.fromtimestamp(ts).isoformat(timespec="seconds")
+
+
+def _iter_jsonl_records(path: Path) -> Iterator[Record]:
+    with path.open("r", encoding="utf-8", errors="ignore") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line.startswith("{"):
+                continue
+            try:
+                o = json.loads(line)
+                f = Frame(o["cmd"], o["val"], o["src"], o["dst"], o["pkt"], o["top"], o["crc"])
+                ts = float(o["ts"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            yield ts, DIR_TX if o.get("dir") == "tx" else DIR_RX, f, bool(o.get("crc_ok", validate_crc(f)))
+
+
+def _iter_records(paths: list[str]) -> Iterator[Record]:
+    for p in map(Path, paths):
+        if p.is_dir() or p.suffix == CAPTURE_SUFFIX:
+            for cp in capture_files([p]):
+                for rec in CaptureReader(cp).iter_records():
+                    yield rec.ts, rec.direction, rec.frame, validate_crc(rec.frame)
+        else:
+            yield from _iter_jsonl_records(p)
+
+
+def cmd_import(args: argparse.Namespace) -> None:
+    t0 = time.perf_counter()
+    rows = 0
+    with FrameStore(args.db) as store:
+        batch: list[Record] = []
+        for rec in _iter_records(args.inp):
+            batch.append(rec)
+            if len(batch) >= args.batch:
+                rows += store.append(batch)
+                batch.clear()
+        rows += store.append(batch)
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({"rows": rows, "seconds": round(elapsed, 3), "rows_per_s": round(rows / elapsed) if elapsed else 0}))
+
+
+def _emit(out: Any, t0: float) -> None:
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    print(f"({(time.perf_counter() - t0) * 1000:.1f} ms)", file=sys.stderr)
+
+
+def cmd_retry_rate(args: argparse.Namespace) -> None:
+    t0 = time.perf_counter()
+    t_from, t_to = time_range(args)
+    with FrameStore(args.db, readonly=True) as store:
+        rep = store.retry_rate(args.module, t_from, t_to, cmd=args.cmd)
+    for k in ("first_ts", "last_ts"):
+        if k in rep:
+            rep[k] = _iso(rep[k])
+    _emit(rep, t0)
+
+
+def cmd_summary(args: argparse.Namespace) -> None:
+    t0 = time.perf_counter()
+    t_from, t_to = time_range(args)
+    group_by = tuple(g for g in args.by.split(",") if g)
+    with FrameStore(args.db, readonly=True) as store:
+        rows = store.rollup(t_from, t_to, module=args.module, cmd=args.cmd, group_by=group_by)
+    if args.sort:
+        rows.sort(key=lambda r: r[args.sort], reverse=True)
+    if args.limit:
+        rows = rows[: args.limit]
+    for r in rows:
+        for k in ("first_ts", "last_ts", "minute"):
+            if k in r:
+                r[k] = _iso(r[k])
+    _emit(rows, t0)
+
+
+def cmd_frames(args: argparse.Namespace) -> None:
+    t_from, t_to = time_range(args)
+    with FrameStore(args.db, readonly=True) as store:
+        for row in store.frames(t_from, t_to, src=args.src, cmd=args.cmd, limit=args.limit):
+            if args.json:
+                print(json.dumps(row, ensure_ascii=False))
+            else:
+                stamp = dt.datetime.fromtimestamp(row["ts"]).isoformat(timespec="milliseconds")
+                flag = " RETRY" if row["retry"] else ("" if row["crc_ok"] else " CRC_BAD")
+                print(
+                    f"{stamp} {row['dir'].upper()} {row['src']:>4} -> {row['dst']:<4} top={row['top']} pkt={row['pkt']:>3} "
+                    f"{row['cmd']:<6} val={row['val']!r}{flag}"
+                )
+
+
+def cmd_info(args: argparse.Namespace) -> None:
+    with FrameStore(args.db, readonly=True) as store:
+        rep = store.info()
+    for k in ("first_ts", "last_ts"):
+        if rep[k] is not None:
+            rep[k] = _iso(rep[k])
+    print(json.dumps(rep, ensure_ascii=False, indent=2))
+
+
+def _add_range(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--since", default="", help="Duration back from now: 30m, 12h, 7d, 2w")
+    p.add_argument("--from", dest="t_from", default="", help="ISO start, e.g. 2026-01-28T10:00")
+    p.add_argument("--to", dest="t_to", default="", help="ISO end")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Query bus history stored by homiq_sniff.py --sink sqlite:FILE (frames + per-minute rollups).")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="Load .hqc captures / NDJSON (with ts) into a history database")
+    p.add_argument("--db", required=True)
+    p.add_argument("--in", dest="inp", nargs="+", required=True, help=".hqc files, capture directories or NDJSON files")
+    p.add_argument("--batch", type=int, default=5000)
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("retry-rate", help="Retries / TOP=s frames of one module (from the minute rollups)")
+    p.add_argument("--db", required=True)
+    p.add_argument("--module", required=True, help="Module address, e.g. 0H")
+    p.add_argument("--cmd", default=None, help="Command or pattern, e.g. O.3 or 'I.*'")
+    _add_range(p)
+    p.set_defaults(func=cmd_retry_rate)
+
+    p = sub.add_parser("summary", help="Rollup totals grouped by module / cmd / minute")
+    p.add_argument("--db", required=True)
+    p.add_argument("--by", default="module", help="Comma-separated: module, cmd, minute (default module)")
+    p.add_argument("--module", default=None)
+    p.add_argument("--cmd", default=None)
+    p.add_argument("--sort", choices=["frames", "sends", "retries", "acks", "crc_bad", "retry_rate"], default=None)
+    p.add_argument("--limit", type=int, default=0)
+    _add_range(p)
+    p.set_defaults(func=cmd_summary)
+
+    p = sub.add_parser("frames", help="Raw frames")
+    p.add_argument("--db", required=True)
+    p.add_argument("--src", default=None)
+    p.add_argument("--cmd", default=None)
+    p.add_argument("--limit", type=int, default=1000)
+    p.add_argument("--json", action="store_true", help="Output JSON lines")
+    _add_range(p)
+    p.set_defaults(func=cmd_frames)
+
+    p = sub.add_parser("info", help="Row counts, size and time range")
+    p.add_argument("--db", required=True)
+    p.set_defaults(func=cmd_info)
+
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Bootstrap imports (folder has a space)
+TOOLBOX_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TOOLBOX_DIR))
+
+from lib.replay import ReplayServer, iter_recording  # noqa: E402
+from lib.sender import MAX_TRIES, RETRY_INTERVAL_S  # noqa: E402
+
+
+def parse_tcp(s: str) -> tuple[str, int]:
+    if ":" not in s:
+        raise ValueError("Expected HOST:PORT")
+    host, port = s.rsplit(":", 1)
+    return host, int(port)
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    host, port = parse_tcp(args.listen)
+    speed = 0.0 if args.asap else args.speed
+    server = ReplayServer(
+        lambda: iter_recording(args.inp),
+        speed=speed,
+        default_interval_s=args.interval,
+        retry=args.retry,
+        retry_interval_s=args.retry_interval,
+        max_tries=args.max_tries,
+        ack_commands=not args.no_ack_commands,
+        ack_delay_s=args.ack_delay,
+        ack_rate=args.ack_rate,
+    )
+    srv = await server.start(host, port)
+    print(f"Replaying {', '.join(args.inp)} on {host}:{srv.sockets[0].getsockname()[1]} (speed={speed or 'asap'})", file=sys.stderr)
+    reports: list[dict] = []
+    try:
+        while True:
+            await server.session_done.wait()
+            server.session_done.clear()
+            while server.sessions:
+                rep = server.sessions.pop(0).report()
+                reports.append(rep)
+                print(json.dumps(rep, ensure_ascii=False), file=sys.stderr)
+            if args.once:
+                break
+    finally:
+        srv.close()
+    return reports
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        description="Serve a recorded capture on a local TCP port like a Moxa (load-test integrations offline)."
+    )
+    ap.add_argument(
+        "--in",
+        dest="inp",
+        nargs="+",
+        required=True,
+        help="homiq_sniff --json lines, .hqc capture files or capture directories",
+    )
+    ap.add_argument("--listen", default="127.0.0.1:4001", help="HOST:PORT to serve on (default 127.0.0.1:4001)")
+    g = ap.add_mutually_exclusive_group()
+    g.add_argument("--speed", type=float, default=1.0, help="Playback speed factor (1 = real time, 10 = 10x)")
+    g.add_argument("--asap", action="store_true", help="Send as fast as the client reads")
+    ap.add_argument(
+        "--interval",
+        type=float,
+        default=0.01,
+        help="Spacing for JSON lines without timestamps, before --speed (default 0.01s)",
+    )
+    ap.add_argument("--retry", action="store_true", help="Modules retry TOP=s frames the client does not ACK")
+    ap.add_argument("--retry-interval", type=float, default=RETRY_INTERVAL_S, help=f"Retry timer (default {RETRY_INTERVAL_S}s)")
+    ap.add_argument("--max-tries", type=int, default=MAX_TRIES, help=f"Tries per frame (default {MAX_TRIES})")
+    ap.add_argument("--no-ack-commands", action="store_true", help="Do not ACK commands sent by the client")
+    ap.add_argument("--ack-delay", type=float, default=0.0, help="Delay before ACKing a client command (s)")
+    ap.add_argument("--ack-rate", type=float, default=0.0, help="ACK at most N client commands/s, ignore the rest (0 = no limit)")
+    ap.add_argument("--once", action="store_true", help="Exit after the first client session")
+    args = ap.parse_args()
+
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
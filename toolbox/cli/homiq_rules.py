@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+# Bootstrap imports (folder has a space)
+TOOLBOX_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TOOLBOX_DIR))
+
+from lib.homiq_frame import Frame  # noqa: E402
+from lib.rules import RuleIndex  # noqa: E402
+
+
+def cmd_compile(args: argparse.Namespace) -> None:
+    t0 = time.perf_counter()
+    index = RuleIndex.from_export(args.export, include_inactive=args.include_inactive)
+    index.save(args.out)
+    st = index.stats()
+    st["build_s"] = round(time.perf_counter() - t0, 3)
+    st["bytes"] = Path(args.out).stat().st_size
+    print(json.dumps(st, ensure_ascii=False))
+
+
+def cmd_lookup(args: argparse.Namespace) -> None:
+    index = RuleIndex.load(args.index)
+    for e in index.lookup(args.master, args.module, args.bit, args.state):
+        print(json.dumps(e._asdict(), ensure_ascii=False))
+
+
+def synthetic_actions(rules: int, modules: int, seed: int = 1) -> list[dict[str, Any]]:
+    """Expanded actions (as in tables/_derived.json) spread over `modules` input modules."""
+
+    rnd = random.Random(seed)
+    mods = [f"{i:02X}" for i in range(modules)]
+    out: list[dict[str, Any]] = []
+    for i in range(rules):
+        module = rnd.choice(mods)
+        bit = rnd.randrange(16)
+        out.append(
+            {
+                "trigger": {"master": "HQP", "address": f"{module}.{bit}", "bit": bit},
+                "conditions": {"input_state": rnd.choice(["0", "1", "1", ""]), "input_module_state": ""},
+                "effect": {
+                    "master": "HQP",
+                    "address": f"{rnd.choice(mods)}.{rnd.randrange(16)}",
+                    "value": rnd.choice(["0", "1"]),
+                    "delay_s": rnd.choice([0, 0, 0, 5]),
+                    "macro": "",
+                    "name": f"rule {i}",
+                },
+                "active": 1,
+            }
+        )
+    return out
+
+
+def _scan(actions: list[dict[str, Any]], master: str, f: Frame) -> list[dict[str, Any]]:
+    # what a consumer without the index does: walk every rule
+    bit = int(f.cmd[2:])
+    out = []
+    for a in actions:
+        t = a["trigger"]
+        st = a["conditions"]["input_state"]
+        if t["bit"] == bit and t["master"] == master and t["address"].partition(".")[0] == f.src and st in ("", f.val):
+            out.append(a["effect"])
+    return out
+
+
+def cmd_bench(args: argparse.Namespace) -> None:
+    actions = synthetic_actions(args.rules, args.modules)
+    t0 = time.perf_counter()
+    index = RuleIndex.build(actions)
+    build_s = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rules.json.gz"
+        index.save(path)
+        size = path.stat().st_size
+        t0 = time.perf_counter()
+        index = RuleIndex.load(path)
+        load_s = time.perf_counter() - t0
+
+    rnd = random.Random(2)
+    frames = [
+        Frame(f"I.{rnd.randrange(16)}", rnd.choice(["0", "1"]), f"{rnd.randrange(args.modules):02X}", "0", str(i % 511 + 1), "s", "0")
+        for i in range(args.frames)
+    ]
+    for f in frames[:200]:
+        expected = {json.dumps(e, sort_keys=True) for e in _scan(actions, "HQP", f)}
+        if len(expected) != len(index.lookup_frame(f, "HQP")):
+            raise SystemExit("MISMATCH: index and linear scan disagree")
+
+    lookup = index.lookup_frame
+    t0 = time.perf_counter()
+    hits = 0
+    for f in frames:
+        hits += len(lookup(f, "HQP"))
+    idx_s = time.perf_counter() - t0
+
+    n_scan = min(len(frames), args.scan_frames)
+    t0 = time.perf_counter()
+    for f in frames[:n_scan]:
+        _scan(actions, "HQP", f)
+    scan_s = time.perf_counter() - t0
+
+    per_idx = idx_s / len(frames) * 1e6
+    per_scan = scan_s / n_scan * 1e6
+    print(f"rules {len(index)}  keys {len(index.triggers)}  build {build_s * 1000:.1f} ms  load {load_s * 1000:.1f} ms  file {size} B")
+    print(f"index  {per_idx:8.2f} us/frame  ({len(frames)} frames, {hits} effects)")
+    print(f"scan   {per_scan:8.2f} us/frame  ({n_scan} frames)")
+    print(f"speedup {per_scan / per_idx:.0f}x")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Compile and query the legacy action rules (trigger → effect index).")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("compile", help="Build the index from a homiq_extract_db.py export directory")
+    p.add_argument("--export", required=True, help="Export directory (with tables/_derived.json)")
+    p.add_argument("--out", required=True, help="Index file (.json or .json.gz)")
+    p.add_argument("--include-inactive", action="store_true", help="Keep rules with a_active = 0")
+    p.set_defaults(func=cmd_compile)
+
+    p = sub.add_parser("lookup", help="Print effects for one input event")
+    p.add_argument("--index", required=True)
+    p.add_argument("--master", required=True, help="Master id as in the DB (a_input_master)")
+    p.add_argument("--module", required=True, help="Input module address, e.g. 0H")
+    p.add_argument("--bit", type=int, required=True)
+    p.add_argument("--state", required=True, help="Input state (frame VAL), e.g. 1")
+    p.set_defaults(func=cmd_lookup)
+
+    p = sub.add_parser("bench", help="Lookup cost per incoming frame vs a linear scan (synthetic rules)")
+    p.add_argument("--rules", type=int, default=5000)
+    p.add_argument("--modules", type=int, default=64)
+    p.add_argument("--frames", type=int, default=200_000)
+    p.add_argument("--scan-frames", type=int, default=2000, help="Frames timed for the (slow) linear scan")
+    p.set_defaults(func=cmd_bench)
+
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,12 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import json
 import sys
 import time
 from pathlib import Path
+from typing import Any
 
 # Bootstrap imports (folder has a space)
 TOOLBOX_DIR = Path(__file__).resolve().parents[1]
@@ -12,6 +15,9 @@ sys.path.insert(0, str(TOOLBOX_DIR))
 
 from lib.homiq_frame import FrameStreamParser, decode_frame, encode_frame, make_ack, compute_crc_dec  # noqa: E402
 from lib.transports import SerialTransport, TcpTransport  # noqa: E402
+from lib.aio_transports import open_serial, open_tcp  # noqa: E402
+from lib.sender import MAX_TRIES, RETRY_INTERVAL_S, PipelinedSender  # noqa: E402
+from lib.write_scheduler import LINE_BYTES_PER_S, AsyncScheduledTransport, ScheduledTransport, WriteScheduler  # noqa: E402
 
 
 def parse_tcp(s: str) -> tuple[str, int]:
@@ -21,6 +27,62 @@ def parse_tcp(s: str) -> tuple[str, int]:
     return host, int(port)
 
 
+def parse_batch_lines(lines: list[str]) -> list[tuple[str, str, str]]:
+    """
+    Batch file format: one command per line, "DST CMD VAL" (whitespace or ';'
+    separated). Empty lines and lines starting with '#' are skipped.
+    """
+
+    out: list[tuple[str, str, str]] = []
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = line.replace(";", " ").split()
+        if len(parts) != 3:
+            raise ValueError(f"line {lineno}: expected 'DST CMD VAL', got {line!r}")
+        out.append((parts[0], parts[1], parts[2]))
+    return out
+
+
+def make_scheduler(args: argparse.Namespace) -> WriteScheduler:
+    return WriteScheduler(args.pace_bytes_per_s, args.pace_frames_per_s)
+
+
+async def run_batch(args: argparse.Namespace, commands: list[tuple[str, str, str]]) -> int:
+    t: Any
+    if args.tcp:
+        host, port = parse_tcp(args.tcp)
+        t = await open_tcp(host, port)
+    else:
+        t = await open_serial(args.serial, baud=args.baud)
+    if args.pace:
+        t = AsyncScheduledTransport(t, make_scheduler(args))
+
+    failed = 0
+    try:
+        async with PipelinedSender(
+            t,
+            src=args.src,
+            retry_interval_s=args.retry_interval,
+            max_tries=args.max_tries,
+            max_inflight=args.max_inflight,
+            auto_ack=args.auto_ack,
+        ) as sender:
+            for r in await sender.send_many(commands):
+                if r.ok:
+                    print(f"OK  {r.dst:<4} {r.cmd:<6} val={r.val!r} pkt={r.pkt} tries={r.tries} {r.latency_s * 1000:.1f}ms")
+                else:
+                    failed += 1
+                    why = "superseded" if r.superseded else "no ACK"
+                    print(f"ERR {r.dst:<4} {r.cmd:<6} val={r.val!r} pkt={r.pkt} tries={r.tries} {why}", file=sys.stderr)
+    finally:
+        await t.close()
+    if args.pace:
+        print(json.dumps({"write_scheduler": t.scheduler.metrics()}, ensure_ascii=False), file=sys.stderr)
+    return failed
+
+
 def main() -> None:
     ap = argparse.ArgumentParser(description="Send a single Homiq command (with retry + wait for ACK).")
     g = ap.add_mutually_exclusive_group(required=True)
@@ -28,9 +90,9 @@ def main() -> None:
     g.add_argument("--serial", help="Serial port (e.g. /dev/ttyUSB0 or /dev/ttyR00)")
     ap.add_argument("--baud", type=int, default=115200, help="Serial baudrate (default 115200)")
 
-    ap.add_argument("--dst", required=True, help="Destination module address (e.g. 0H or 05)")
-    ap.add_argument("--cmd", required=True, help="Command (e.g. O.3, UD, GI, IM.7, IOM.0)")
-    ap.add_argument("--val", required=True, help="Value (e.g. 0/1, u/d/s)")
+    ap.add_argument("--dst", help="Destination module address (e.g. 0H or 05)")
+    ap.add_argument("--cmd", help="Command (e.g. O.3, UD, GI, IM.7, IOM.0)")
+    ap.add_argument("--val", help="Value (e.g. 0/1, u/d/s)")
     ap.add_argument("--src", default="0", help="Source address (default: 0)")
     ap.add_argument("--pkt", default="1", help="Packet counter (ASCII decimal). Default 1.")
     ap.add_argument("--top", default="s", choices=["s", "a"], help="Frame type (default s)")
@@ -39,13 +101,54 @@ def main() -> None:
     ap.add_argument("--retry-delay", type=float, default=0.3, help="Seconds between retries (default 0.3)")
     ap.add_argument("--timeout", type=float, default=2.0, help="Wait for ACK per attempt (default 2.0s)")
     ap.add_argument("--auto-ack", action="store_true", help="While waiting, auto-ACK incoming TOP=s frames")
+
+    b = ap.add_argument_group("batch mode (pipelined, many commands in flight)")
+    b.add_argument("--batch", help="File with 'DST CMD VAL' lines ('-' = stdin); PKT is allocated per (DST, CMD)")
+    b.add_argument("--max-inflight", type=int, default=32, help="Max commands waiting for ACK at once (default 32)")
+    b.add_argument(
+        "--retry-interval", type=float, default=RETRY_INTERVAL_S, help=f"Per-command retry timer (default {RETRY_INTERVAL_S}s)"
+    )
+    b.add_argument("--max-tries", type=int, default=MAX_TRIES, help=f"Tries per command (default {MAX_TRIES})")
+
+    p = ap.add_argument_group("pacing (write scheduler: ACKs first, merge duplicate (dst, cmd), rate budget)")
+    p.add_argument("--pace", action="store_true", help="Send through the paced write scheduler")
+    p.add_argument(
+        "--pace-bytes-per-s",
+        type=float,
+        default=LINE_BYTES_PER_S / 2,
+        help=f"Write budget (default {LINE_BYTES_PER_S / 2:.0f} B/s = half of 115200 8N1)",
+    )
+    p.add_argument("--pace-frames-per-s", type=float, default=None, help="Optional frame budget")
     args = ap.parse_args()
 
+    if args.batch:
+        if args.top != "s":
+            ap.error("--batch sends TOP=s commands only")
+        if args.batch == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            lines = Path(args.batch).read_text(encoding="utf-8").splitlines()
+        try:
+            commands = parse_batch_lines(lines)
+        except ValueError as e:
+            ap.error(str(e))
+        failed = asyncio.run(run_batch(args, commands))
+        if failed:
+            print(f"ERR: {failed}/{len(commands)} commands without ACK", file=sys.stderr)
+            raise SystemExit(2)
+        return
+
+    if not (args.dst and args.cmd and args.val is not None):
+        ap.error("--dst, --cmd and --val are required (or use --batch)")
+
+    t: Any
     if args.tcp:
         host, port = parse_tcp(args.tcp)
         t = TcpTransport(host, port)
     else:
         t = SerialTransport(args.serial, baud=args.baud)  # type: ignore[arg-type]
+    if args.pace:
+        t = ScheduledTransport(t, make_scheduler(args))
 
     parser = FrameStreamParser()
 
@@ -6,7 +6,6 @@ import json
 import sys
 import time
 from collections import Counter
-from dataclasses import asdict
 from pathlib import Path
 from typing import Any
 
@@ -14,8 +13,17 @@ from typing import Any
 TOOLBOX_DIR = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(TOOLBOX_DIR))
 
-from lib.homiq_frame import FrameStreamParser, make_ack, validate_crc  # noqa: E402
+from lib.capture import DIR_RX, DIR_TX  # noqa: E402
+from lib.homiq_frame import FrameStreamParser, make_ack_frame, validate_crc  # noqa: E402
+from lib.metrics import BusMetrics, MetricsHTTPServer  # noqa: E402
+from lib.sinks import BatchedWriter, CaptureSink, NdjsonSink, Sink, TextSink, open_sink  # noqa: E402
+from lib.state_shadow import StateChange, StateShadow  # noqa: E402
 from lib.transports import SerialTransport, TcpTransport  # noqa: E402
+from lib.write_scheduler import LINE_BYTES_PER_S, ScheduledTransport, WriteScheduler  # noqa: E402
+
+
+RECONNECT_INITIAL_S = 0.5
+RECONNECT_MAX_S = 30.0
 
 
 def parse_tcp(s: str) -> tuple[str, int]:
@@ -25,6 +33,14 @@ def parse_tcp(s: str) -> tuple[str, int]:
     return host, int(port)
 
 
+def parse_listen(s: str) -> tuple[str, int]:
+    """[HOST:]PORT, host defaults to 127.0.0.1."""
+
+    if ":" not in s:
+        return "127.0.0.1", int(s)
+    return parse_tcp(s)
+
+
 def main() -> None:
     ap = argparse.ArgumentParser(description="Sniff Homiq frames over TCP or serial. Auto-ACK optional.")
     g = ap.add_mutually_exclusive_group(required=True)
@@ -35,17 +51,87 @@ def main() -> None:
     ap.add_argument("--no-crc", action="store_true", help="Do not validate CRC")
     ap.add_argument("--json", action="store_true", help="Output frames as JSON lines")
     ap.add_argument("--seconds", type=int, default=0, help="Stop after N seconds (0 = infinite)")
+    ap.add_argument("--pace", action="store_true", help="Send ACKs through the paced write scheduler")
+    ap.add_argument(
+        "--pace-bytes-per-s",
+        type=float,
+        default=LINE_BYTES_PER_S / 2,
+        help=f"Write budget with --pace (default {LINE_BYTES_PER_S / 2:.0f} B/s = half of 115200 8N1)",
+    )
+    ap.add_argument("--pace-frames-per-s", type=float, default=None, help="Optional frame budget with --pace")
+    ap.add_argument("--capture", default="", help="Also record frames (RX + sent ACKs) to binary .hqc files in DIR")
+    ap.add_argument("--capture-rotate-mb", type=float, default=64.0, help="Rotate capture file after N MB (default 64)")
+    ap.add_argument("--capture-rotate-min", type=float, default=60.0, help="Rotate capture file after N minutes (default 60)")
+    ap.add_argument("--state", default="", help="Keep a device state shadow, snapshotted to FILE (warm start from it)")
+    ap.add_argument("--changes", action="store_true", help="Print only state changes (O.*, I.*, UD, T.*) instead of every frame")
+    ap.add_argument("--master", default="", help="Master name recorded in the state shadow (e.g. HQP)")
+    ap.add_argument("--metrics", default="", metavar="[HOST:]PORT", help="Serve OpenMetrics for Prometheus on http://HOST:PORT/metrics")
+    ap.add_argument("--metrics-top-src", type=int, default=64, help="SRC values with their own series (rest = other, default 64)")
+    ap.add_argument("--metrics-top-cmd", type=int, default=32, help="CMD values with their own series (rest = other, default 32)")
+    ap.add_argument("--quiet", action="store_true", help="Do not print frames (e.g. with --metrics or --capture)")
+    ap.add_argument(
+        "--sink",
+        action="append",
+        default=[],
+        metavar="KIND[:PATH]",
+        help="Extra output (repeatable): text|ndjson|csv[:FILE], capture:DIR, sqlite:FILE",
+    )
+    ap.add_argument("--sink-queue", type=int, default=65536, help="Records buffered for the sinks before dropping (default 65536)")
+    ap.add_argument("--sink-batch", type=int, default=1024, help="Records per sink write (default 1024)")
+    ap.add_argument("--sink-flush", type=float, default=0.2, help="Write a partial batch after N seconds (default 0.2)")
     args = ap.parse_args()
 
+    t: Any
     if args.tcp:
         host, port = parse_tcp(args.tcp)
         t = TcpTransport(host, port)
     else:
         t = SerialTransport(args.serial, baud=args.baud)  # type: ignore[arg-type]
+    base = t
+    if args.pace:
+        t = ScheduledTransport(t, WriteScheduler(args.pace_bytes_per_s, args.pace_frames_per_s))
+
+    # output goes through a writer thread: printing, pipes and disks never delay ACKs
+    capture_kw = {"rotate_bytes": int(args.capture_rotate_mb * 1024 * 1024), "rotate_seconds": args.capture_rotate_min * 60.0}
+    sinks: list[Sink] = []
+    if not (args.changes or args.quiet):
+        sinks.append(NdjsonSink(rx_only=True) if args.json else TextSink())
+    if args.capture:
+        sinks.append(open_sink(f"capture:{args.capture}", **capture_kw))
+    for spec in args.sink:
+        sinks.append(open_sink(spec, **capture_kw))
+    capture = next((sk.writer for sk in sinks if isinstance(sk, CaptureSink)), None)
+    writer = BatchedWriter(sinks, max_queue=args.sink_queue, batch_records=args.sink_batch, flush_interval_s=args.sink_flush) if sinks else None
+
+    shadow = None
+    if args.state or args.changes:
+        shadow = StateShadow(master=args.master, snapshot_path=args.state or None)
+        if args.state:
+            shadow.load()
+        if args.changes:
+
+            def print_change(c: StateChange) -> None:
+                if args.json:
+                    print(json.dumps(c._asdict(), ensure_ascii=False))
+                else:
+                    print(f"{c.module:>4} {c.cmd:<6} {c.old!r} -> {c.new!r}")
+
+            shadow.subscribe(print_change)
 
     parser = FrameStreamParser()
 
+    metrics = None
+    metrics_server = None
+    if args.metrics:
+        metrics = BusMetrics(top_src=args.metrics_top_src, top_cmd=args.metrics_top_cmd, parser=parser)
+        mhost, mport = parse_listen(args.metrics)
+        metrics_server = MetricsHTTPServer(metrics, mhost, mport)
+        print(f"Metrics on http://{mhost}:{metrics_server.port}/metrics", file=sys.stderr)
+
     start = time.time()
+    reconnects = 0
+    backoff = RECONNECT_INITIAL_S
+    lost = False
     frames = 0
     crc_bad = 0
     top_counts: Counter[str] = Counter()
@@ -57,10 +143,33 @@ def main() -> None:
             if args.seconds and (time.time() - start) > args.seconds:
                 break
 
-            chunk = t.read(4096)
+            if not lost:
+                try:
+                    chunk = t.read(4096)
+                    lost = getattr(base, "eof", False)
+                except OSError:
+                    chunk, lost = b"", True
+            if lost:
+                # link dropped (Moxa restart, cable): reconnect with backoff
+                time.sleep(backoff)
+                try:
+                    base.reconnect()
+                except OSError as e:
+                    print(f"Reconnect failed: {e}", file=sys.stderr)
+                    backoff = min(backoff * 2, RECONNECT_MAX_S)
+                    continue
+                lost = False
+                parser.reset()
+                reconnects += 1
+                if metrics is not None:
+                    metrics.reconnects = reconnects
+                backoff = RECONNECT_INITIAL_S
+                continue
             if not chunk:
                 continue
 
+            now = time.time()
+            mono = time.monotonic()
             for f in parser.push(chunk):
                 frames += 1
                 top_counts[f.top] += 1
@@ -73,22 +182,38 @@ def main() -> None:
                     if not ok:
                         crc_bad += 1
 
-                if args.ack and f.top == "s":
-                    # ACK as legacy stacks do: src=0, dst=SRC
-                    t.write(make_ack(f).encode("ascii"))
+                if metrics is not None:
+                    metrics.observe(f, ok, mono)
+                if writer is not None:
+                    writer.put((now, DIR_RX, f, ok))
 
-                if args.json:
-                    out: dict[str, Any] = asdict(f)
-                    out["crc_ok"] = ok
-                    print(json.dumps(out, ensure_ascii=False))
-                else:
-                    flag = "OK" if ok else "CRC_BAD"
-                    print(f"{f.src:>4} -> {f.dst:<4} top={f.top} pkt={f.pkt:>3} {f.cmd:<6} val={f.val!r} {flag}")
+                if args.ack and f.top == "s" and not lost:
+                    # ACK as legacy stacks do: src=0, dst=SRC
+                    ack_frame = make_ack_frame(f)
+                    try:
+                        t.write(ack_frame.to_wire())
+                    except OSError:
+                        lost = True  # reconnect after this chunk
+                    if not lost:
+                        if writer is not None:
+                            writer.put((now, DIR_TX, ack_frame, True))
+                        if metrics is not None:
+                            metrics.acks_sent += 1
+                            metrics.observe(ack_frame, True, time.monotonic())
+
+                if shadow is not None and ok:
+                    shadow.update(f, now)
 
     except KeyboardInterrupt:
         pass
     finally:
         t.close()
+        if metrics_server is not None:
+            metrics_server.close()
+        if writer is not None:
+            writer.close()
+        if shadow is not None:
+            shadow.close()
 
     summary = {
         "frames": frames,
@@ -98,7 +223,19 @@ def main() -> None:
         "top_src": src_counts.most_common(10),
         "top_cmd": cmd_counts.most_common(20),
         "duration_s": time.time() - start,
+        "reconnects": reconnects,
     }
+    if args.pace:
+        summary["write_scheduler"] = {**t.scheduler.metrics(), "write_errors": t.write_errors}
+    if metrics is not None:
+        summary["timing"] = metrics.timing.report()
+        summary["parser"] = parser.stats()
+    if shadow is not None:
+        summary["state"] = shadow.stats()
+    if writer is not None:
+        summary["sinks"] = writer.stats()
+    if capture is not None:
+        summary["capture"] = {"records": capture.records, "files": [str(p) for p in capture.files]}
     print("\n--- summary ---", file=sys.stderr)
     print(json.dumps(summary, ensure_ascii=False, indent=2), file=sys.stderr)
 
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, Protocol
+
+from .homiq_frame import Frame, FrameStreamParser, make_ack
+
+
+class AsyncTransport(Protocol):
+    async def send(self, data: bytes) -> None: ...
+
+    async def read(self, n: int = 4096) -> bytes: ...
+
+    async def close(self) -> None: ...
+
+
+@dataclass
+class AsyncStreamTransport:
+    """
+    asyncio transport over a StreamReader/StreamWriter pair.
+
+    read() waits on the event loop instead of polling a socket timeout and
+    returns b"" only on EOF. Build instances with open_tcp(), open_serial() or
+    open_fd().
+    """
+
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    desc: str = ""
+    _serial: object | None = None
+    _read_transport: Optional[asyncio.BaseTransport] = None
+
+    async def send(self, data: bytes) -> None:
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def read(self, n: int = 4096) -> bytes:
+        return await self.reader.read(n)
+
+    async def close(self) -> None:
+        try:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        finally:
+            if self._read_transport is not None:
+                self._read_transport.close()
+                self._read_transport = None
+            if self._serial is not None:
+                try:
+                    self._serial.close()  # type: ignore[attr-defined]
+                finally:
+                    self._serial = None
+
+
+async def open_tcp(host: str, port: int, connect_timeout_s: float = 5.0) -> AsyncStreamTransport:
+    """Connect to a Moxa (or any TCP server) in TCP Server mode."""
+
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), connect_timeout_s)
+    return AsyncStreamTransport(reader, writer, desc=f"tcp:{host}:{port}")
+
+
+class _FdWriteProtocol(asyncio.streams.FlowControlMixin):
+    # FlowControlMixin provides drain(); StreamWriter.wait_closed() also
+    # needs a close waiter, which only StreamReaderProtocol implements.
+    def __init__(self) -> None:
+        super().__init__()
+        self._closed = asyncio.get_running_loop().create_future()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        super().connection_lost(exc)
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    def _get_close_waiter(self, stream: asyncio.StreamWriter) -> asyncio.Future[None]:
+        return self._closed
+
+
+async def open_fd(fd: int, desc: str = "") -> AsyncStreamTransport:
+    """
+    Wrap a non-blocking character device / pipe fd (serial port, pty) as
+    streams. The fd is duplicated, so the caller keeps ownership of `fd`.
+    """
+
+    loop = asyncio.get_running_loop()
+    rfile = os.fdopen(os.dup(fd), "rb", buffering=0)
+    wfile = os.fdopen(os.dup(fd), "wb", buffering=0)
+    reader = asyncio.StreamReader()
+    r_transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), rfile)
+    w_transport, w_protocol = await loop.connect_write_pipe(_FdWriteProtocol, wfile)
+    writer = asyncio.StreamWriter(w_transport, w_protocol, None, loop)  # type: ignore[arg-type]
+    return AsyncStreamTransport(reader, writer, desc=desc or f"fd:{fd}", _read_transport=r_transport)
+
+
+async def open_serial(port: str, baud: int = 115200) -> AsyncStreamTransport:
+    """
+    Open a serial port (USB-RS485, npreal /dev/ttyR*) for asyncio.
+
+    Uses pyserial-asyncio when installed; otherwise configures the port with
+    pyserial and drives its fd through open_fd().
+    """
+
+    try:
+        import serial_asyncio  # pyserial-asyncio
+    except ImportError:
+        serial_asyncio = None
+
+    if serial_asyncio is not None:
+        reader, writer = await serial_asyncio.open_serial_connection(url=port, baudrate=baud)
+        return AsyncStreamTransport(reader, writer, desc=f"serial:{port}")
+
+    import serial  # pyserial
+
+    ser = serial.Serial(port, baud, timeout=0)
+    try:
+        t = await open_fd(ser.fileno(), desc=f"serial:{port}")
+    except BaseException:
+        ser.close()
+        raise
+    t._serial = ser
+    return t
+
+
+async def aiter_frames(
+    t: AsyncTransport,
+    parser: Optional[FrameStreamParser] = None,
+    auto_ack: bool = False,
+    chunk_size: int = 4096,
+) -> AsyncIterator[Frame]:
+    """
+    Yield decoded frames until EOF. With auto_ack, TOP=s frames are ACKed
+    (src=0, dst=SRC) before being yielded.
+    """
+
+    parser = parser or FrameStreamParser()
+    while True:
+        chunk = await t.read(chunk_size)
+        if not chunk:
+            return
+        for f in parser.push(chunk):
+            if auto_ack and f.top == "s":
+                await t.send(make_ack(f).encode("ascii"))
+            yield f
+
+
+async def send_frame(t: AsyncTransport, frame: Frame | str | bytes) -> None:
+    if isinstance(frame, Frame):
+        data = frame.to_wire()
+    elif isinstance(frame, str):
+        data = frame.encode("ascii")
+    else:
+        data = frame
+    await t.send(data)
@@ -0,0 +1,278 @@
+"""
+Local automation runtime: executes the legacy `action` rules on live frames.
+
+AutomationEngine reads frames from one bus (AsyncTransport, one master):
+
+  - TOP=s frames from modules are ACKed; a module's retries of the same
+    event (same SRC, CMD, PKT) are recognised and fire nothing
+  - frames with a bad CRC are counted and dropped: neither ACKed (the module
+    retries the good copy) nor matched against rules
+  - `I.<bit>` events are matched through a RuleIndex (lib/rules.py)
+  - effects go out through a PipelinedSender (ACK tracking + retries);
+    incoming ACKs are handed to the sender from the engine's read loop
+  - effects with a delay (a_sleep) wait on one TimerHeap, not a task or
+    thread per delay
+
+Effects that target another master or only reference a macro are counted,
+not sent.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from .aio_transports import AsyncTransport, aiter_frames
+from .homiq_frame import Frame, make_ack, validate_crc
+from .rules import Effect, RuleIndex
+from .sender import MAX_TRIES, RETRY_INTERVAL_S, PipelinedSender, SendResult
+
+
+class TimerHeap:
+    """
+    One-task timer scheduler: callbacks ordered in a heap by due time.
+
+    `call_later` returns a handle for `cancel`; cancelled entries stay in the
+    heap and are skipped when they come up.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self._heap: list[list[Any]] = []
+        self._seq = itertools.count()
+        self._wake: Optional[asyncio.Event] = None
+        self._live = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def call_later(self, delay_s: float, fn: Callable[..., None], *args: Any) -> list[Any]:
+        entry = [self.clock() + delay_s, next(self._seq), fn, args]
+        heapq.heappush(self._heap, entry)
+        self._live += 1
+        if self._wake is not None:
+            self._wake.set()
+        return entry
+
+    def cancel(self, entry: list[Any]) -> None:
+        if entry[2] is not None:
+            entry[2] = None
+            self._live -= 1
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._live = 0
+
+    def run_due(self) -> float | None:
+        """Run every callback that is due; seconds until the next one (None if empty)."""
+
+        heap = self._heap
+        while heap:
+            due, _, fn, args = heap[0]
+            if fn is None:
+                heapq.heappop(heap)
+                continue
+            delay = due - self.clock()
+            if delay > 0:
+                return delay
+            heapq.heappop(heap)
+            self._live -= 1
+            fn(*args)
+        return None
+
+    async def run(self) -> None:
+        wake = self._wake = asyncio.Event()
+        while True:
+            wake.clear()
+            delay = self.run_due()
+            try:
+                await asyncio.wait_for(wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _pct(sorted_vals: list[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+
+@dataclass
+class EngineStats:
+    frames: int = 0
+    crc_bad: int = 0
+    acks_sent: int = 0
+    events: int = 0
+    duplicates: int = 0
+    matched: int = 0
+    effects: int = 0
+    delayed: int = 0
+    sent: int = 0
+    acked: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    skipped_macro: int = 0
+    skipped_master: int = 0
+    # input frame parsed → first try of the effect written by the transport
+    # (dry run: effect decided)
+    reaction_s: list[float] = field(default_factory=list)
+
+    def report(self) -> dict[str, Any]:
+        lat = sorted(self.reaction_s)
+        out: dict[str, Any] = {k: v for k, v in self.__dict__.items() if k != "reaction_s"}
+        out["reaction_ms"] = {
+            "p50": _pct(lat, 0.50) * 1000.0,
+            "p95": _pct(lat, 0.95) * 1000.0,
+            "p99": _pct(lat, 0.99) * 1000.0,
+            "max": (lat[-1] if lat else 0.0) * 1000.0,
+        }
+        return out
+
+
+class AutomationEngine:
+    """
+    Rule engine for one master's bus.
+
+        engine = AutomationEngine(transport, RuleIndex.load("rules.json.gz"), master="HQP")
+        stats = await engine.run()  # until EOF / stop()
+    """
+
+    def __init__(
+        self,
+        transport: AsyncTransport,
+        index: RuleIndex,
+        master: str,
+        src: str = "0",
+        ack_events: bool = True,
+        retry_interval_s: float = RETRY_INTERVAL_S,
+        max_tries: int = MAX_TRIES,
+        max_inflight: int = 32,
+        dry_run: bool = False,
+        on_effect: Optional[Callable[[Effect, Optional[SendResult]], None]] = None,
+        latency_window: int = 4096,
+    ) -> None:
+        self.transport = transport
+        self.index = index
+        self.master = master
+        self.ack_events = ack_events
+        self.dry_run = dry_run
+        self.on_effect = on_effect
+        self.latency_window = latency_window
+        self.sender = PipelinedSender(transport, src=src, retry_interval_s=retry_interval_s, max_tries=max_tries, max_inflight=max_inflight)
+        self.timers = TimerHeap()
+        self.stats = EngineStats()
+        self._last_pkt: dict[tuple[str, str], str] = {}
+        self._inflight: set[asyncio.Task[None]] = set()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._stopping = False
+
+    async def run(self) -> EngineStats:
+        timer_task = asyncio.create_task(self.timers.run())
+        reader = self._task = asyncio.create_task(self._read_loop())
+        try:
+            await reader
+        except asyncio.CancelledError:
+            if not reader.cancelled() or not self._stopping:
+                raise
+        finally:
+            reader.cancel()
+            timer_task.cancel()
+            self.timers.clear()
+            pending = list(self._inflight)
+            for t in pending:
+                t.cancel()
+            await asyncio.gather(reader, timer_task, *pending, return_exceptions=True)
+            self.stats.cancelled += len(pending)
+        return self.stats
+
+    def stop(self) -> None:
+        """End run() (pending delayed effects and unACKed sends are dropped)."""
+
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _read_loop(self) -> None:
+        st = self.stats
+        sender = self.sender
+        async for f in aiter_frames(self.transport, parser=sender.parser):
+            st.frames += 1
+            if not validate_crc(f):
+                st.crc_bad += 1
+                continue
+            if f.top == "a":
+                sender.on_ack(f)
+                continue
+            t_in = time.monotonic()
+            if self.ack_events:
+                await self.transport.send(make_ack(f).encode("ascii"))
+                st.acks_sent += 1
+            self.on_frame(f, t_in)
+
+    def on_frame(self, f: Frame, t_in: Optional[float] = None) -> None:
+        """Handle one TOP=s frame from the bus (already ACKed)."""
+
+        if t_in is None:
+            t_in = time.monotonic()
+        cmd = f.cmd
+        if not cmd.startswith("I."):
+            return
+        st = self.stats
+        key = (f.src, cmd)
+        if self._last_pkt.get(key) == f.pkt:
+            st.duplicates += 1
+            return
+        self._last_pkt[key] = f.pkt
+        st.events += 1
+        effects = self.index.lookup_frame(f, self.master)
+        if effects:
+            st.matched += 1
+        for e in effects:
+            st.effects += 1
+            if not e.cmd:
+                st.skipped_macro += 1
+            elif e.master and e.master != self.master:
+                st.skipped_master += 1
+            elif e.delay_s > 0:
+                st.delayed += 1
+                self.timers.call_later(e.delay_s, self._fire, e, None)
+            else:
+                self._fire(e, t_in)
+
+    def _fire(self, e: Effect, t_in: Optional[float]) -> None:
+        task = asyncio.get_running_loop().create_task(self._send(e, t_in))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    def _reaction(self, t_in: float) -> None:
+        lat = self.stats.reaction_s
+        lat.append(time.monotonic() - t_in)
+        if len(lat) > self.latency_window:
+            del lat[: len(lat) - self.latency_window]
+
+    async def _send(self, e: Effect, t_in: Optional[float]) -> None:
+        st = self.stats
+        if self.dry_run:
+            if t_in is not None:
+                self._reaction(t_in)
+            if self.on_effect is not None:
+                self.on_effect(e, None)
+            return
+        st.sent += 1
+        # timed when the first try has been written (after slot wait and drain)
+        written = None if t_in is None else (lambda: self._reaction(t_in))
+        try:
+            r = await self.sender.send(e.module, e.cmd, e.value, on_first_write=written)
+        except (ConnectionError, OSError):
+            st.failed += 1
+            return
+        if r.ok:
+            st.acked += 1
+        else:
+            st.failed += 1
+        if self.on_effect is not None:
+            self.on_effect(e, r)
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from .aio_transports import AsyncStreamTransport, aiter_frames, open_tcp
+from .homiq_frame import FrameStreamParser, make_ack, validate_crc
+
+
+# Drop a local subscriber whose unsent backlog grows past this (slow reader).
+SUBSCRIBER_MAX_BACKLOG = 256 * 1024
+
+
+@dataclass
+class GatewayStats:
+    frames_rx: int = 0
+    bytes_rx: int = 0
+    frames_tx: int = 0
+    bytes_tx: int = 0
+    acks_sent: int = 0
+    crc_bad: int = 0
+    client_acks_dropped: int = 0
+    tx_dropped: int = 0
+    connects: int = 0
+    reconnects: int = 0
+    subscribers_dropped: int = 0
+
+
+Connector = Callable[[str, int], Awaitable[AsyncStreamTransport]]
+
+
+class Gateway:
+    """
+    One persistent connection to a Moxa port (one Homiq master).
+
+    - reconnects with exponential backoff, reset after a successful connect
+    - auto-ACKs TOP=s frames with make_ack() when auto_ack is set
+    - fans every received frame out to local subscribers as wire frames
+    - forwards frames written by subscribers to the bus (client ACKs are
+      dropped when the daemon ACKs itself, to avoid duplicate ACKs)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        host: str,
+        port: int,
+        auto_ack: bool = True,
+        backoff_initial_s: float = 0.5,
+        backoff_max_s: float = 30.0,
+        connector: Connector = open_tcp,
+    ) -> None:
+        self.name = name
+        self.host = host
+        self.port = port
+        self.auto_ack = auto_ack
+        self.backoff_initial_s = backoff_initial_s
+        self.backoff_max_s = backoff_max_s
+        self.connector = connector
+        self.stats = GatewayStats()
+        self.parser = FrameStreamParser()
+        self.subscribers: set[asyncio.StreamWriter] = set()
+        self.connected = asyncio.Event()
+        self._transport: Optional[AsyncStreamTransport] = None
+        self._started = time.monotonic()
+
+    async def run(self) -> None:
+        backoff = self.backoff_initial_s
+        while True:
+            try:
+                self._transport = await self.connector(self.host, self.port)
+            except (OSError, asyncio.TimeoutError):
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.backoff_max_s)
+                continue
+
+            if self.stats.connects:
+                self.stats.reconnects += 1
+            self.stats.connects += 1
+            backoff = self.backoff_initial_s
+            self.parser.reset()
+            self.connected.set()
+            try:
+                await self._pump(self._transport)
+            except (OSError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                self.connected.clear()
+                t, self._transport = self._transport, None
+                await t.close()
+            await asyncio.sleep(backoff)
+
+    async def _pump(self, t: AsyncStreamTransport) -> None:
+        st = self.stats
+        async for f in aiter_frames(t, parser=self.parser):
+            st.frames_rx += 1
+            wire = f.to_wire()
+            st.bytes_rx += len(wire)
+            if not validate_crc(f):
+                st.crc_bad += 1
+            elif self.auto_ack and f.top == "s":
+                await self._write(make_ack(f).encode("ascii"))
+                st.acks_sent += 1
+            self._fan_out(wire)
+
+    def _fan_out(self, wire: bytes) -> None:
+        for w in list(self.subscribers):
+            if w.is_closing():
+                self.subscribers.discard(w)
+                continue
+            if w.transport.get_write_buffer_size() > SUBSCRIBER_MAX_BACKLOG:
+                self.stats.subscribers_dropped += 1
+                self.subscribers.discard(w)
+                w.close()
+                continue
+            w.write(wire)
+
+    async def _write(self, data: bytes) -> None:
+        t = self._transport
+        if t is None:
+            self.stats.tx_dropped += 1
+            return
+        await t.send(data)
+        self.stats.frames_tx += 1
+        self.stats.bytes_tx += len(data)
+
+    async def send(self, data: bytes) -> None:
+        await self._write(data)
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Moxa-like local endpoint: bus frames out, client frames to the bus."""
+
+        self.subscribers.add(writer)
+        parser = FrameStreamParser()
+        try:
+            while True:
+                chunk = await reader.read(4096)
+                if not chunk:
+                    break
+                for f in parser.push(chunk):
+                    if self.auto_ack and f.top == "a":
+                        self.stats.client_acks_dropped += 1
+                        continue
+                    await self._write(f.to_wire())
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+    def snapshot(self) -> dict[str, Any]:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        out: dict[str, Any] = {
+            "name": self.name,
+            "host": self.host,
+            "port": self.port,
+            "connected": self.connected.is_set(),
+            "subscribers": len(self.subscribers),
+            **asdict(self.stats),
+            "parser": self.parser.stats(),
+        }
+        out["frames_rx_per_s"] = self.stats.frames_rx / elapsed
+        out["bytes_rx_per_s"] = self.stats.bytes_rx / elapsed
+        out["frames_tx_per_s"] = self.stats.frames_tx / elapsed
+        return out
+
+
+@dataclass
+class DaemonConfig:
+    listen_host: str = "127.0.0.1"
+    listen_port_base: int = 0  # 0 = no TCP listeners
+    unix_dir: str = ""  # "" = no unix sockets
+
+
+async def start_listeners(gateways: list[Gateway], cfg: DaemonConfig) -> list[asyncio.AbstractServer]:
+    """
+    Gateway i listens on listen_port_base+i (TCP) and/or <unix_dir>/<name>.sock.
+    """
+
+    servers: list[asyncio.AbstractServer] = []
+    for i, gw in enumerate(gateways):
+        if cfg.listen_port_base:
+            servers.append(await asyncio.start_server(gw.serve_client, cfg.listen_host, cfg.listen_port_base + i))
+        if cfg.unix_dir:
+            path = Path(cfg.unix_dir) / f"{gw.name}.sock"
+            if path.is_socket():
+                path.unlink()  # stale socket from a previous run
+            servers.append(await asyncio.start_unix_server(gw.serve_client, str(path)))
+    return servers
@@ -0,0 +1,264 @@
+"""
+Timing statistics for a Homiq bus: ACK latency, retries, gaps, utilization.
+
+BusTiming.observe() takes every frame with a monotonic timestamp (frames we
+send ourselves too, e.g. the doctor's ACKs):
+
+  - a TOP=s frame opens a pending exchange keyed by (CMD, PKT, SRC, DST);
+    the TOP=a frame with SRC/DST swapped closes it. Latency is measured from
+    the first transmission (what the sender waits, retries included) and from
+    the last one (round trip of the try that was answered)
+  - the same TOP=s key seen again while pending, or shortly after it was
+    answered (the ACK got lost), is a retry
+  - exchanges are attributed to the module side (the address that is not the
+    controller "0"); `module_ack` = the module answered our command,
+    `controller_ack` = the module's event was answered by the controller
+  - gaps between consecutive frames and bytes on the wire (8N1: 10 bits per
+    byte) give the bus utilization against the line rate
+
+Timestamps are taken per read chunk, so frames from one TCP segment share a
+timestamp; latencies below the read granularity are not meaningful.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+from .homiq_frame import Frame
+from .sender import MAX_TRIES, RETRY_INTERVAL_S
+from .write_scheduler import LINE_BAUD
+
+
+# wire = "<;" + body + ";>\r\n"
+_WIRE_OVERHEAD = 6
+_BITS_PER_BYTE = 10
+# a pending TOP=s is given up after the sender's full retry cycle (plus slack)
+PENDING_TIMEOUT_S = 2 * MAX_TRIES * RETRY_INTERVAL_S
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of durations in seconds.
+
+    Values are counted in microseconds: 0-`sub_buckets` us exactly, then
+    `sub_buckets` buckets per power of two (16 → within ~6 %). Recording is
+    one integer index computation and a list increment.
+    """
+
+    __slots__ = ("sub_buckets", "_shift", "counts", "count", "total_s", "min_s", "max_s")
+
+    def __init__(self, sub_buckets: int = 16, max_s: float = 120.0) -> None:
+        if sub_buckets & (sub_buckets - 1):
+            raise ValueError("sub_buckets must be a power of two")
+        self.sub_buckets = sub_buckets
+        self._shift = sub_buckets.bit_length() - 1
+        self.counts = [0] * (self._index(int(max_s * 1e6)) + 1)
+        self.count = 0
+        self.total_s = 0.0
+        self.min_s = math.inf
+        self.max_s = 0.0
+
+    def _index(self, us: int) -> int:
+        if us < self.sub_buckets:
+            return us
+        exp = us.bit_length() - 1 - self._shift
+        return (exp + 1) * self.sub_buckets + ((us >> exp) - self.sub_buckets)
+
+    def _lower_us(self, i: int) -> int:
+        if i < self.sub_buckets:
+            return i
+        exp = i // self.sub_buckets - 1
+        return (self.sub_buckets + i % self.sub_buckets) << exp
+
+    def record(self, value_s: float) -> None:
+        us = int(value_s * 1e6)
+        i = self._index(us) if us > 0 else 0
+        counts = self.counts
+        counts[i if i < len(counts) else -1] += 1
+        self.count += 1
+        self.total_s += value_s
+        if value_s < self.min_s:
+            self.min_s = value_s
+        if value_s > self.max_s:
+            self.max_s = value_s
+
+    def percentile(self, q: float) -> float:
+        """Upper bound (s) of the bucket holding the q-quantile; exact max for q=1."""
+
+        if not self.count:
+            return 0.0
+        if q >= 1.0:
+            return self.max_s
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(self._lower_us(i + 1) / 1e6, self.max_s)
+        return self.max_s
+
+    def cumulative(self, bounds_s: Iterable[float]) -> list[int]:
+        """Counts at or below each bound (ascending), at bucket resolution."""
+
+        out: list[int] = []
+        counts = list(self.counts)
+        seen = 0
+        i = 0
+        for b in bounds_s:
+            limit_us = b * 1e6
+            while i < len(counts) and self._lower_us(i + 1) <= limit_us:
+                seen += counts[i]
+                i += 1
+            out.append(seen)
+        return out
+
+    def summary_ms(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": (self.total_s / self.count * 1000.0) if self.count else 0.0,
+            "min": (self.min_s * 1000.0) if self.count else 0.0,
+            "p50": self.percentile(0.50) * 1000.0,
+            "p95": self.percentile(0.95) * 1000.0,
+            "p99": self.percentile(0.99) * 1000.0,
+            "max": self.max_s * 1000.0,
+        }
+
+
+@dataclass
+class ModuleTiming:
+    exchanges: int = 0  # distinct TOP=s frames involving the module
+    retries: int = 0
+    answered: int = 0
+    unanswered: int = 0
+    module_ack: LatencyHistogram = field(default_factory=LatencyHistogram)
+    module_rtt: LatencyHistogram = field(default_factory=LatencyHistogram)
+    controller_ack: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def report(self) -> dict[str, Any]:
+        sent = self.exchanges + self.retries
+        return {
+            "exchanges": self.exchanges,
+            "retries": self.retries,
+            "retry_rate": (self.retries / sent) if sent else 0.0,
+            "answered": self.answered,
+            "unanswered": self.unanswered,
+            # first try → ACK (retries included), last try → ACK
+            "module_ack_ms": self.module_ack.summary_ms(),
+            "module_rtt_ms": self.module_rtt.summary_ms(),
+            "controller_ack_ms": self.controller_ack.summary_ms(),
+        }
+
+
+class BusTiming:
+    def __init__(self, controller: str = "0", baud: int = LINE_BAUD, pending_timeout_s: float = PENDING_TIMEOUT_S) -> None:
+        self.controller = controller
+        self.baud = baud
+        self.pending_timeout_s = pending_timeout_s
+        self.modules: dict[str, ModuleTiming] = {}
+        self.gaps = LatencyHistogram()
+        self.frames = 0
+        self.bytes = 0
+        self.first_ts: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        self.late_acks = 0
+        # (cmd, pkt, src, dst) of the TOP=s → [first_ts, last_ts, tries]
+        self._pending: dict[tuple[str, str, str, str], list[float]] = {}
+        # answered keys → ACK ts, to spot retries after a lost ACK
+        self._answered: dict[tuple[str, str, str, str], float] = {}
+        self._next_expire = 0.0
+        # bytes per whole second since first_ts, for the peak utilization
+        self._sec = -1
+        self._sec_bytes = 0
+        self.peak_bytes_per_s = 0
+
+    def _module(self, addr: str) -> ModuleTiming:
+        m = self.modules.get(addr)
+        if m is None:
+            m = self.modules[addr] = ModuleTiming()
+        return m
+
+    def observe(self, f: Frame, ts: float) -> None:
+        n = len(f.body) + _WIRE_OVERHEAD
+        self.frames += 1
+        self.bytes += n
+        if self.first_ts is None:
+            self.first_ts = ts
+        elif self.last_ts is not None:
+            self.gaps.record(max(0.0, ts - self.last_ts))
+        self.last_ts = ts
+        sec = int(ts - self.first_ts)
+        if sec != self._sec:
+            self._sec = sec
+            self._sec_bytes = 0
+        self._sec_bytes += n
+        if self._sec_bytes > self.peak_bytes_per_s:
+            self.peak_bytes_per_s = self._sec_bytes
+
+        src, dst = f.src, f.dst
+        if f.top == "s":
+            key = (f.cmd, f.pkt, src, dst)
+            p = self._pending.get(key)
+            m = self._module(dst if src == self.controller else src)
+            if p is None:
+                self._pending[key] = [ts, ts, 1]
+                if self._answered.pop(key, None) is None:
+                    m.exchanges += 1
+                else:
+                    m.retries += 1
+            else:
+                p[1] = ts
+                p[2] += 1
+                m.retries += 1
+        else:
+            key = (f.cmd, f.pkt, dst, src)
+            p = self._pending.pop(key, None)
+            if p is None:
+                self.late_acks += 1
+                return
+            self._answered[key] = ts
+            if dst == self.controller:
+                m = self._module(src)
+                m.answered += 1
+                m.module_ack.record(ts - p[0])
+                m.module_rtt.record(ts - p[1])
+            else:
+                m = self._module(dst)
+                m.answered += 1
+                m.controller_ack.record(ts - p[0])
+        if ts >= self._next_expire:
+            self.expire(ts)
+
+    def expire(self, now: float) -> None:
+        """Count pending exchanges older than pending_timeout_s as unanswered."""
+
+        limit = now - self.pending_timeout_s
+        for key in [k for k, p in self._pending.items() if p[1] < limit]:
+            _cmd, _pkt, src, dst = key
+            self._module(dst if src == self.controller else src).unanswered += 1
+            del self._pending[key]
+        for key in [k for k, t in self._answered.items() if t < limit]:
+            del self._answered[key]
+        self._next_expire = now + 1.0
+
+    def report(self, duration_s: Optional[float] = None) -> dict[str, Any]:
+        if duration_s is None:
+            duration_s = (self.last_ts - self.first_ts) if self.first_ts is not None and self.last_ts is not None else 0.0
+        capacity = self.baud / _BITS_PER_BYTE
+        exchanges = sum(m.exchanges for m in self.modules.values())
+        retries = sum(m.retries for m in self.modules.values())
+        return {
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "bus_utilization_pct": (self.bytes / (capacity * duration_s) * 100.0) if duration_s > 0 else 0.0,
+            "bus_utilization_peak_pct": self.peak_bytes_per_s / capacity * 100.0,
+            "line_baud": self.baud,
+            "frame_gap_ms": self.gaps.summary_ms(),
+            "exchanges": exchanges,
+            "retries": retries,
+            "retry_rate": (retries / (exchanges + retries)) if exchanges + retries else 0.0,
+            "pending": len(self._pending),
+            "late_acks": self.late_acks,
+            "modules": {addr: m.report() for addr, m in sorted(self.modules.items())},
+        }
@@ -0,0 +1,350 @@
+"""
+Binary capture format (.hqc)
+
+  file    := HEADER block* [index TRAILER]
+  HEADER  := b"HQCAPv1\n"
+  block   := BLOCK_HDR zlib(record*)
+  BLOCK_HDR = "<4sddIII": b"HQBK", t_first, t_last, records, raw_len, zlen
+  record  := "<dBH": ts (unix s), direction (0 rx / 1 tx), len, frame body bytes
+  index   := zlib(JSON {src_dict, cmd_dict, blocks: [{off, t0, t1, n, src, cmd}]})
+  TRAILER = "<4sQ": b"HQIX", index offset
+
+`src`/`cmd` in the index are hex bitmaps over src_dict/cmd_dict ids, so a
+query only decompresses blocks that overlap its time range and contain a
+matching SRC and CMD. Files without a trailer (writer killed) are still
+readable: block headers are walked by seeking over their payloads.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import fnmatch
+import json
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional
+
+from .homiq_frame import Frame, frame_from_body
+
+
+FILE_MAGIC = b"HQCAPv1\n"
+BLOCK_MAGIC = b"HQBK"
+INDEX_MAGIC = b"HQIX"
+_BLOCK_HDR = struct.Struct("<4sddIII")
+_RECORD_HDR = struct.Struct("<dBH")
+_TRAILER = struct.Struct("<4sQ")
+
+DIR_RX = 0
+DIR_TX = 1
+
+CAPTURE_SUFFIX = ".hqc"
+
+
+class CaptureRecord(NamedTuple):
+    ts: float
+    direction: int
+    frame: Frame
+
+
+@dataclass
+class BlockInfo:
+    off: int
+    t0: float
+    t1: float
+    n: int
+    src_bits: int = -1  # -1 = unknown (no index): always a candidate
+    cmd_bits: int = -1
+
+
+class CaptureWriter:
+    """
+    Append frames to compressed, indexed capture files.
+
+    Records are buffered into blocks of up to `block_records` records or
+    `block_seconds` of traffic, each compressed with zlib. Files rotate when
+    they exceed `rotate_bytes` or are older than `rotate_seconds` (0 = off);
+    each closed file gets its index and trailer.
+    """
+
+    def __init__(
+        self,
+        out_dir: str | os.PathLike[str],
+        prefix: str = "homiq",
+        rotate_bytes: int = 64 * 1024 * 1024,
+        rotate_seconds: float = 3600.0,
+        block_records: int = 2048,
+        block_seconds: float = 10.0,
+        level: int = 6,
+    ) -> None:
+        self.out_dir = Path(out_dir)
+        self.prefix = prefix
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.block_records = block_records
+        self.block_seconds = block_seconds
+        self.level = level
+        self.files: list[Path] = []
+        self.records = 0
+        self._fh: Optional[BinaryIO] = None
+        self._opened_at = 0.0
+        self._reset_file_state()
+
+    def _reset_file_state(self) -> None:
+        self._src_ids: dict[str, int] = {}
+        self._cmd_ids: dict[str, int] = {}
+        self._blocks: list[dict[str, object]] = []
+        self._reset_block()
+
+    def _reset_block(self) -> None:
+        self._buf = bytearray()
+        self._n = 0
+        self._t0 = 0.0
+        self._t1 = 0.0
+        self._src_bits = 0
+        self._cmd_bits = 0
+
+    def _open(self, ts: float) -> BinaryIO:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = dt.datetime.fromtimestamp(ts).strftime("%Y%m%d-%H%M%S")
+        path = self.out_dir / f"{self.prefix}-{stamp}{CAPTURE_SUFFIX}"
+        i = 1
+        while path.exists():
+            path = self.out_dir / f"{self.prefix}-{stamp}-{i}{CAPTURE_SUFFIX}"
+            i += 1
+        fh = path.open("wb")
+        fh.write(FILE_MAGIC)
+        self._fh = fh
+        self._opened_at = ts
+        self.files.append(path)
+        return fh
+
+    def write(self, frame: Frame, ts: Optional[float] = None, direction: int = DIR_RX) -> None:
+        if ts is None:
+            ts = time.time()
+        fh = self._fh
+        if fh is None:
+            fh = self._open(ts)
+        elif (self.rotate_bytes and fh.tell() + len(self._buf) >= self.rotate_bytes) or (
+            self.rotate_seconds and ts - self._opened_at >= self.rotate_seconds
+        ):
+            self._close_file()
+            fh = self._open(ts)
+
+        if self._n and ts - self._t0 >= self.block_seconds:
+            self._flush_block()
+
+        body = frame.body
+        if not self._n:
+            self._t0 = ts
+        self._t1 = ts
+        self._n += 1
+        self._buf += _RECORD_HDR.pack(ts, direction, len(body))
+        self._buf += body
+
+        src = frame.src
+        sid = self._src_ids.get(src)
+        if sid is None:
+            sid = self._src_ids[src] = len(self._src_ids)
+        self._src_bits |= 1 << sid
+        cmd = frame.cmd
+        cid = self._cmd_ids.get(cmd)
+        if cid is None:
+            cid = self._cmd_ids[cmd] = len(self._cmd_ids)
+        self._cmd_bits |= 1 << cid
+
+        self.records += 1
+        if self._n >= self.block_records:
+            self._flush_block()
+
+    def _flush_block(self) -> None:
+        if not self._n or self._fh is None:
+            return
+        fh = self._fh
+        payload = zlib.compress(bytes(self._buf), self.level)
+        off = fh.tell()
+        fh.write(_BLOCK_HDR.pack(BLOCK_MAGIC, self._t0, self._t1, self._n, len(self._buf), len(payload)))
+        fh.write(payload)
+        self._blocks.append(
+            {
+                "off": off,
+                "t0": self._t0,
+                "t1": self._t1,
+                "n": self._n,
+                "src": format(self._src_bits, "x"),
+                "cmd": format(self._cmd_bits, "x"),
+            }
+        )
+        self._reset_block()
+
+    def flush(self) -> None:
+        """Write the open block (readable without the index) and flush."""
+
+        self._flush_block()
+        if self._fh is not None:
+            self._fh.flush()
+
+    def _close_file(self) -> None:
+        fh = self._fh
+        if fh is None:
+            return
+        self._flush_block()
+        index = {
+            "src_dict": sorted(self._src_ids, key=self._src_ids.__getitem__),
+            "cmd_dict": sorted(self._cmd_ids, key=self._cmd_ids.__getitem__),
+            "blocks": self._blocks,
+        }
+        off = fh.tell()
+        fh.write(zlib.compress(json.dumps(index, separators=(",", ":")).encode("utf-8")))
+        fh.write(_TRAILER.pack(INDEX_MAGIC, off))
+        fh.close()
+        self._fh = None
+        self._reset_file_state()
+
+    def close(self) -> None:
+        self._close_file()
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class CaptureReader:
+    """Indexed reader for one .hqc file."""
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = Path(path)
+        self.src_dict: list[str] = []
+        self.cmd_dict: list[str] = []
+        self.indexed = False
+        self.blocks_read = 0
+        with self.path.open("rb") as fh:
+            if fh.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                raise ValueError(f"not a Homiq capture file: {self.path}")
+            self.blocks = self._load_index(fh) or self._scan_blocks(fh)
+
+    def _load_index(self, fh: BinaryIO) -> Optional[list[BlockInfo]]:
+        size = fh.seek(0, os.SEEK_END)
+        if size < len(FILE_MAGIC) + _TRAILER.size:
+            return None
+        fh.seek(size - _TRAILER.size)
+        magic, off = _TRAILER.unpack(fh.read(_TRAILER.size))
+        if magic != INDEX_MAGIC or not (len(FILE_MAGIC) <= off < size):
+            return None
+        fh.seek(off)
+        try:
+            index = json.loads(zlib.decompress(fh.read(size - _TRAILER.size - off)))
+        except (zlib.error, ValueError):
+            return None
+        self.src_dict = list(index["src_dict"])
+        self.cmd_dict = list(index["cmd_dict"])
+        self.indexed = True
+        return [BlockInfo(b["off"], b["t0"], b["t1"], b["n"], int(b["src"], 16), int(b["cmd"], 16)) for b in index["blocks"]]
+
+    def _scan_blocks(self, fh: BinaryIO) -> list[BlockInfo]:
+        blocks: list[BlockInfo] = []
+        size = fh.seek(0, os.SEEK_END)
+        off = fh.seek(len(FILE_MAGIC))
+        while True:
+            hdr = fh.read(_BLOCK_HDR.size)
+            if len(hdr) < _BLOCK_HDR.size:
+                break
+            magic, t0, t1, n, _raw_len, zlen = _BLOCK_HDR.unpack(hdr)
+            if magic != BLOCK_MAGIC:
+                break
+            end = off + _BLOCK_HDR.size + zlen
+            if size < end:
+                break  # truncated last block
+            blocks.append(BlockInfo(off, t0, t1, n))
+            off = fh.seek(end)
+        return blocks
+
+    @property
+    def records(self) -> int:
+        return sum(b.n for b in self.blocks)
+
+    def time_range(self) -> tuple[Optional[float], Optional[float]]:
+        if not self.blocks:
+            return None, None
+        return min(b.t0 for b in self.blocks), max(b.t1 for b in self.blocks)
+
+    def _mask(self, values: list[str], pattern: Optional[str]) -> int:
+        if pattern is None or not self.indexed:
+            return -1
+        mask = 0
+        for i, v in enumerate(values):
+            if fnmatch.fnmatchcase(v, pattern):
+                mask |= 1 << i
+        return mask
+
+    def iter_records(
+        self,
+        t_from: Optional[float] = None,
+        t_to: Optional[float] = None,
+        src: Optional[str] = None,
+        cmd: Optional[str] = None,
+        direction: Optional[int] = None,
+    ) -> Iterator[CaptureRecord]:
+        """
+        Records in file order. `src`/`cmd` are exact values or fnmatch
+        patterns ("I.*"); time bounds are inclusive unix timestamps.
+        """
+
+        src_mask = self._mask(self.src_dict, src)
+        cmd_mask = self._mask(self.cmd_dict, cmd)
+        if not src_mask or not cmd_mask:
+            return
+        with self.path.open("rb") as fh:
+            for b in self.blocks:
+                if t_from is not None and b.t1 < t_from:
+                    continue
+                if t_to is not None and b.t0 > t_to:
+                    continue
+                if not (b.src_bits & src_mask) or not (b.cmd_bits & cmd_mask):
+                    continue
+                for rec in self._read_block(fh, b):
+                    if t_from is not None and rec.ts < t_from:
+                        continue
+                    if t_to is not None and rec.ts > t_to:
+                        continue
+                    if direction is not None and rec.direction != direction:
+                        continue
+                    f = rec.frame
+                    if src is not None and not fnmatch.fnmatchcase(f.src, src):
+                        continue
+                    if cmd is not None and not fnmatch.fnmatchcase(f.cmd, cmd):
+                        continue
+                    yield rec
+
+    def _read_block(self, fh: BinaryIO, b: BlockInfo) -> Iterator[CaptureRecord]:
+        fh.seek(b.off)
+        _magic, _t0, _t1, n, raw_len, zlen = _BLOCK_HDR.unpack(fh.read(_BLOCK_HDR.size))
+        raw = zlib.decompress(fh.read(zlen))
+        self.blocks_read += 1
+        pos = 0
+        unpack = _RECORD_HDR.unpack_from
+        hdr_size = _RECORD_HDR.size
+        for _ in range(n):
+            ts, direction, ln = unpack(raw, pos)
+            pos += hdr_size
+            f = frame_from_body(raw[pos : pos + ln])
+            pos += ln
+            if f is not None:
+                yield CaptureRecord(ts, direction, f)
+
+
+def capture_files(paths: Iterable[str | os.PathLike[str]]) -> list[Path]:
+    """Expand files/directories into .hqc files ordered by name (= time)."""
+
+    out: list[Path] = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            out.extend(sorted(p.glob(f"*{CAPTURE_SUFFIX}")))
+        else:
+            out.append(p)
+    return out
@@ -0,0 +1,322 @@
+"""
+SQLite time-series store for bus history: raw frames + per-minute rollups.
+
+Tables:
+
+  strings(id, s)          dictionary for SRC/DST/CMD values
+  frames(ts, dir, src, dst, cmd, val, pkt, top, crc_ok, retry)
+                          one row per frame; src/dst/cmd are string ids,
+                          dir 0 = rx / 1 = tx, top 0 = s / 1 = a
+  rollup_1m(minute, module, cmd, frames, sends, retries, acks, crc_bad)
+                          per minute (unix ts // 60), module and command;
+                          module = the side that is not the controller
+
+append() writes one batch in one transaction: new dictionary strings, an
+executemany into frames and an upsert-executemany into rollup_1m. The
+database runs in WAL mode, so queries (homiq_history.py) do not block the
+writer. A TOP=s frame is a retry when the same (SRC, DST, CMD, PKT) was
+seen within `retry_window_s` (the sender's full retry cycle), as in
+lib/bus_timing.py.
+
+Questions like "retry rate of module 0H last week" are answered from
+rollup_1m (at most 10080 rows per module and command per week), at minute
+granularity.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from .bus_timing import PENDING_TIMEOUT_S
+from .capture import DIR_TX
+from .homiq_frame import Frame
+
+
+STORE_FORMAT_VERSION = 1
+
+Record = tuple[float, int, Frame, bool]  # (ts, direction, frame, crc_ok)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS strings (id INTEGER PRIMARY KEY, s TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS frames (
+    ts REAL NOT NULL,
+    dir INTEGER NOT NULL,
+    src INTEGER NOT NULL,
+    dst INTEGER NOT NULL,
+    cmd INTEGER NOT NULL,
+    val TEXT NOT NULL,
+    pkt TEXT NOT NULL,
+    top INTEGER NOT NULL,
+    crc_ok INTEGER NOT NULL,
+    retry INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS frames_ts ON frames(ts);
+CREATE TABLE IF NOT EXISTS rollup_1m (
+    minute INTEGER NOT NULL,
+    module INTEGER NOT NULL,
+    cmd INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    sends INTEGER NOT NULL,
+    retries INTEGER NOT NULL,
+    acks INTEGER NOT NULL,
+    crc_bad INTEGER NOT NULL,
+    PRIMARY KEY (module, cmd, minute)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rollup_1m_minute ON rollup_1m(minute);
+"""
+
+_INSERT_FRAME = "INSERT INTO frames VALUES (?,?,?,?,?,?,?,?,?,?)"
+_UPSERT_ROLLUP = (
+    "INSERT INTO rollup_1m VALUES (?,?,?,?,?,?,?,?) "
+    "ON CONFLICT (module, cmd, minute) DO UPDATE SET "
+    "frames = frames + excluded.frames, sends = sends + excluded.sends, retries = retries + excluded.retries, "
+    "acks = acks + excluded.acks, crc_bad = crc_bad + excluded.crc_bad"
+)
+
+
+class FrameStore:
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        controller: str = "0",
+        retry_window_s: float = PENDING_TIMEOUT_S,
+        readonly: bool = False,
+    ) -> None:
+        self.path = Path(path)
+        self.controller = controller
+        self.retry_window_s = retry_window_s
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # may be created on one thread and written from a sink thread
+            self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('format_version', ?)", (str(STORE_FORMAT_VERSION),)
+            )
+            self.conn.commit()
+        self._ids: dict[str, int] = {s: i for i, s in self.conn.execute("SELECT id, s FROM strings")}
+        self._names: dict[int, str] = {i: s for s, i in self._ids.items()}
+        # (src, dst, cmd, pkt) of TOP=s frames → last ts, to flag retries
+        self._last_s: dict[tuple[str, str, str, str], float] = {}
+        self._prune_at = 0.0
+        self.rows = 0
+
+    # ---- writing -------------------------------------------------------
+
+    def _id(self, s: str, new: list[tuple[int, str]]) -> int:
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self._ids) + 1
+            self._names[i] = s
+            new.append((i, s))
+        return i
+
+    def append(self, records: Iterable[Record]) -> int:
+        """Store one batch of (ts, direction, frame, crc_ok); returns rows written."""
+
+        new: list[tuple[int, str]] = []
+        rows: list[tuple[Any, ...]] = []
+        roll: dict[tuple[int, int, int], list[int]] = {}
+        last_s = self._last_s
+        window = self.retry_window_s
+        controller = self.controller
+        ts = 0.0
+        for ts, d, f, ok in records:
+            src = self._id(f.src, new)
+            dst = self._id(f.dst, new)
+            cmd = self._id(f.cmd, new)
+            is_s = f.top == "s"
+            retry = 0
+            if is_s and ok:
+                key = (f.src, f.dst, f.cmd, f.pkt)
+                prev = last_s.get(key)
+                if prev is not None and ts - prev <= window:
+                    retry = 1
+                last_s[key] = ts
+            rows.append((ts, 1 if d == DIR_TX else 0, src, dst, cmd, f.val, f.pkt, 0 if is_s else 1, int(ok), retry))
+
+            module = dst if f.src == controller else src
+            k = (int(ts // 60), module, cmd)
+            r = roll.get(k)
+            if r is None:
+                r = roll[k] = [0, 0, 0, 0, 0]
+            r[0] += 1
+            if not ok:
+                r[4] += 1
+            elif not is_s:
+                r[3] += 1
+            elif retry:
+                r[2] += 1
+            else:
+                r[1] += 1
+        if not rows:
+            return 0
+        with self.conn:
+            if new:
+                self.conn.executemany("INSERT INTO strings VALUES (?,?)", new)
+            self.conn.executemany(_INSERT_FRAME, rows)
+            self.conn.executemany(_UPSERT_ROLLUP, [(m, mod, c, *v) for (m, mod, c), v in roll.items()])
+        self.rows += len(rows)
+        if ts >= self._prune_at:
+            limit = ts - window
+            for key in [k for k, t in last_s.items() if t < limit]:
+                del last_s[key]
+            self._prune_at = ts + 60.0
+        return len(rows)
+
+    # ---- queries -------------------------------------------------------
+
+    def _match_ids(self, pattern: Optional[str]) -> Optional[list[int]]:
+        """String ids matching an exact value or fnmatch pattern (None = no filter)."""
+
+        if pattern is None:
+            return None
+        if not any(ch in pattern for ch in "*?["):
+            i = self._ids.get(pattern)
+            return [] if i is None else [i]
+        return [i for s, i in self._ids.items() if fnmatch.fnmatchcase(s, pattern)]
+
+    def rollup(
+        self,
+        t_from: Optional[float] = None,
+        t_to: Optional[float] = None,
+        module: Optional[str] = None,
+        cmd: Optional[str] = None,
+        group_by: tuple[str, ...] = (),
+    ) -> list[dict[str, Any]]:
+        """
+        Summed rollups, optionally grouped by "module", "cmd" and/or "minute".
+        `module` / `cmd` are exact values or patterns ("I.*"). Time bounds
+        are rounded to whole minutes.
+        """
+
+        for g in group_by:
+            if g not in ("module", "cmd", "minute"):
+                raise ValueError(f"Unknown group {g!r}")
+        where: list[str] = []
+        params: list[Any] = []
+        if t_from is not None:
+            where.append("minute >= ?")
+            params.append(int(t_from // 60))
+        if t_to is not None:
+            where.append("minute <= ?")
+            params.append(int(t_to // 60))
+        for col, pattern in (("module", module), ("cmd", cmd)):
+            ids = self._match_ids(pattern)
+            if ids is not None:
+                if not ids:
+                    return []
+                where.append(f"{col} IN ({','.join('?' * len(ids))})")
+                params.extend(ids)
+        cols = ", ".join(group_by)
+        sql = (
+            f"SELECT {cols + ', ' if cols else ''}sum(frames), sum(sends), sum(retries), sum(acks), sum(crc_bad), "
+            "min(minute), max(minute) FROM rollup_1m"
+            + (f" WHERE {' AND '.join(where)}" if where else "")
+            + (f" GROUP BY {cols} ORDER BY {cols}" if cols else "")
+        )
+        out: list[dict[str, Any]] = []
+        names = self._names
+        for row in self.conn.execute(sql, params):
+            g = row[: len(group_by)]
+            frames, sends, retries, acks, crc_bad, m0, m1 = row[len(group_by):]
+            if frames is None:
+                continue
+            d: dict[str, Any] = {}
+            for name, v in zip(group_by, g):
+                d[name] = v * 60 if name == "minute" else names.get(v, str(v))
+            d.update(
+                frames=frames,
+                sends=sends,
+                retries=retries,
+                acks=acks,
+                crc_bad=crc_bad,
+                retry_rate=(retries / (sends + retries)) if sends + retries else 0.0,
+                first_ts=m0 * 60,
+                last_ts=m1 * 60 + 60,
+            )
+            out.append(d)
+        return out
+
+    def retry_rate(self, module: str, t_from: Optional[float] = None, t_to: Optional[float] = None, cmd: Optional[str] = None) -> dict[str, Any]:
+        rows = self.rollup(t_from, t_to, module=module, cmd=cmd)
+        if not rows:
+            return {"module": module, "frames": 0, "sends": 0, "retries": 0, "acks": 0, "crc_bad": 0, "retry_rate": 0.0}
+        return {"module": module, **rows[0]}
+
+    def frames(
+        self,
+        t_from: Optional[float] = None,
+        t_to: Optional[float] = None,
+        src: Optional[str] = None,
+        cmd: Optional[str] = None,
+        limit: int = 0,
+    ) -> Iterator[dict[str, Any]]:
+        """Raw frames in time order (filtered by SRC / CMD value or pattern)."""
+
+        where: list[str] = []
+        params: list[Any] = []
+        if t_from is not None:
+            where.append("ts >= ?")
+            params.append(t_from)
+        if t_to is not None:
+            where.append("ts < ?")
+            params.append(t_to)
+        for col, pattern in (("src", src), ("cmd", cmd)):
+            ids = self._match_ids(pattern)
+            if ids is not None:
+                if not ids:
+                    return
+                where.append(f"{col} IN ({','.join('?' * len(ids))})")
+                params.extend(ids)
+        sql = "SELECT ts, dir, src, dst, cmd, val, pkt, top, crc_ok, retry FROM frames"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        names = self._names
+        for ts, d, s, dd, c, val, pkt, top, ok, retry in self.conn.execute(sql, params):
+            yield {
+                "ts": ts,
+                "dir": "tx" if d else "rx",
+                "src": names[s],
+                "dst": names[dd],
+                "cmd": names[c],
+                "val": val,
+                "pkt": pkt,
+                "top": "a" if top else "s",
+                "crc_ok": bool(ok),
+                "retry": bool(retry),
+            }
+
+    def info(self) -> dict[str, Any]:
+        n, t0, t1 = self.conn.execute("SELECT count(*), min(ts), max(ts) FROM frames").fetchone()
+        (rollups,) = self.conn.execute("SELECT count(*) FROM rollup_1m").fetchone()
+        return {
+            "path": str(self.path),
+            "bytes": self.path.stat().st_size if self.path.exists() else 0,
+            "frames": n,
+            "rollup_rows": rollups,
+            "strings": len(self._ids),
+            "first_ts": t0,
+            "last_ts": t1,
+        }
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "FrameStore":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
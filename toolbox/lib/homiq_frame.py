@@ -1,25 +1,159 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Iterable, Literal, Optional
+from dataclasses import FrozenInstanceError
+from typing import Iterable, Literal, Optional, Sequence, Union
+
+try:  # optional: vectorized batch CRC
+    import numpy as _np
+except ImportError:  # pragma: no cover - depends on environment
+    _np = None
 
 
 Top = Literal["s", "a"]
+CrcInput = Union[str, bytes, bytearray, memoryview]
+ResyncPolicy = Literal["next_start", "drop"]
+
+
+FRAME_FIELDS = ("cmd", "val", "src", "dst", "pkt", "top", "crc")
+
+_SEP = 0x3B  # ';'
+
+
+def _pack_offsets(offs: list[int]) -> bytes | tuple[int, ...]:
+    # field end offsets fit in one byte each for any realistic frame
+    return bytes(offs) if offs[-1] < 256 else tuple(offs)
+
+
+def _field(index: int, doc: str) -> property:
+    def get(self: "Frame") -> str:
+        o = self._offs
+        start = o[index - 1] + 1 if index else 0
+        return self._raw[start : o[index]].decode("latin-1")
+
+    return property(get, doc=doc)
 
 
-@dataclass(frozen=True)
 class Frame:
-    cmd: str
-    val: str
-    src: str
-    dst: str
-    pkt: str
-    top: Top
-    crc: str
+    """
+    Immutable Homiq frame backed by its wire body bytes.
+
+    Only two slots are stored: the body `CMD;VAL;SRC;DST;PKT;TOP;CRC` as bytes
+    and the end offset of each field. Field attributes (`cmd`, `val`, ...)
+    decode to `str` on access; CRC checks run on the bytes directly.
+    Construction, equality, hashing and repr behave like the former frozen
+    dataclass; use `to_dict()` instead of `dataclasses.asdict()`.
+    """
+
+    __slots__ = ("_raw", "_offs")
+
+    _raw: bytes
+    _offs: bytes | tuple[int, ...]
+
+    def __init__(self, cmd: str, val: str, src: str, dst: str, pkt: str, top: Top, crc: str) -> None:
+        try:
+            parts = [p.encode("latin-1") for p in (cmd, val, src, dst, pkt, top, crc)]
+        except UnicodeEncodeError as e:
+            raise ValueError("Frame fields must be latin-1 text") from e
+        offs: list[int] = []
+        pos = -1
+        for b in parts:
+            pos += len(b) + 1
+            offs.append(pos)
+        object.__setattr__(self, "_raw", b";".join(parts))
+        object.__setattr__(self, "_offs", _pack_offsets(offs))
+
+    @classmethod
+    def _from_parts(cls, raw: bytes, offs: bytes | tuple[int, ...]) -> "Frame":
+        f = object.__new__(cls)
+        object.__setattr__(f, "_raw", raw)
+        object.__setattr__(f, "_offs", offs)
+        return f
+
+    cmd = _field(0, "Command, e.g. O.3")
+    val = _field(1, "Value, e.g. 0/1 or u/d/s")
+    src = _field(2, "Source address")
+    dst = _field(3, "Destination address")
+    pkt = _field(4, "Packet id (ID), ASCII decimal")
+    top = _field(5, "Frame type (TYPE): s or a")
+    crc = _field(6, "CRC as ASCII decimal")
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+    def __reduce__(self) -> tuple[object, ...]:
+        return (Frame._from_parts, (self._raw, self._offs))
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._raw == other._raw and self._offs == other._offs  # type: ignore[attr-defined]
+
+    def __hash__(self) -> int:
+        return hash(self._raw)
+
+    def __repr__(self) -> str:
+        inner = ", ".join(f"{name}={getattr(self, name)!r}" for name in FRAME_FIELDS)
+        return f"Frame({inner})"
+
+    @property
+    def body(self) -> bytes:
+        """Wire body without the `<;`/`;>` markers (no copy)."""
+        return self._raw
+
+    def field_view(self, name: str) -> memoryview:
+        """Zero-copy view of one field's bytes."""
+        index = FRAME_FIELDS.index(name)
+        o = self._offs
+        start = o[index - 1] + 1 if index else 0
+        return memoryview(self._raw)[start : o[index]]
+
+    def to_dict(self) -> dict[str, str]:
+        return {name: getattr(self, name) for name in FRAME_FIELDS}
+
+    def to_wire(self) -> bytes:
+        return b"<;" + self._raw + b";>\r\n"
 
     def crc_payload(self) -> str:
         return f"{self.cmd}{self.val}{self.src}{self.dst}{self.pkt}{self.top}"
 
+    def crc_payload_bytes(self) -> bytes:
+        raw = self._raw
+        o = self._offs
+        end = o[5]
+        if raw.count(b";", 0, end) == 5:
+            return raw[:end].replace(b";", b"")
+        # a field itself contains ';' (only possible via the constructor)
+        return b"".join(raw[(o[i - 1] + 1 if i else 0) : o[i]] for i in range(6))
+
+    def crc_ok(self) -> bool:
+        o = self._offs
+        try:
+            got = int(self._raw[o[5] + 1 : o[6]], 10) & 0xFF
+        except ValueError:
+            return False
+        return got == crc8_table(self.crc_payload_bytes())
+
+
+def frame_from_body(body: bytes) -> Optional[Frame]:
+    offs: list[int] = []
+    start = 0
+    for _ in range(6):
+        i = body.find(b";", start)
+        if i < 0:
+            return None
+        offs.append(i)
+        start = i + 1
+    i = body.find(b";", start)
+    end = len(body) if i < 0 else i
+    offs.append(end)
+    # TOP must be exactly "s" or "a"
+    if offs[5] - offs[4] != 2 or body[offs[4] + 1] not in (0x73, 0x61):
+        return None
+    return Frame._from_parts(body if end == len(body) else body[:end], _pack_offsets(offs))
+
 
 def crc8_homiq_lsb_poly18(payload: str) -> int:
     """
@@ -59,18 +193,92 @@ def crc8_maxim_1wire(payload: str) -> int:
     return crc & 0xFF
 
 
+def _build_crc8_table() -> tuple[int, ...]:
+    # Reflected CRC: one table step per input byte is crc = T[crc ^ byte].
+    return tuple(crc8_maxim_1wire(chr(i)) for i in range(256))
+
+
+CRC8_TABLE: tuple[int, ...] = _build_crc8_table()
+
+
+def _crc_bytes(payload: CrcInput) -> bytes | bytearray | memoryview:
+    if isinstance(payload, str):
+        try:
+            return payload.encode("latin-1")
+        except UnicodeEncodeError:
+            # keep the reference semantics (ord(ch) & 0xFF) for non-latin input
+            return bytes(ord(ch) & 0xFF for ch in payload)
+    return payload
+
+
+def crc8_table(payload: CrcInput) -> int:
+    """
+    Table-driven CRC-8/Maxim. Same result as crc8_homiq_lsb_poly18() and
+    crc8_maxim_1wire() (which stay as reference oracles), one lookup per byte.
+    Accepts str, bytes, bytearray or memoryview.
+    """
+
+    tbl = CRC8_TABLE
+    crc = 0
+    for b in _crc_bytes(payload):
+        crc = tbl[crc ^ b]
+    return crc
+
+
+def crc8_batch(payloads: Sequence[CrcInput], use_numpy: Optional[bool] = None) -> list[int]:
+    """
+    CRC for many payloads at once.
+
+    With NumPy the payloads are left-padded with zero bytes into one matrix and
+    the table step runs column by column over all rows. With init=0 a leading
+    zero byte keeps the CRC at 0, so padding does not change the result.
+    Without NumPy (or with use_numpy=False) it falls back to crc8_table().
+    """
+
+    if use_numpy is None:
+        use_numpy = _np is not None
+    if not use_numpy or not payloads:
+        return [crc8_table(p) for p in payloads]
+    if _np is None:
+        raise RuntimeError("NumPy is not installed")
+
+    datas = [bytes(_crc_bytes(p)) for p in payloads]
+    width = max(len(d) for d in datas)
+    if width == 0:
+        return [0] * len(datas)
+    mat = _np.zeros((len(datas), width), dtype=_np.uint8)
+    for row, d in enumerate(datas):
+        if d:
+            mat[row, width - len(d) :] = _np.frombuffer(d, dtype=_np.uint8)
+
+    tbl = _np.asarray(CRC8_TABLE, dtype=_np.uint8)
+    crc = _np.zeros(len(datas), dtype=_np.uint8)
+    for col in range(width):
+        crc = tbl[crc ^ mat[:, col]]
+    return [int(c) for c in crc]
+
+
 def decode_frame(raw: str) -> Optional[Frame]:
     t = raw.strip()
     if not (t.startswith("<;") and t.endswith(";>")):
         return None
-    body = t[2:-2]
-    parts = body.split(";")
-    if len(parts) < 7:
+    try:
+        body = t[2:-2].encode("latin-1")
+    except UnicodeEncodeError:
         return None
-    cmd, val, src, dst, pkt, top, crc = parts[:7]
-    if top not in ("s", "a"):
+    return frame_from_body(body)
+
+
+def decode_frame_bytes(raw: bytes | bytearray | memoryview) -> Optional[Frame]:
+    """Bytes counterpart of decode_frame(); non-ASCII bytes are dropped."""
+
+    t = bytes(raw).strip()
+    if not (t.startswith(b"<;") and t.endswith(b";>")):
         return None
-    return Frame(cmd=cmd, val=val, src=src, dst=dst, pkt=pkt, top=top, crc=crc)
+    body = t[2:-2]
+    if not body.isascii():
+        body = body.decode("ascii", errors="ignore").encode("ascii")
+    return frame_from_body(body)
 
 
 def encode_frame(cmd: str, val: str, src: str, dst: str, pkt: str, top: Top, crc_dec: int) -> str:
@@ -79,16 +287,26 @@ def encode_frame(cmd: str, val: str, src: str, dst: str, pkt: str, top: Top, crc
 
 def compute_crc_dec(cmd: str, val: str, src: str, dst: str, pkt: str, top: Top) -> int:
     payload = f"{cmd}{val}{src}{dst}{pkt}{top}"
-    return crc8_homiq_lsb_poly18(payload)
+    return crc8_table(payload)
 
 
 def validate_crc(frame: Frame) -> bool:
-    try:
-        got = int(frame.crc, 10) & 0xFF
-    except ValueError:
-        return False
-    exp = compute_crc_dec(frame.cmd, frame.val, frame.src, frame.dst, frame.pkt, frame.top) & 0xFF
-    return got == exp
+    return frame.crc_ok()
+
+
+def validate_crc_batch(frames: Sequence[Frame], use_numpy: Optional[bool] = None) -> list[bool]:
+    """Vectorized validate_crc() for a list of frames (see crc8_batch)."""
+
+    crcs = crc8_batch([f.crc_payload_bytes() for f in frames], use_numpy=use_numpy)
+    out: list[bool] = []
+    for f, exp in zip(frames, crcs):
+        try:
+            got = int(f.field_view("crc").tobytes(), 10) & 0xFF
+        except ValueError:
+            out.append(False)
+            continue
+        out.append(got == exp)
+    return out
 
 
 def make_ack(req: Frame) -> str:
@@ -96,28 +314,116 @@ def make_ack(req: Frame) -> str:
     return encode_frame(req.cmd, req.val, "0", req.src, req.pkt, "a", crc)
 
 
+def make_ack_frame(req: Frame) -> Frame:
+    """make_ack() as a Frame (`.to_wire()` gives the same bytes), for callers that also log the ACK."""
+
+    crc = compute_crc_dec(req.cmd, req.val, "0", req.src, req.pkt, "a")
+    return Frame(req.cmd, req.val, "0", req.src, req.pkt, "a", str(crc))
+
+
 class FrameStreamParser:
-    def __init__(self) -> None:
-        self._buf = ""
+    """
+    Incremental frame splitter for a raw byte stream.
+
+    Works on a bytearray with a read cursor: frames are cut out by index and
+    the consumed prefix is removed once per push(). Bytes outside frames are
+    dropped immediately (CR/LF separators are not counted as garbage). If an
+    unterminated frame grows the buffer past `max_buffer`, the parser resyncs:
+      - "next_start": skip to the nearest later "<;" that fits in the cap
+      - "drop": discard the whole pending buffer
+    """
+
+    def __init__(self, max_buffer: int = 4096, resync: ResyncPolicy = "next_start") -> None:
+        if resync not in ("next_start", "drop"):
+            raise ValueError(f"Unknown resync policy: {resync!r}")
+        if max_buffer < 2:
+            raise ValueError("max_buffer must be >= 2")
+        self._buf = bytearray()
+        self.max_buffer = max_buffer
+        self.resync = resync
+        self.frames = 0
+        self.bad_frames = 0
+        self.garbage_bytes = 0
+        self.dropped_bytes = 0
+        self.resyncs = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._buf)
 
-    def push(self, chunk: bytes | str) -> list[Frame]:
-        if isinstance(chunk, bytes):
-            self._buf += chunk.decode("ascii", errors="ignore")
-        else:
-            self._buf += chunk
+    def stats(self) -> dict[str, int]:
+        return {
+            "frames": self.frames,
+            "bad_frames": self.bad_frames,
+            "garbage_bytes": self.garbage_bytes,
+            "dropped_bytes": self.dropped_bytes,
+            "resyncs": self.resyncs,
+            "pending_bytes": len(self._buf),
+        }
+
+    def reset(self) -> None:
+        """Forget pending bytes (e.g. after a reconnect); counters are kept."""
+        self.dropped_bytes += len(self._buf)
+        self._buf.clear()
+
+    def _count_garbage(self, start: int, stop: int) -> None:
+        if stop <= start:
+            return
+        buf = self._buf
+        self.garbage_bytes += (stop - start) - buf.count(b"\r", start, stop) - buf.count(b"\n", start, stop)
+
+    def push(self, chunk: bytes | bytearray | memoryview | str) -> list[Frame]:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        buf = self._buf
+        buf += chunk
 
         out: list[Frame] = []
-        while True:
-            begin = self._buf.find("<;")
-            if begin < 0:
-                break
-            end = self._buf.find(";>", begin)
-            if end < 0:
-                break
-            raw = self._buf[begin : end + 2]
-            self._buf = self._buf[end + 2 :]
-            f = decode_frame(raw)
-            if f is not None:
+        pos = 0
+        n = len(buf)
+        view = memoryview(buf)
+        try:
+            while True:
+                begin = buf.find(b"<;", pos)
+                if begin < 0:
+                    # keep a trailing '<' that may become "<;" with the next chunk
+                    keep = n - 1 if n > pos and buf[n - 1] == 0x3C else n
+                    self._count_garbage(pos, keep)
+                    pos = keep
+                    break
+                self._count_garbage(pos, begin)
+                end = buf.find(b";>", begin)
+                if end < 0:
+                    pos = begin
+                    break
+                pos = end + 2
+                body = view[begin + 2 : end].tobytes()
+                if not body.isascii():
+                    body = body.decode("ascii", errors="ignore").encode("ascii")
+                f = frame_from_body(body)
+                if f is None:
+                    self.bad_frames += 1
+                    continue
+                self.frames += 1
                 out.append(f)
+        finally:
+            view.release()
+
+        if pos:
+            del buf[:pos]
+        if len(buf) > self.max_buffer:
+            self._resync()
         return out
 
+    def _resync(self) -> None:
+        buf = self._buf
+        self.resyncs += 1
+        cut = len(buf)
+        if self.resync == "next_start":
+            i = buf.find(b"<;", 1)
+            while i >= 0 and len(buf) - i > self.max_buffer:
+                i = buf.find(b"<;", i + 2)
+            if i >= 0:
+                cut = i
+        self.dropped_bytes += cut
+        del buf[:cut]
@@ -0,0 +1,156 @@
+"""
+Active load probe: how many commands per second a master/module answers
+before ACKs start to go missing.
+
+run_probe() sends one harmless command (heartbeat `HB;1` by default, or
+the current value of an output, e.g. `O.3;1`) to one module at increasing
+rates. Each step runs for `step_s` seconds through a PipelinedSender and
+records ACK success, first-try success and ACK latency. A step is
+saturated when fewer than `min_success` of the commands are ACKed (or
+ACKed on the first try), or when the p95 latency grows past
+`latency_factor` times the first step's. The probe stops after the first
+saturated step, so the bus is overloaded for at most one step.
+
+    rep = await run_probe(t, "0H", rates=[1, 2, 5, 10, 20])
+    rep["knee_rate_hz"]  # highest rate that was not saturated
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
+
+from .aio_transports import AsyncTransport
+from .bus_timing import LatencyHistogram
+from .sender import MAX_TRIES, RETRY_INTERVAL_S, PipelinedSender, SendResult
+
+
+DEFAULT_RATES: tuple[float, ...] = (1.0, 2.0, 5.0, 10.0, 20.0, 50.0)
+
+
+@dataclass
+class ProbeStep:
+    rate_hz: float
+    duration_s: float = 0.0
+    sent: int = 0
+    acked: int = 0
+    first_try: int = 0
+    retries: int = 0
+    failed: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    saturated: bool = False
+
+    def add(self, r: SendResult) -> None:
+        self.sent += 1
+        self.retries += r.tries - 1
+        if r.ok:
+            self.acked += 1
+            if r.tries == 1:
+                self.first_try += 1
+            if r.latency_s is not None:
+                self.latency.record(r.latency_s)
+        else:
+            self.failed += 1
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "rate_hz": self.rate_hz,
+            "achieved_hz": (self.sent / self.duration_s) if self.duration_s > 0 else 0.0,
+            "sent": self.sent,
+            "acked": self.acked,
+            "failed": self.failed,
+            "retries": self.retries,
+            "success_rate": (self.acked / self.sent) if self.sent else 0.0,
+            "first_try_rate": (self.first_try / self.sent) if self.sent else 0.0,
+            "latency_ms": self.latency.summary_ms(),
+            "saturated": self.saturated,
+        }
+
+
+async def _run_step(sender: PipelinedSender, dst: str, cmd: str, val: str, rate_hz: float, step_s: float) -> ProbeStep:
+    step = ProbeStep(rate_hz)
+    loop = asyncio.get_running_loop()
+    interval = 1.0 / rate_hz
+    n = max(1, int(round(step_s * rate_hz)))
+    tasks: list[asyncio.Task[SendResult]] = []
+    t0 = loop.time()
+    for i in range(n):
+        delay = t0 + i * interval - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(sender.send(dst, cmd, val)))
+    # the step owns its whole time slot: the next one starts at the same pace
+    delay = t0 + n * interval - loop.time()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    step.duration_s = loop.time() - t0
+    for r in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(r, SendResult):
+            step.add(r)
+        elif isinstance(r, (ConnectionError, OSError)):
+            raise r
+    return step
+
+
+async def run_probe(
+    transport: AsyncTransport,
+    dst: str,
+    cmd: str = "HB",
+    val: str = "1",
+    rates: Iterable[float] = DEFAULT_RATES,
+    step_s: float = 5.0,
+    src: str = "0",
+    retry_interval_s: float = RETRY_INTERVAL_S,
+    max_tries: int = MAX_TRIES,
+    max_inflight: int = 64,
+    auto_ack: bool = False,
+    min_success: float = 0.99,
+    latency_factor: float = 3.0,
+    latency_floor_s: float = 0.02,
+    on_step: Optional[Callable[[ProbeStep], None]] = None,
+) -> dict[str, Any]:
+    """
+    Probe `dst` with `cmd;val` at each rate (commands/s) in turn.
+
+    A p95 latency below `latency_floor_s` never counts as saturation (local
+    links have sub-ms jitter). With `auto_ack`, TOP=s frames from modules are
+    ACKed during the probe so they do not retry on top of the load.
+    """
+
+    steps: list[ProbeStep] = []
+    base_p95: Optional[float] = None
+    async with PipelinedSender(transport, src=src, retry_interval_s=retry_interval_s, max_tries=max_tries, max_inflight=max_inflight, auto_ack=auto_ack) as sender:
+        for rate in rates:
+            if rate <= 0:
+                raise ValueError(f"rate must be > 0, got {rate}")
+            step = await _run_step(sender, dst, cmd, val, rate, step_s)
+            steps.append(step)
+            p95 = step.latency.percentile(0.95)
+            if base_p95 is None and step.acked:
+                base_p95 = p95
+            n = step.sent
+            step.saturated = (
+                step.acked < min_success * n
+                or step.first_try < min_success * n
+                or (base_p95 is not None and p95 > latency_floor_s and p95 > latency_factor * base_p95)
+            )
+            if on_step is not None:
+                on_step(step)
+            if step.saturated:
+                break
+
+    knee: Optional[float] = None
+    saturated_at: Optional[float] = None
+    for step in steps:
+        if step.saturated:
+            saturated_at = step.rate_hz
+            break
+        knee = step.rate_hz
+    return {
+        "target": {"dst": dst, "cmd": cmd, "val": val},
+        "step_s": step_s,
+        "knee_rate_hz": knee,
+        "saturated_at_hz": saturated_at,
+        "steps": [s.report() for s in steps],
+    }
@@ -0,0 +1,207 @@
+"""
+Bus metrics in OpenMetrics text format, served over HTTP for Prometheus.
+
+BusMetrics.observe() is called for every frame. Label cardinality is fixed
+up front: the first `top_src` SRC and `top_cmd` CMD values with a valid CRC
+get their own series (a bus has a fixed set of modules and commands, so
+these are its top values), everything else is counted as "other". Each
+(src, cmd, top) counter is a slot in one preallocated array, so the number
+of series never grows with traffic.
+
+Per-frame cost of observe(): decoding the frame's SRC and CMD fields to str
+for two dict lookups, an array increment, and BusTiming.observe() for the
+valid frames. That one builds a (CMD, PKT, SRC, DST) tuple key per frame,
+and keeps a 3-item list in its pending map per TOP=s exchange (an entry in
+its answered map after the ACK) until the exchange expires.
+
+ACK latency and retries come from a BusTiming (lib/bus_timing.py); parser
+resyncs / garbage bytes from the FrameStreamParser passed as `parser`.
+
+    metrics = BusMetrics(parser=parser)
+    server = MetricsHTTPServer(metrics, "127.0.0.1", 9109)
+    ...
+    metrics.observe(f, crc_ok, time.monotonic())
+"""
+
+from __future__ import annotations
+
+import threading
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+from .bus_timing import BusTiming, LatencyHistogram
+from .homiq_frame import Frame, FrameStreamParser
+
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+OTHER = "other"
+TOPS: tuple[str, ...] = ("s", "a")
+# Prometheus histogram bounds for ACK latency (seconds)
+LATENCY_BUCKETS_S: tuple[float, ...] = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+
+# wire = "<;" + body + ";>\r\n"
+_WIRE_OVERHEAD = 6
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Labels:
+    """Value → slot index for the first `limit` values; slot 0 is "other"."""
+
+    __slots__ = ("limit", "index", "names")
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.index: dict[str, int] = {}
+        self.names: list[str] = [OTHER]
+
+    def slot(self, value: str, admit: bool) -> int:
+        i = self.index.get(value)
+        if i is not None:
+            return i
+        if not admit or len(self.names) > self.limit:
+            return 0
+        i = self.index[value] = len(self.names)
+        self.names.append(value)
+        return i
+
+
+class BusMetrics:
+    def __init__(
+        self,
+        top_src: int = 64,
+        top_cmd: int = 32,
+        controller: str = "0",
+        parser: Optional[FrameStreamParser] = None,
+        timing: Optional[BusTiming] = None,
+    ) -> None:
+        self.parser = parser
+        self.timing = timing if timing is not None else BusTiming(controller=controller)
+        self._src = _Labels(top_src)
+        self._cmd = _Labels(top_cmd)
+        self._n_cmd = top_cmd + 1
+        self._frames = array("q", bytes(8 * (top_src + 1) * (top_cmd + 1) * len(TOPS)))
+        self.crc_bad = 0
+        self.bytes = 0
+        self.acks_sent = 0
+        self.reconnects = 0
+
+    def observe(self, f: Frame, crc_ok: bool, ts: float) -> None:
+        """Count one frame (received or sent by us, e.g. an ACK)."""
+
+        s = self._src.slot(f.src, crc_ok)
+        c = self._cmd.slot(f.cmd, crc_ok)
+        self._frames[((s * self._n_cmd) + c) * 2 + (f.top == "a")] += 1
+        self.bytes += len(f.body) + _WIRE_OVERHEAD
+        if not crc_ok:
+            self.crc_bad += 1
+            return
+        self.timing.observe(f, ts)
+
+    def render(self) -> str:
+        """The OpenMetrics exposition (safe to call from another thread)."""
+
+        lines: list[str] = []
+        add = lines.append
+
+        add("# TYPE homiq_frames counter")
+        add("# HELP homiq_frames Frames on the bus by SRC, CMD and TOP (top-N, rest as other).")
+        srcs = list(self._src.names)
+        cmds = list(self._cmd.names)
+        frames = self._frames
+        n_cmd = self._n_cmd
+        for si, src in enumerate(srcs):
+            for ci, cmd in enumerate(cmds):
+                base = ((si * n_cmd) + ci) * 2
+                for ti, top in enumerate(TOPS):
+                    n = frames[base + ti]
+                    if n:
+                        add(f'homiq_frames_total{{src="{_escape(src)}",cmd="{_escape(cmd)}",top="{top}"}} {n}')
+
+        def counter(name: str, help_: str, value: int) -> None:
+            add(f"# TYPE {name} counter")
+            add(f"# HELP {name} {help_}")
+            add(f"{name}_total {value}")
+
+        counter("homiq_bytes", "Bytes of frames on the wire.", self.bytes)
+        counter("homiq_crc_failures", "Frames with a CRC mismatch.", self.crc_bad)
+        counter("homiq_acks_sent", "ACKs sent by this process.", self.acks_sent)
+        counter("homiq_transport_reconnects", "Transport reconnects after a lost link.", self.reconnects)
+        if self.parser is not None:
+            st = self.parser.stats()
+            counter("homiq_parser_resyncs", "Stream parser buffer resyncs.", st["resyncs"])
+            counter("homiq_parser_garbage_bytes", "Bytes outside frames skipped by the parser.", st["garbage_bytes"] + st["dropped_bytes"])
+            counter("homiq_parser_bad_frames", "Undecodable frames.", st["bad_frames"])
+
+        modules = list(self.timing.modules.values())
+        counter("homiq_exchanges", "Distinct TOP=s frames (first transmissions).", sum(m.exchanges for m in modules))
+        counter("homiq_retries", "Repeated TOP=s frames (same CMD, PKT, SRC, DST).", sum(m.retries for m in modules))
+        counter("homiq_unanswered", "TOP=s frames never ACKed within the retry cycle.", sum(m.unanswered for m in modules))
+
+        add("# TYPE homiq_ack_latency_seconds histogram")
+        add("# HELP homiq_ack_latency_seconds First TOP=s transmission to its ACK; kind=module (module answered the controller) or controller.")
+        for kind, attr in (("module", "module_ack"), ("controller", "controller_ack")):
+            cum = [0] * len(LATENCY_BUCKETS_S)
+            count = 0
+            total = 0.0
+            for m in modules:
+                h: LatencyHistogram = getattr(m, attr)
+                if not h.count:
+                    continue
+                for i, n in enumerate(h.cumulative(LATENCY_BUCKETS_S)):
+                    cum[i] += n
+                count += h.count
+                total += h.total_s
+            for b, n in zip(LATENCY_BUCKETS_S, cum):
+                add(f'homiq_ack_latency_seconds_bucket{{kind="{kind}",le="{b:g}"}} {n}')
+            add(f'homiq_ack_latency_seconds_bucket{{kind="{kind}",le="+Inf"}} {count}')
+            add(f'homiq_ack_latency_seconds_count{{kind="{kind}"}} {count}')
+            add(f'homiq_ack_latency_seconds_sum{{kind="{kind}"}} {total:.6f}')
+
+        add("# TYPE homiq_label_slots gauge")
+        add("# HELP homiq_label_slots Label values with their own series (cardinality cap in use).")
+        add(f'homiq_label_slots{{label="src"}} {len(srcs) - 1}')
+        add(f'homiq_label_slots{{label="cmd"}} {len(cmds) - 1}')
+        add("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    metrics: BusMetrics
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class MetricsHTTPServer:
+    """Serve `metrics.render()` on http://HOST:PORT/metrics from a daemon thread."""
+
+    def __init__(self, metrics: BusMetrics, host: str = "127.0.0.1", port: int = 9109) -> None:
+        handler = type("Handler", (_Handler,), {"metrics": metrics})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="homiq-metrics", daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self) -> int:
+        return int(self.httpd.server_address[1])
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._thread.join(timeout=1.0)
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from .capture import CAPTURE_SUFFIX, DIR_RX, CaptureReader, capture_files
+from .homiq_frame import Frame, FrameStreamParser, compute_crc_dec, encode_frame
+from .sender import MAX_TRIES, NO_RETRY_CMDS, RETRY_INTERVAL_S
+
+
+@dataclass
+class ReplayItem:
+    ts: Optional[float]  # None for JSON lines without "ts" (homiq_sniff --json)
+    frame: Frame
+
+
+def iter_jsonl(path: str | os.PathLike[str]) -> Iterator[ReplayItem]:
+    """
+    Frames from `homiq_sniff.py --json` / `homiq_capture.py query --json`.
+    Lines with "dir": "tx" (our own ACKs) and non-frame lines are skipped.
+    """
+
+    with Path(path).open("r", encoding="utf-8", errors="ignore") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line.startswith("{"):
+                continue
+            try:
+                o = json.loads(line)
+                if o.get("dir", "rx") != "rx":
+                    continue
+                f = Frame(o["cmd"], o["val"], o["src"], o["dst"], o["pkt"], o["top"], o["crc"])
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue
+            ts = o.get("ts")
+            yield ReplayItem(float(ts) if isinstance(ts, (int, float)) else None, f)
+
+
+def iter_capture(paths: Iterable[str | os.PathLike[str]]) -> Iterator[ReplayItem]:
+    for p in capture_files(paths):
+        for rec in CaptureReader(p).iter_records(direction=DIR_RX):
+            yield ReplayItem(rec.ts, rec.frame)
+
+
+def iter_recording(paths: Iterable[str | os.PathLike[str]]) -> Iterator[ReplayItem]:
+    """Binary captures (files/dirs) and JSON-lines files, in the given order."""
+
+    for p in map(Path, paths):
+        if p.is_dir() or p.suffix == CAPTURE_SUFFIX:
+            yield from iter_capture([p])
+        else:
+            yield from iter_jsonl(p)
+
+
+def _pct(sorted_vals: list[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+
+@dataclass
+class ReplayStats:
+    frames_sent: int = 0
+    bytes_sent: int = 0
+    retries_sent: int = 0
+    acked: int = 0
+    unacked: int = 0
+    client_frames: int = 0
+    client_commands_acked: int = 0
+    client_commands_dropped: int = 0
+    started: float = 0.0
+    finished: float = 0.0
+    ack_latencies_s: list[float] = field(default_factory=list)
+
+    def report(self) -> dict[str, Any]:
+        dur = max((self.finished or time.monotonic()) - self.started, 1e-9)
+        lat = sorted(self.ack_latencies_s)
+        return {
+            "duration_s": dur,
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "frames_per_s": self.frames_sent / dur,
+            "bytes_per_s": self.bytes_sent / dur,
+            "retries_sent": self.retries_sent,
+            "acked": self.acked,
+            "unacked": self.unacked,
+            "client_frames": self.client_frames,
+            "client_commands_acked": self.client_commands_acked,
+            "client_commands_dropped": self.client_commands_dropped,
+            "ack_latency_ms": {
+                "p50": _pct(lat, 0.50) * 1000.0,
+                "p95": _pct(lat, 0.95) * 1000.0,
+                "p99": _pct(lat, 0.99) * 1000.0,
+                "max": (lat[-1] if lat else 0.0) * 1000.0,
+            },
+        }
+
+
+class ReplaySession:
+    """
+    One client connection: stream the recording, emulate module retries for
+    unACKed TOP=s frames and ACK the client's own commands like a module.
+
+    With `ack_rate`, at most that many client commands per second are ACKed
+    (token bucket, burst of one); the rest are ignored, like a saturated
+    master, so the client has to retry.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[ReplayItem],
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        speed: float = 1.0,
+        default_interval_s: float = 0.01,
+        retry: bool = True,
+        retry_interval_s: float = RETRY_INTERVAL_S,
+        max_tries: int = MAX_TRIES,
+        ack_commands: bool = True,
+        ack_delay_s: float = 0.0,
+        ack_rate: float = 0.0,
+    ) -> None:
+        self.items = items
+        self.reader = reader
+        self.writer = writer
+        self.speed = speed
+        self.default_interval_s = default_interval_s
+        self.retry = retry
+        self.retry_interval_s = retry_interval_s
+        self.max_tries = max_tries
+        self.ack_commands = ack_commands
+        self.ack_delay_s = ack_delay_s
+        self.ack_rate = ack_rate
+        self._tokens = 1.0
+        self._tokens_at = 0.0
+        self.stats = ReplayStats()
+        # (module src, cmd, pkt) -> [first_sent, tries, retry timer]
+        self._pending: dict[tuple[str, str, str], list[Any]] = {}
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def _write(self, data: bytes) -> None:
+        if not self.writer.is_closing():
+            self.writer.write(data)
+
+    async def run(self) -> ReplayStats:
+        st = self.stats
+        st.started = time.monotonic()
+        rx = asyncio.create_task(self._read_client())
+        try:
+            await self._play()
+            await self._idle.wait()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            for entry in self._pending.values():
+                entry[2].cancel()
+            st.unacked += len(self._pending)
+            self._pending.clear()
+            st.finished = time.monotonic()
+            rx.cancel()
+            await asyncio.gather(rx, return_exceptions=True)
+            self.writer.close()
+        return st
+
+    async def _play(self) -> None:
+        st = self.stats
+        loop = asyncio.get_running_loop()
+        t_start = loop.time()
+        ts0: Optional[float] = None
+        offset = 0.0
+        for item in self.items:
+            if self.speed > 0:
+                if item.ts is not None:
+                    if ts0 is None:
+                        ts0 = item.ts
+                    offset = item.ts - ts0
+                else:
+                    offset += self.default_interval_s
+                delay = t_start + offset / self.speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            wire = item.frame.to_wire()
+            self._write(wire)
+            st.frames_sent += 1
+            st.bytes_sent += len(wire)
+            f = item.frame
+            if self.retry and f.top == "s" and f.cmd not in NO_RETRY_CMDS:
+                key = (f.src, f.cmd, f.pkt)
+                old = self._pending.pop(key, None)
+                if old is not None:
+                    old[2].cancel()
+                    st.unacked += 1
+                handle = loop.call_later(self.retry_interval_s, self._resend, key, wire)
+                self._pending[key] = [loop.time(), 1, handle]
+                self._idle.clear()
+            if self.writer.transport.get_write_buffer_size() > 64 * 1024:
+                await self.writer.drain()
+        await self.writer.drain()
+
+    def _resend(self, key: tuple[str, str, str], wire: bytes) -> None:
+        entry = self._pending.get(key)
+        if entry is None:
+            return
+        if entry[1] >= self.max_tries:
+            del self._pending[key]
+            self.stats.unacked += 1
+            if not self._pending:
+                self._idle.set()
+            return
+        entry[1] += 1
+        self._write(wire)
+        self.stats.retries_sent += 1
+        self.stats.bytes_sent += len(wire)
+        entry[2] = asyncio.get_running_loop().call_later(self.retry_interval_s, self._resend, key, wire)
+
+    async def _read_client(self) -> None:
+        st = self.stats
+        parser = FrameStreamParser()
+        loop = asyncio.get_running_loop()
+        while True:
+            chunk = await self.reader.read(4096)
+            if not chunk:
+                return
+            for f in parser.push(chunk):
+                st.client_frames += 1
+                if f.top == "a":
+                    entry = self._pending.pop((f.dst, f.cmd, f.pkt), None)
+                    if entry is not None:
+                        entry[2].cancel()
+                        st.acked += 1
+                        st.ack_latencies_s.append(loop.time() - entry[0])
+                        if not self._pending:
+                            self._idle.set()
+                elif self.ack_commands:
+                    if self.ack_rate > 0:
+                        now = loop.time()
+                        self._tokens = min(1.0, self._tokens + (now - self._tokens_at) * self.ack_rate)
+                        self._tokens_at = now
+                        if self._tokens < 1.0:
+                            st.client_commands_dropped += 1
+                            continue
+                        self._tokens -= 1.0
+                    # answer as the addressed module would: src=DST, dst=SRC
+                    crc = compute_crc_dec(f.cmd, f.val, f.dst, f.src, f.pkt, "a")
+                    ack = encode_frame(f.cmd, f.val, f.dst, f.src, f.pkt, "a", crc).encode("ascii")
+                    if self.ack_delay_s > 0:
+                        loop.call_later(self.ack_delay_s, self._write, ack)
+                    else:
+                        self._write(ack)
+                    st.client_commands_acked += 1
+
+
+class ReplayServer:
+    """
+    Local TCP stand-in for a Moxa: every client connection gets its own
+    replay of the recording produced by `items_factory`.
+    """
+
+    def __init__(self, items_factory: Callable[[], Iterable[ReplayItem]], **session_kw: Any) -> None:
+        self.items_factory = items_factory
+        self.session_kw = session_kw
+        self.sessions: list[ReplayStats] = []
+        self.session_done = asyncio.Event()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session = ReplaySession(self.items_factory(), reader, writer, **self.session_kw)
+        self.sessions.append(await session.run())
+        self.session_done.set()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port)
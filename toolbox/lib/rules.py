@@ -0,0 +1,286 @@
+"""
+Compiled trigger → effect index for the legacy `action` rules.
+
+`homiq_extract_db.py` exports the rules as a flat list
+(tables/_derived.json: actions_expanded, one record per input bit). Reacting
+to a live `I.<bit>` frame by scanning that list costs O(rules); RuleIndex
+compiles it once into a dict keyed by
+
+  (master, module, bit, input_state)
+
+so a frame is matched with one or two dict lookups. Rules with an empty
+input_state match any state. Effects are plain tuples, shared between keys.
+
+Macros: `macro` rows have the layout shown in docs/AI_AGENT_KNOWLEDGE.md
+(FAQ-5), e.g. ('_Roleta w górę stop', '_RUE', -1, 's', 'U', 'UD'):
+
+  name, symbol, sleep, value, state, cmd
+
+Rows are read in column order (the exporter keeps the table's order) and
+compiled to MacroStep tuples under their symbol, the value `a_macro`
+references (`RuleIndex.macros`). A table with another number of columns
+raises ValueError instead of being guessed at. `macromacro` has no
+documented row layout and is not loaded; rule references missing from
+`macro` are counted in stats() as unresolved.
+
+Compact file (`save` / `load`, gzip when the name ends with .gz):
+
+  {"format": "homiq-rule-index", "format_version": 2,
+   "effects": [[master, module, cmd, value, delay_s, macro, name], ...],
+   "triggers": [[master, module, bit, state|null, [effect ids]], ...],
+   "macros": {symbol: [[name, symbol, sleep, value, state, cmd], ...]}}
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, NamedTuple, Optional
+
+from .homiq_frame import Frame
+
+
+INDEX_FORMAT = "homiq-rule-index"
+INDEX_FORMAT_VERSION = 2
+
+_INACTIVE = {"0", "f", "false", "n", "no"}
+_COVER_VALUES = {"u", "d", "s"}
+
+TriggerKey = tuple[str, str, int, Optional[str]]
+
+
+class MacroStep(NamedTuple):
+    name: str
+    symbol: str
+    sleep: float  # as stored; -1 in the documented rows
+    value: str
+    state: str
+    cmd: str
+
+
+MACRO_COLUMNS = MacroStep._fields
+
+
+class Effect(NamedTuple):
+    master: str
+    module: str
+    cmd: str  # "O.<n>", "UD" for covers, "" when the rule only runs a macro
+    value: str
+    delay_s: float
+    macro: str
+    name: str
+
+
+def _text(v: Any) -> str:
+    return "" if v is None else str(v).strip()
+
+
+def _state(v: Any) -> Optional[str]:
+    s = _text(v)
+    return s or None
+
+
+def _delay(v: Any) -> float:
+    try:
+        d = float(v)
+    except (TypeError, ValueError):
+        return 0.0
+    return d if d > 0 else 0.0
+
+
+def _is_active(v: Any) -> bool:
+    if v is None or v is True:
+        return True
+    if v is False:
+        return False
+    return _text(v).lower() not in _INACTIVE
+
+
+def _effect(e: dict[str, Any]) -> Effect:
+    addr = _text(e.get("address"))
+    module, _, channel = addr.partition(".")
+    value = _text(e.get("value"))
+    if channel:
+        cmd = f"O.{channel}"
+    elif value in _COVER_VALUES:
+        cmd = "UD"
+    else:
+        cmd = ""
+    return Effect(_text(e.get("master")), module, cmd, value, _delay(e.get("delay_s")), _text(e.get("macro")), _text(e.get("name")))
+
+
+def _macro_step(row: dict[str, Any]) -> MacroStep:
+    vals = list(row.values())
+    if len(vals) != len(MACRO_COLUMNS):
+        raise ValueError(
+            f"macro row has columns {list(row)}, expected the documented layout {', '.join(MACRO_COLUMNS)}"
+        )
+    name, symbol, sleep, value, state, cmd = vals
+    try:
+        sleep_f = float(sleep)
+    except (TypeError, ValueError):
+        raise ValueError(f"macro row {vals!r}: sleep {sleep!r} is not a number") from None
+    return MacroStep(_text(name), _text(symbol), sleep_f, _text(value), _text(state), _text(cmd))
+
+
+def compile_macros(rows: Iterable[dict[str, Any]], refs: Optional[set[str]] = None) -> dict[str, list[MacroStep]]:
+    """`macro` rows → steps per symbol (only symbols in `refs` when given)."""
+
+    out: dict[str, list[MacroStep]] = {}
+    for r in rows:
+        step = _macro_step(r)
+        if refs is None or step.symbol in refs:
+            out.setdefault(step.symbol, []).append(step)
+    return out
+
+
+class RuleIndex:
+    def __init__(
+        self,
+        effects: list[Effect],
+        triggers: dict[TriggerKey, list[int]],
+        macros: Optional[dict[str, list[MacroStep]]] = None,
+    ) -> None:
+        self.effects = effects
+        self.triggers = triggers
+        self.macros = macros or {}
+        self._compile()
+
+    def _compile(self) -> None:
+        # a wildcard rule also belongs to every exact key of the same input,
+        # so lookup() needs at most one miss before the wildcard key
+        fx = self.effects
+        wild: dict[tuple[str, str, int], list[int]] = {}
+        for (master, module, bit, state), ids in self.triggers.items():
+            if state is None:
+                wild.setdefault((master, module, bit), []).extend(ids)
+        table: dict[TriggerKey, tuple[Effect, ...]] = {}
+        for key, ids in self.triggers.items():
+            master, module, bit, state = key
+            merged = ids if state is None else ids + wild.get((master, module, bit), [])
+            table[key] = tuple(fx[i] for i in sorted(set(merged)))
+        self._table = table
+
+    @classmethod
+    def build(
+        cls,
+        actions_expanded: Iterable[dict[str, Any]],
+        macro_rows: Iterable[dict[str, Any]] = (),
+        include_inactive: bool = False,
+    ) -> "RuleIndex":
+        effects: list[Effect] = []
+        effect_ids: dict[Effect, int] = {}
+        triggers: dict[TriggerKey, list[int]] = {}
+        for a in actions_expanded:
+            if not include_inactive and not _is_active(a.get("active")):
+                continue
+            trig = a.get("trigger") or {}
+            module = _text(trig.get("address")).partition(".")[0]
+            try:
+                bit = int(trig.get("bit"))
+            except (TypeError, ValueError):
+                continue
+            key = (_text(trig.get("master")), module, bit, _state((a.get("conditions") or {}).get("input_state")))
+            eff = _effect(a.get("effect") or {})
+            i = effect_ids.get(eff)
+            if i is None:
+                i = effect_ids[eff] = len(effects)
+                effects.append(eff)
+            ids = triggers.setdefault(key, [])
+            if i not in ids:
+                ids.append(i)
+
+        refs = {e.macro for e in effects if e.macro}
+        return cls(effects, triggers, compile_macros(macro_rows, refs))
+
+    @classmethod
+    def from_export(cls, export_dir: str | os.PathLike[str], include_inactive: bool = False) -> "RuleIndex":
+        """Build from a homiq_extract_db.py output directory (json or ndjson tables)."""
+
+        tables = Path(export_dir) / "tables"
+        derived = json.loads((tables / "_derived.json").read_text(encoding="utf-8"))
+        return cls.build(
+            derived.get("actions_expanded", []),
+            _read_rows(tables, "macro"),
+            include_inactive=include_inactive,
+        )
+
+    def lookup(self, master: str, module: str, bit: int, state: str) -> tuple[Effect, ...]:
+        """Effects for input `bit` of `module` on `master` changing to `state`."""
+
+        t = self._table
+        return t.get((master, module, bit, state)) or t.get((master, module, bit, None)) or ()
+
+    def lookup_frame(self, frame: Frame, master: str) -> tuple[Effect, ...]:
+        """Effects for an `I.<bit>` event frame (TOP=s) from a module on `master`; () otherwise."""
+
+        cmd = frame.cmd
+        if frame.top != "s" or not cmd.startswith("I."):
+            return ()
+        try:
+            bit = int(cmd[2:])
+        except ValueError:
+            return ()
+        return self.lookup(master, frame.src, bit, frame.val)
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self.triggers.values())
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "rules": len(self),
+            "trigger_keys": len(self.triggers),
+            "effects": len(self.effects),
+            "macros": len(self.macros),
+            "macros_unresolved": len({e.macro for e in self.effects if e.macro} - self.macros.keys()),
+            "max_effects_per_key": max((len(v) for v in self._table.values()), default=0),
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "format": INDEX_FORMAT,
+            "format_version": INDEX_FORMAT_VERSION,
+            "effects": [list(e) for e in self.effects],
+            "triggers": [[m, mod, bit, state, ids] for (m, mod, bit, state), ids in self.triggers.items()],
+            "macros": {k: [list(m) for m in steps] for k, steps in self.macros.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> "RuleIndex":
+        if d.get("format") != INDEX_FORMAT or d.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError("not a homiq rule index (or unsupported version)")
+        effects = [Effect(m, mod, cmd, val, float(delay), macro, name) for m, mod, cmd, val, delay, macro, name in d["effects"]]
+        triggers = {(m, mod, int(bit), state): list(ids) for m, mod, bit, state, ids in d["triggers"]}
+        macros = {
+            k: [MacroStep(n, sym, float(sl), v, st, c) for n, sym, sl, v, st, c in steps]
+            for k, steps in (d.get("macros") or {}).items()
+        }
+        return cls(effects, triggers, macros)
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        p = Path(path)
+        data = json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        tmp = p.with_name(p.name + ".tmp")
+        tmp.write_bytes(gzip.compress(data) if p.suffix == ".gz" else data)
+        os.replace(tmp, p)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> "RuleIndex":
+        p = Path(path)
+        data = p.read_bytes()
+        if p.suffix == ".gz":
+            data = gzip.decompress(data)
+        return cls.from_dict(json.loads(data))
+
+
+def _read_rows(tables: Path, name: str) -> list[dict[str, Any]]:
+    for suffix in (".json", ".ndjson"):
+        p = tables / f"{name}{suffix}"
+        if p.exists():
+            with p.open("r", encoding="utf-8") as fh:
+                if suffix == ".ndjson":
+                    return [json.loads(line) for line in fh if line.strip()]
+                return json.load(fh)
+    return []
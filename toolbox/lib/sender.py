@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from .aio_transports import AsyncTransport, aiter_frames
+from .homiq_frame import Frame, FrameStreamParser, compute_crc_dec, encode_frame, make_ack, validate_crc
+from .write_scheduler import FrameSuperseded
+
+
+# Wiki "Retry (praktyka)": ~126 ms between tries, at most 15 tries.
+RETRY_INTERVAL_S = 0.126
+MAX_TRIES = 15
+# Commands sent once, without retry (heartbeat).
+NO_RETRY_CMDS = frozenset({"HB"})
+
+PKT_MIN = 1
+PKT_MAX = 511
+
+AckKey = tuple[str, str, str, str]  # (src, dst, cmd, pkt) of the expected ACK
+
+
+class PacketCounter:
+    """ID (PKT) allocator counted per (DST, CMD) in the range 1..511."""
+
+    def __init__(self) -> None:
+        self._next: dict[tuple[str, str], int] = {}
+
+    def next(self, dst: str, cmd: str) -> int:
+        key = (dst, cmd)
+        n = self._next.get(key, PKT_MIN)
+        self._next[key] = PKT_MIN if n >= PKT_MAX else n + 1
+        return n
+
+
+@dataclass
+class SendResult:
+    dst: str
+    cmd: str
+    val: str
+    pkt: str
+    ok: bool
+    tries: int
+    latency_s: Optional[float]
+    superseded: bool = False
+
+
+@dataclass
+class SenderStats:
+    commands: int = 0
+    frames_sent: int = 0
+    retries: int = 0
+    acked: int = 0
+    failed: int = 0
+    late_acks: int = 0
+    acks_sent: int = 0
+    superseded: int = 0
+    crc_bad: int = 0
+
+
+class PipelinedSender:
+    """
+    Keeps many commands in flight on one transport.
+
+    Each command has its own retry timer; incoming ACKs are matched in O(1)
+    through a dict keyed on the expected (src, dst, cmd, pkt). The PKT for
+    each command comes from a PacketCounter, skipping values still in flight.
+
+        async with PipelinedSender(t) as s:
+            results = await s.send_many([("0H", "O.1", "1"), ("0H", "O.2", "1")])
+    """
+
+    def __init__(
+        self,
+        transport: AsyncTransport,
+        src: str = "0",
+        retry_interval_s: float = RETRY_INTERVAL_S,
+        max_tries: int = MAX_TRIES,
+        max_inflight: int = 32,
+        auto_ack: bool = False,
+        counter: Optional[PacketCounter] = None,
+    ) -> None:
+        self.transport = transport
+        self.src = src
+        self.retry_interval_s = retry_interval_s
+        self.max_tries = max_tries
+        self.auto_ack = auto_ack
+        self.counter = counter or PacketCounter()
+        self.stats = SenderStats()
+        self.parser = FrameStreamParser()
+        self._pending: dict[AckKey, asyncio.Future[Frame]] = {}
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._reader: Optional[asyncio.Task[None]] = None
+
+    async def __aenter__(self) -> "PipelinedSender":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.stop()
+
+    def start(self) -> None:
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read_loop())
+
+    async def stop(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+
+    async def _read_loop(self) -> None:
+        st = self.stats
+        try:
+            async for f in aiter_frames(self.transport, parser=self.parser):
+                if not validate_crc(f):
+                    # not ACKed: the module retries the good copy
+                    st.crc_bad += 1
+                elif f.top == "a":
+                    self.on_ack(f)
+                elif self.auto_ack:
+                    await self.transport.send(make_ack(f).encode("ascii"))
+                    st.acks_sent += 1
+        finally:
+            # EOF or read error: nobody will ACK anymore
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(ConnectionError("transport closed"))
+
+    def on_ack(self, f: Frame) -> bool:
+        """Resolve the in-flight command this ACK answers; False if none."""
+
+        fut = self._pending.get((f.src, f.dst, f.cmd, f.pkt))
+        if fut is None or fut.done():
+            self.stats.late_acks += 1
+            return False
+        fut.set_result(f)
+        return True
+
+    def _alloc_pkt(self, dst: str, cmd: str) -> str:
+        for _ in range(PKT_MAX):
+            pkt = str(self.counter.next(dst, cmd))
+            if (dst, self.src, cmd, pkt) not in self._pending:
+                return pkt
+        raise RuntimeError(f"all packet ids in flight for ({dst}, {cmd})")
+
+    async def send(self, dst: str, cmd: str, val: str, on_first_write: Optional[Callable[[], None]] = None) -> SendResult:
+        """Send one command until ACKed; `on_first_write` runs once the first try is written."""
+
+        async with self._slots:
+            return await self._send_one(dst, cmd, val, on_first_write)
+
+    async def _send_one(self, dst: str, cmd: str, val: str, on_first_write: Optional[Callable[[], None]] = None) -> SendResult:
+        st = self.stats
+        st.commands += 1
+        pkt = self._alloc_pkt(dst, cmd)
+        wire = encode_frame(cmd, val, self.src, dst, pkt, "s", compute_crc_dec(cmd, val, self.src, dst, pkt, "s"))
+        data = wire.encode("ascii")
+        key: AckKey = (dst, self.src, cmd, pkt)
+        fut: asyncio.Future[Frame] = asyncio.get_running_loop().create_future()
+        self._pending[key] = fut
+        max_tries = 1 if cmd in NO_RETRY_CMDS else self.max_tries
+        start = time.monotonic()
+        tries = 0
+        try:
+            while tries < max_tries:
+                tries += 1
+                if tries > 1:
+                    st.retries += 1
+                try:
+                    await self.transport.send(data)
+                except FrameSuperseded:
+                    # a write scheduler merged a newer command to (dst, cmd)
+                    st.superseded += 1
+                    return SendResult(dst, cmd, val, pkt, False, tries, None, superseded=True)
+                st.frames_sent += 1
+                if tries == 1 and on_first_write is not None:
+                    on_first_write()
+                try:
+                    await asyncio.wait_for(asyncio.shield(fut), self.retry_interval_s)
+                except asyncio.TimeoutError:
+                    continue
+                except ConnectionError:
+                    break
+                st.acked += 1
+                return SendResult(dst, cmd, val, pkt, True, tries, time.monotonic() - start)
+        finally:
+            del self._pending[key]
+        st.failed += 1
+        return SendResult(dst, cmd, val, pkt, False, tries, None)
+
+    async def send_many(self, commands: Iterable[tuple[str, str, str]]) -> list[SendResult]:
+        """Send (dst, cmd, val) commands concurrently; results keep input order."""
+
+        return list(await asyncio.gather(*(self.send(dst, cmd, val) for dst, cmd, val in commands)))
@@ -0,0 +1,288 @@
+"""
+Output sinks for frame streams, written in batches on a background thread.
+
+The read loop only calls BatchedWriter.put((ts, direction, frame, crc_ok)):
+an append to a bounded buffer under a lock. A writer thread takes whole
+batches and hands them to every sink, so formatting, pipe back-pressure and
+disk I/O never delay ACKs. When the buffer is full, records are dropped
+and counted (`stats()["dropped"]`) instead of blocking the reader.
+
+Sinks (one `write_batch(records)` call per batch):
+
+  - TextSink: the classic one-line-per-frame console format (RX only)
+  - NdjsonSink: JSON lines with "ts" and "dir" (readable by homiq_replay)
+  - CsvSink: ts,dir,cmd,val,src,dst,pkt,top,crc,crc_ok
+  - CaptureSink: binary .hqc files through CaptureWriter
+  - SqliteSink: FrameStore (SQLite, WAL), one transaction per batch
+
+open_sink("ndjson:/var/log/homiq.jsonl") builds a sink from a CLI spec.
+"""
+
+from __future__ import annotations
+
+import abc
+import csv
+import io
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import IO, Any, Iterable
+
+from .capture import DIR_RX, DIR_TX, CaptureWriter
+from .frame_store import FrameStore, Record
+from .homiq_frame import FRAME_FIELDS
+
+
+SINK_KINDS = ("text", "ndjson", "csv", "capture", "sqlite")
+
+
+def _dir(direction: int) -> str:
+    return "tx" if direction == DIR_TX else "rx"
+
+
+class Sink(abc.ABC):
+    name = "sink"
+
+    @abc.abstractmethod
+    def write_batch(self, records: list[Record]) -> None: ...
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+
+class _StreamSink(Sink):
+    """Sink writing text to a stream (stdout) or a file it opens in append mode."""
+
+    def __init__(self, out: str | os.PathLike[str] | IO[str] | None = None) -> None:
+        if out is None or out == "-":
+            self._fh: IO[str] = sys.stdout
+            self._owned = False
+        elif isinstance(out, (str, os.PathLike)):
+            Path(out).parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(out, "a", encoding="utf-8", newline="")
+            self._owned = True
+        else:
+            self._fh = out
+            self._owned = False
+
+    def flush(self) -> None:
+        self._fh.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self._owned:
+            self._fh.close()
+
+
+class TextSink(_StreamSink):
+    name = "text"
+
+    def write_batch(self, records: list[Record]) -> None:
+        lines = [
+            f"{f.src:>4} -> {f.dst:<4} top={f.top} pkt={f.pkt:>3} {f.cmd:<6} val={f.val!r} {'OK' if ok else 'CRC_BAD'}\n"
+            for _ts, d, f, ok in records
+            if d == DIR_RX
+        ]
+        if lines:
+            self._fh.write("".join(lines))
+            self._fh.flush()
+
+
+class NdjsonSink(_StreamSink):
+    name = "ndjson"
+
+    def __init__(self, out: str | os.PathLike[str] | IO[str] | None = None, rx_only: bool = False) -> None:
+        super().__init__(out)
+        self.rx_only = rx_only
+
+    def write_batch(self, records: list[Record]) -> None:
+        dumps = json.dumps
+        parts = []
+        for ts, d, f, ok in records:
+            if self.rx_only and d != DIR_RX:
+                continue
+            out: dict[str, Any] = f.to_dict()
+            out["crc_ok"] = ok
+            out["ts"] = ts
+            out["dir"] = _dir(d)
+            parts.append(dumps(out, ensure_ascii=False))
+        if parts:
+            parts.append("")
+            self._fh.write("\n".join(parts))
+            self._fh.flush()
+
+
+class CsvSink(_StreamSink):
+    name = "csv"
+    HEADER = ("ts", "dir", *FRAME_FIELDS, "crc_ok")
+
+    def __init__(self, out: str | os.PathLike[str] | IO[str] | None = None) -> None:
+        appending = isinstance(out, (str, os.PathLike)) and out != "-" and Path(out).exists() and Path(out).stat().st_size > 0
+        super().__init__(out)
+        self._buf = io.StringIO()
+        self._csv = csv.writer(self._buf, lineterminator="\n")
+        if not appending:
+            self._csv.writerow(self.HEADER)
+
+    def write_batch(self, records: list[Record]) -> None:
+        self._csv.writerows(
+            (f"{ts:.6f}", _dir(d), f.cmd, f.val, f.src, f.dst, f.pkt, f.top, f.crc, int(ok)) for ts, d, f, ok in records
+        )
+        self._fh.write(self._buf.getvalue())
+        self._buf.seek(0)
+        self._buf.truncate()
+        self._fh.flush()
+
+
+class CaptureSink(Sink):
+    name = "capture"
+
+    def __init__(self, writer: CaptureWriter) -> None:
+        self.writer = writer
+
+    def write_batch(self, records: list[Record]) -> None:
+        write = self.writer.write
+        for ts, d, f, _ok in records:
+            write(f, ts, d)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class SqliteSink(Sink):
+    """Batches into a FrameStore (lib/frame_store.py): frames + per-minute rollups."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.store = FrameStore(path)
+
+    def write_batch(self, records: list[Record]) -> None:
+        self.store.append(records)
+
+    def close(self) -> None:
+        self.store.close()
+
+
+def open_sink(spec: str, **capture_kw: Any) -> Sink:
+    """
+    Sink from "KIND[:PATH]": text / ndjson / csv (PATH or stdout), capture:DIR,
+    sqlite:FILE. `capture_kw` go to CaptureWriter (rotation).
+    """
+
+    kind, _, path = spec.partition(":")
+    if kind == "text":
+        return TextSink(path or None)
+    if kind == "ndjson":
+        return NdjsonSink(path or None)
+    if kind == "csv":
+        return CsvSink(path or None)
+    if kind in ("capture", "sqlite") and not path:
+        raise ValueError(f"{kind} sink needs a path: {kind}:PATH")
+    if kind == "capture":
+        return CaptureSink(CaptureWriter(path, **capture_kw))
+    if kind == "sqlite":
+        return SqliteSink(path)
+    raise ValueError(f"Unknown sink {kind!r} (expected one of {', '.join(SINK_KINDS)})")
+
+
+class BatchedWriter:
+    """
+    Bounded buffer + writer thread in front of one or more sinks.
+
+    A batch is written when `batch_records` records are waiting or
+    `flush_interval_s` has passed. At most `max_queue` records wait; put()
+    drops and counts records beyond that.
+    """
+
+    def __init__(
+        self,
+        sinks: Iterable[Sink],
+        max_queue: int = 65536,
+        batch_records: int = 1024,
+        flush_interval_s: float = 0.5,
+    ) -> None:
+        self.sinks = list(sinks)
+        self.max_queue = max_queue
+        self.batch_records = batch_records
+        self.flush_interval_s = flush_interval_s
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors: dict[str, int] = {}
+        self.max_batch = 0
+        self._buf: list[Record] = []
+        self._cond = threading.Condition()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name="homiq-sinks", daemon=True)
+        self._thread.start()
+
+    def put(self, record: Record) -> bool:
+        """Queue one record; False (and counted as dropped) if the buffer is full."""
+
+        with self._cond:
+            buf = self._buf
+            if len(buf) >= self.max_queue:
+                self.dropped += 1
+                return False
+            buf.append(record)
+            self.queued += 1
+            if len(buf) == self.batch_records:
+                self._cond.notify()
+        return True
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closing and len(self._buf) < self.batch_records:
+                    self._cond.wait(self.flush_interval_s)
+                batch, self._buf = self._buf, []
+                closing = self._closing
+            if batch:
+                if len(batch) > self.max_batch:
+                    self.max_batch = len(batch)
+                self._write(batch)
+            if closing and not batch:
+                return
+
+    def _write(self, batch: list[Record]) -> None:
+        for sink in self.sinks:
+            try:
+                sink.write_batch(batch)
+            except Exception as e:  # a failing sink must not stop the others
+                n = self.errors.get(sink.name, 0)
+                self.errors[sink.name] = n + 1
+                if n == 0:
+                    print(f"Sink {sink.name} failed: {e}", file=sys.stderr)
+        self.written += len(batch)
+        self.batches += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "max_batch": self.max_batch,
+            "pending": len(self._buf),
+            "errors": dict(self.errors),
+        }
+
+    def close(self, timeout_s: float = 10.0) -> None:
+        """Write what is queued, then close every sink."""
+
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join(timeout=timeout_s)
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                print(f"Sink {sink.name} close failed: {e}", file=sys.stderr)
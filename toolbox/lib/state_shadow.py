@@ -0,0 +1,213 @@
+"""
+Device state shadow: latest output / input / cover / temperature value per
+(master, module, channel), published to subscribers only when it changes.
+
+Sources of state are frames sent by modules (SRC != controller):
+
+  - TOP=s `I.n`, `O.n`, `UD`, `T.n`: the module reports a change
+  - TOP=a answers to our commands: an ACK of `O.n;1` means the output is
+    now 1, an ACK of `T.0` carries the temperature
+
+Retries and repeated ACKs carry the same value and publish nothing.
+Commands from the controller (SRC = "0") are intentions, not state.
+
+Storage is one fixed slot list per module (SLOTS: O.0-O.15, I.0-I.15,
+T.0-T.3, UD) plus an array of change timestamps. `save()` / `load()` write
+and read a JSON snapshot so a restart starts with the last known state.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from array import array
+from pathlib import Path
+from typing import Callable, Iterator, NamedTuple, Optional
+
+from .homiq_frame import Frame
+
+
+SNAPSHOT_FORMAT = "homiq-state-shadow"
+SNAPSHOT_FORMAT_VERSION = 1
+
+SLOTS: tuple[str, ...] = (
+    *(f"O.{i}" for i in range(16)),
+    *(f"I.{i}" for i in range(16)),
+    *(f"T.{i}" for i in range(4)),
+    "UD",
+)
+SLOT_INDEX: dict[str, int] = {cmd: i for i, cmd in enumerate(SLOTS)}
+
+
+class StateChange(NamedTuple):
+    master: str
+    module: str
+    cmd: str
+    old: Optional[str]
+    new: str
+    ts: float
+
+
+class _Module:
+    __slots__ = ("values", "ts")
+
+    def __init__(self) -> None:
+        self.values: list[Optional[str]] = [None] * len(SLOTS)
+        self.ts = array("d", bytes(8 * len(SLOTS)))
+
+
+Subscriber = Callable[[StateChange], None]
+
+
+class StateShadow:
+    """
+    Latest state per (master, module, channel).
+
+    `master` names the bus this shadow is fed from (update() may override it
+    per frame). With `snapshot_path`, the state is saved at most every
+    `snapshot_interval_s` seconds from update() after a change, and on close().
+    """
+
+    def __init__(
+        self,
+        master: str = "",
+        controller: str = "0",
+        snapshot_path: Optional[str | os.PathLike[str]] = None,
+        snapshot_interval_s: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.master = master
+        self.controller = controller
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.snapshot_interval_s = snapshot_interval_s
+        self.clock = clock
+        self._modules: dict[tuple[str, str], _Module] = {}
+        self._subscribers: list[Subscriber] = []
+        self._dirty = False
+        self._saved_at = clock()
+        self.frames = 0
+        self.changes = 0
+        self.unchanged = 0
+
+    def subscribe(self, fn: Subscriber) -> Callable[[], None]:
+        """Call `fn(change)` for every state change; returns an unsubscribe function."""
+
+        self._subscribers.append(fn)
+        return lambda: self._subscribers.remove(fn)
+
+    def update(self, f: Frame, ts: Optional[float] = None, master: Optional[str] = None) -> Optional[StateChange]:
+        """Apply one frame; the StateChange if it changed a value (subscribers already called)."""
+
+        if f.src == self.controller:
+            return None
+        slot = SLOT_INDEX.get(f.cmd)
+        if slot is None:
+            return None
+        self.frames += 1
+        key = (self.master if master is None else master, f.src)
+        m = self._modules.get(key)
+        if m is None:
+            m = self._modules[key] = _Module()
+        val = f.val
+        old = m.values[slot]
+        if old == val:
+            self.unchanged += 1
+            return None
+        if ts is None:
+            ts = self.clock()
+        m.values[slot] = val
+        m.ts[slot] = ts
+        self.changes += 1
+        change = StateChange(key[0], key[1], f.cmd, old, val, ts)
+        for fn in self._subscribers:
+            fn(change)
+        self._dirty = True
+        if self.snapshot_path is not None and ts - self._saved_at >= self.snapshot_interval_s:
+            self.save()
+        return change
+
+    def get(self, module: str, cmd: str, master: Optional[str] = None) -> Optional[str]:
+        m = self._modules.get((self.master if master is None else master, module))
+        slot = SLOT_INDEX.get(cmd)
+        if m is None or slot is None:
+            return None
+        return m.values[slot]
+
+    def module_state(self, module: str, master: Optional[str] = None) -> dict[str, str]:
+        """Known channel values of one module, e.g. {"O.3": "1", "T.0": "21.5"}."""
+
+        m = self._modules.get((self.master if master is None else master, module))
+        if m is None:
+            return {}
+        return {SLOTS[i]: v for i, v in enumerate(m.values) if v is not None}
+
+    def items(self) -> Iterator[tuple[str, str, str, str, float]]:
+        """(master, module, cmd, value, changed_ts) for every known value."""
+
+        for (master, module), m in self._modules.items():
+            for i, v in enumerate(m.values):
+                if v is not None:
+                    yield master, module, SLOTS[i], v, m.ts[i]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "modules": len(self._modules),
+            "values": sum(1 for _ in self.items()),
+            "frames": self.frames,
+            "changes": self.changes,
+            "unchanged": self.unchanged,
+        }
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "format": SNAPSHOT_FORMAT,
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "saved_at": self.clock(),
+            "slots": list(SLOTS),
+            "modules": [
+                {"master": master, "module": module, "values": m.values, "ts": list(m.ts)}
+                for (master, module), m in self._modules.items()
+            ],
+        }
+
+    def save(self, path: Optional[str | os.PathLike[str]] = None) -> None:
+        p = Path(path) if path else self.snapshot_path
+        if p is None:
+            raise ValueError("no snapshot path")
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(p.name + ".tmp")
+        tmp.write_text(json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":")) + "\n", encoding="utf-8")
+        os.replace(tmp, p)
+        self._dirty = False
+        self._saved_at = self.clock()
+
+    def load(self, path: Optional[str | os.PathLike[str]] = None) -> bool:
+        """
+        Warm start from a snapshot (no subscriber calls). False if the file is
+        missing or not a snapshot; slots unknown to this version are skipped.
+        """
+
+        p = Path(path) if path else self.snapshot_path
+        if p is None:
+            return False
+        try:
+            d = json.loads(p.read_text(encoding="utf-8"))
+            if d.get("format") != SNAPSHOT_FORMAT or d.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+                return False
+            slots = [SLOT_INDEX.get(c) for c in d["slots"]]
+            for e in d["modules"]:
+                m = self._modules.setdefault((str(e["master"]), str(e["module"])), _Module())
+                for i, v, ts in zip(slots, e["values"], e["ts"]):
+                    if i is not None and v is not None:
+                        m.values[i] = str(v)
+                        m.ts[i] = float(ts)
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        return True
+
+    def close(self) -> None:
+        """Save a final snapshot if anything changed since the last one."""
+
+        if self.snapshot_path is not None and self._dirty:
+            self.save()
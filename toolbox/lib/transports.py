@@ -19,23 +19,39 @@ class TcpTransport:
     port: int
     timeout_s: float = 0.5
     _sock: Optional[socket.socket] = None
+    # set when the peer closed the connection (read() then keeps returning b"")
+    eof: bool = False
 
     def __post_init__(self) -> None:
         s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        s.settimeout(self.timeout_s)
-        s.connect((self.host, self.port))
+        try:
+            s.settimeout(self.timeout_s)
+            s.connect((self.host, self.port))
+        except BaseException:
+            s.close()
+            raise
         self._sock = s
+        self.eof = False
+
+    def reconnect(self) -> None:
+        self.close()
+        self.__post_init__()
 
     def write(self, data: bytes) -> None:
-        assert self._sock is not None
+        if self._sock is None:
+            raise ConnectionError("transport closed")
         self._sock.sendall(data)
 
     def read(self, n: int = 4096) -> bytes:
-        assert self._sock is not None
+        if self._sock is None:
+            raise ConnectionError("transport closed")
         try:
-            return self._sock.recv(n)
+            data = self._sock.recv(n)
         except socket.timeout:
             return b""
+        if not data:
+            self.eof = True
+        return data
 
     def close(self) -> None:
         if self._sock is not None:
@@ -57,12 +73,18 @@ class SerialTransport:
 
         self._ser = serial.Serial(self.port, self.baud, timeout=self.timeout_s)
 
+    def reconnect(self) -> None:
+        self.close()
+        self.__post_init__()
+
     def write(self, data: bytes) -> None:
-        assert self._ser is not None
+        if self._ser is None:
+            raise ConnectionError("transport closed")
         self._ser.write(data)  # type: ignore[attr-defined]
 
     def read(self, n: int = 4096) -> bytes:
-        assert self._ser is not None
+        if self._ser is None:
+            raise ConnectionError("transport closed")
         return self._ser.read(n)  # type: ignore[attr-defined]
 
     def close(self) -> None:
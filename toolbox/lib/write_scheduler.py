@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from .aio_transports import AsyncTransport
+from .homiq_frame import decode_frame_bytes
+from .transports import Transport
+
+
+# RS-485 line: 115200 baud, 8N1 = 10 bits per byte on the wire.
+LINE_BAUD = 115200
+LINE_BYTES_PER_S = LINE_BAUD / 10
+# Default share of the line we allow ourselves to fill with writes.
+DEFAULT_LINE_SHARE = 0.5
+
+PRIO_ACK = 0
+PRIO_CMD = 1
+
+
+class FrameSuperseded(Exception):
+    """A queued command was replaced by a newer one to the same (dst, cmd)."""
+
+
+@dataclass
+class _Pending:
+    prio: int
+    data: bytes
+    key: Optional[tuple[str, str]]
+    enq_t: float
+    waiters: list[Any]
+
+
+class WriteScheduler:
+    """
+    Pacing + priority queue for frames written to a half-duplex bus.
+
+    - ACKs (TOP=a) always leave before new commands (TOP=s)
+    - a pending command to the same (dst, cmd) is replaced in place by a newer
+      one (latest value wins, queue position kept); identical pending frames
+      are written once
+    - writes are spaced to a budget in bytes/s (default: half of 115200 8N1)
+      and optionally frames/s
+    - metrics: queue depth, enqueue→write latency, merge/dup counters
+
+    The class holds no threads; ScheduledTransport / AsyncScheduledTransport
+    drive it.
+    """
+
+    def __init__(
+        self,
+        bytes_per_s: Optional[float] = LINE_BYTES_PER_S * DEFAULT_LINE_SHARE,
+        frames_per_s: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        latency_window: int = 1024,
+    ) -> None:
+        if bytes_per_s is not None and bytes_per_s <= 0:
+            raise ValueError("bytes_per_s must be > 0")
+        if frames_per_s is not None and frames_per_s <= 0:
+            raise ValueError("frames_per_s must be > 0")
+        self.bytes_per_s = bytes_per_s
+        self.frames_per_s = frames_per_s
+        self.clock = clock
+        self._queues: tuple[deque[_Pending], deque[_Pending]] = (deque(), deque())
+        self._by_key: dict[tuple[str, str], _Pending] = {}
+        self._by_data: dict[bytes, _Pending] = {}
+        self._next_write_t = 0.0
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+
+        self.enqueued = 0
+        self.written = 0
+        self.bytes_written = 0
+        self.merged = 0
+        self.duplicates = 0
+        self.max_depth = 0
+        self.latency_max_s = 0.0
+        self._latency_sum_s = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self._by_data)
+
+    def push(self, data: bytes, waiter: Any = None) -> list[Any]:
+        """
+        Queue one wire frame. Returns waiters of entries this frame replaced
+        (the caller fails them with FrameSuperseded).
+        """
+
+        now = self.clock()
+        self.enqueued += 1
+        superseded: list[Any] = []
+
+        dup = self._by_data.get(data)
+        if dup is not None:
+            # same bytes already waiting (e.g. a retry): write them once
+            self.duplicates += 1
+            if waiter is not None:
+                dup.waiters.append(waiter)
+            return superseded
+
+        f = decode_frame_bytes(data)
+        prio = PRIO_ACK if f is not None and f.top == "a" else PRIO_CMD
+        key = (f.dst, f.cmd) if f is not None and prio == PRIO_CMD else None
+
+        if key is not None:
+            old = self._by_key.get(key)
+            if old is not None:
+                self.merged += 1
+                superseded.extend(old.waiters)
+                del self._by_data[old.data]
+                old.data = data
+                old.waiters = [waiter] if waiter is not None else []
+                self._by_data[data] = old
+                return superseded
+
+        p = _Pending(prio, data, key, now, [waiter] if waiter is not None else [])
+        self._queues[prio].append(p)
+        self._by_data[data] = p
+        if key is not None:
+            self._by_key[key] = p
+        if self.depth > self.max_depth:
+            self.max_depth = self.depth
+        return superseded
+
+    def next_delay(self) -> Optional[float]:
+        """Seconds until the next frame may be written; None if queue empty."""
+
+        if not self._by_data:
+            return None
+        return max(0.0, self._next_write_t - self.clock())
+
+    def pop_ready(self) -> Optional[_Pending]:
+        """Next frame to write now (highest priority, FIFO), or None."""
+
+        now = self.clock()
+        if now < self._next_write_t:
+            return None
+        for q in self._queues:
+            if q:
+                p = q.popleft()
+                del self._by_data[p.data]
+                if p.key is not None:
+                    del self._by_key[p.key]
+                self._account(p, now)
+                return p
+        return None
+
+    def _account(self, p: _Pending, now: float) -> None:
+        n = len(p.data)
+        gap = 0.0
+        if self.bytes_per_s:
+            gap = n / self.bytes_per_s
+        if self.frames_per_s:
+            gap = max(gap, 1.0 / self.frames_per_s)
+        self._next_write_t = max(now, self._next_write_t) + gap
+        lat = now - p.enq_t
+        self._latencies.append(lat)
+        self._latency_sum_s += lat
+        if lat > self.latency_max_s:
+            self.latency_max_s = lat
+        self.written += 1
+        self.bytes_written += n
+
+    def drain_pending(self) -> list[_Pending]:
+        """Remove and return everything still queued (used on close)."""
+
+        out = [p for q in self._queues for p in q]
+        for q in self._queues:
+            q.clear()
+        self._by_data.clear()
+        self._by_key.clear()
+        return out
+
+    def metrics(self) -> dict[str, Any]:
+        lat = sorted(self._latencies)
+
+        def pct(q: float) -> float:
+            return lat[min(len(lat) - 1, int(q * len(lat)))] if lat else 0.0
+
+        return {
+            "budget_bytes_per_s": self.bytes_per_s,
+            "budget_frames_per_s": self.frames_per_s,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "bytes_written": self.bytes_written,
+            "merged": self.merged,
+            "duplicates": self.duplicates,
+            "queue_depth": self.depth,
+            "queue_depth_acks": len(self._queues[PRIO_ACK]),
+            "queue_depth_max": self.max_depth,
+            "latency_mean_ms": (self._latency_sum_s / self.written * 1000.0) if self.written else 0.0,
+            "latency_p50_ms": pct(0.50) * 1000.0,
+            "latency_p95_ms": pct(0.95) * 1000.0,
+            "latency_max_ms": self.latency_max_s * 1000.0,
+        }
+
+
+class ScheduledTransport:
+    """
+    Blocking Transport wrapper: write() queues into a WriteScheduler and
+    returns immediately; a writer thread paces frames onto `inner`. A frame
+    whose write fails (link down, transport closed) is dropped and counted
+    in `write_errors`; the thread keeps serving later frames.
+    """
+
+    def __init__(self, inner: Transport, scheduler: Optional[WriteScheduler] = None) -> None:
+        self.inner = inner
+        self.scheduler = scheduler or WriteScheduler()
+        self.superseded = 0
+        self.write_errors = 0
+        self._cond = threading.Condition()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name="homiq-write-scheduler", daemon=True)
+        self._thread.start()
+
+    def write(self, data: bytes) -> None:
+        with self._cond:
+            self.superseded += len(self.scheduler.push(bytes(data)))
+            self._cond.notify()
+
+    def read(self, n: int = 4096) -> bytes:
+        return self.inner.read(n)
+
+    def flush(self, timeout_s: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout_s
+        with self._cond:
+            while self.scheduler.depth:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self._cond.wait(min(left, 0.05))
+        return True
+
+    def close(self) -> None:
+        self.flush()
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
+        self.inner.close()
+
+    def _run(self) -> None:
+        sched = self.scheduler
+        while True:
+            with self._cond:
+                while True:
+                    if self._closing:
+                        return
+                    p = sched.pop_ready()
+                    if p is not None:
+                        break
+                    self._cond.wait(sched.next_delay())
+                self._cond.notify_all()
+            try:
+                self.inner.write(p.data)
+            except Exception:  # a failed write must not stop the writer thread
+                self.write_errors += 1
+
+
+class AsyncScheduledTransport:
+    """
+    AsyncTransport wrapper: send() queues into a WriteScheduler and resolves
+    once the frame was actually written (or raises FrameSuperseded if a newer
+    command to the same (dst, cmd) replaced it while queued).
+    """
+
+    def __init__(self, inner: AsyncTransport, scheduler: Optional[WriteScheduler] = None) -> None:
+        self.inner = inner
+        self.scheduler = scheduler or WriteScheduler()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def _ensure_writer(self) -> asyncio.Event:
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self._wake
+
+    async def send(self, data: bytes) -> None:
+        wake = self._ensure_writer()
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        for w in self.scheduler.push(bytes(data), fut):
+            if not w.done():
+                w.set_exception(FrameSuperseded())
+        wake.set()
+        await fut
+
+    async def read(self, n: int = 4096) -> bytes:
+        return await self.inner.read(n)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for p in self.scheduler.drain_pending():
+            for w in p.waiters:
+                if not w.done():
+                    w.set_exception(ConnectionError("transport closed"))
+        await self.inner.close()
+
+    async def _run(self) -> None:
+        sched = self.scheduler
+        wake = self._wake
+        assert wake is not None
+        while True:
+            p = sched.pop_ready()
+            if p is None:
+                wake.clear()
+                delay = sched.next_delay()
+                try:
+                    await asyncio.wait_for(wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self.inner.send(p.data)
+            except (ConnectionError, OSError) as e:
+                for w in p.waiters:
+                    if not w.done():
+                        w.set_exception(e)
+                continue
+            for w in p.waiters:
+                if not w.done():
+                    w.set_result(None)
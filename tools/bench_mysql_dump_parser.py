@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: mysqldump VALUES parsing, reference vs fast tokenizer.
+
+Builds a synthetic extended INSERT (log-table like: ints, floats, NULLs,
+plain strings and strings with escapes), checks both parsers return the
+same rows and prints throughput.
+
+  python3 tools/bench_mysql_dump_parser.py --rows 200000
+
+Measured on CPython 3.11, 100000 rows, best of 7 (numbers vary with the
+machine by a few tenths):
+
+  - default input (--escape-ratio 0.1): fast is about 1.9-2.0x the reference
+  - no escapes (--escape-ratio 0): about 2.5-3x, every row takes the
+    single-regex path
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import random
+import sys
+import time
+from pathlib import Path
+
+
+def _load_extractor():
+    mod_path = Path(__file__).resolve().parent / "homiq_extract_mysql_dump.py"
+    spec = importlib.util.spec_from_file_location("homiq_extract_mysql_dump", mod_path)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)  # type: ignore[attr-defined]
+    return module
+
+
+def synthetic_values(rows: int, escape_ratio: float, seed: int = 1) -> str:
+    rnd = random.Random(seed)
+    words = ["Salon", "Kuchnia", "Łazienka", "O.3", "I.7", "T.0", "roleta góra", "brama"]
+    out = []
+    for i in range(rows):
+        text = " ".join(rnd.choice(words) for _ in range(rnd.randint(1, 4)))
+        if rnd.random() < escape_ratio:
+            text = text.replace(" ", "\\n", 1) + "\\'x\\\\"
+        val = "NULL" if rnd.random() < 0.2 else f"{rnd.uniform(-40, 40):.2f}"
+        out.append(f"({i},'2024-01-0{i % 9 + 1} 12:00:00',{rnd.randint(0, 511)},'{text}',{val})")
+    return ",".join(out) + ";"
+
+
+def _time(fn, arg: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Compare reference and fast mysqldump VALUES parsers.")
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--escape-ratio", type=float, default=0.1, help="Share of strings containing backslash escapes.")
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    mod = _load_extractor()
+    values = synthetic_values(args.rows, args.escape_ratio)
+    mb = len(values.encode("utf-8")) / 1e6
+
+    if mod._parse_sql_value_list_reference(values) != mod._parse_sql_value_list(values):
+        raise SystemExit("MISMATCH: parsers return different rows")
+
+    results = {}
+    for name, fn in (("reference", mod._parse_sql_value_list_reference), ("fast", mod._parse_sql_value_list)):
+        t = _time(fn, values, args.repeat)
+        results[name] = t
+        print(f"{name:9s} {t:8.3f}s  {mb / t:7.1f} MB/s  {args.rows / t:10.0f} rows/s")
+    print(f"speedup   {results['reference'] / results['fast']:.1f}x  ({mb:.1f} MB, {args.rows} rows)")
+
+
+if __name__ == "__main__":
+    main()
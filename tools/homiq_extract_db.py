@@ -10,27 +10,61 @@ Intended workflow:
 
 This tool is deliberately conservative: it exports *raw rows* too, so you can
 iterate without losing information.
+
+Tables are streamed: rows come through a named (server-side) cursor, fetched
+`--itersize` at a time, or with `--copy` through COPY ... TO STDOUT (CSV,
+values cast back by column type), and go straight to per-table writers
+(JSON array or NDJSON). Only the small tables needed for entities
+(modules/inputs/outputs/action) are kept in memory.
 """
 
 from __future__ import annotations
 
 import argparse
+import csv
 import dataclasses
 import datetime as dt
+import hashlib
+import io
 import json
 import os
+import queue
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
 from pathlib import Path
-from typing import Any, Iterable, Optional
+from typing import Any, Callable, Iterable, Iterator, Optional
 
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
-
-
-@dataclasses.dataclass(frozen=True)
-class ExportBundle:
-    meta: dict[str, Any]
-    tables: dict[str, list[dict[str, Any]]]
-    entities: list[dict[str, Any]]
+import psycopg2.pool
+
+from homiq_extract_mysql_dump import TableWriter
+
+# core tables used by legacy and node exporters
+CORE_TABLES = (
+    "masters",
+    "modules",
+    "inputs",
+    "outputs",
+    "action",
+    "macro",
+    "macromacro",
+    "macro_future",
+    "cron",
+    "global",
+)
+# kept in memory while streaming: inputs of build_entities / expand_actions
+ENTITY_TABLES = ("modules", "inputs", "outputs", "action")
+TABLE_FORMATS = ("json", "ndjson")
+DEFAULT_ITERSIZE = 2000
+MANIFEST_NAME = "manifest.json"
+CHANGES_NAME = "changes.json"
+# COPY CSV writes NULL as this marker (a literal "\N" string reads back as NULL)
+_COPY_NULL = "\\N"
 
 
 def _json_default(o: Any) -> Any:
@@ -49,6 +83,52 @@ def _write_json(path: Path, data: Any) -> None:
     path.write_text(json.dumps(data, ensure_ascii=False, indent=2, default=_json_default) + "\n", encoding="utf-8")
 
 
+# canonical form for hashing: key order and whitespace must not matter
+_CANON_ENCODER = json.JSONEncoder(ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=_json_default)
+
+
+def _digest(obj: Any) -> str:
+    return hashlib.blake2b(_CANON_ENCODER.encode(obj).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _row_key(row: dict[str, Any], pk: list[str]) -> str:
+    """Manifest key of a row: its primary key values, or its content hash for tables without one."""
+
+    if pk:
+        return _CANON_ENCODER.encode([row.get(c) for c in pk])
+    return "#" + _digest(row)
+
+
+def _entity_key(e: dict[str, Any]) -> str:
+    return f'{e.get("kind")}:{e.get("master")}:{e.get("address")}'
+
+
+class _TableDigest:
+    """
+    Order-independent digest of (key, row hash) pairs, built while rows
+    stream past: the blake2b of each pair, summed mod 2**128.
+    """
+
+    __slots__ = ("_sum",)
+
+    def __init__(self) -> None:
+        self._sum = 0
+
+    def add(self, key: str, row_hash: str) -> None:
+        h = hashlib.blake2b(f"{key}\t{row_hash}".encode("utf-8"), digest_size=16).digest()
+        self._sum = (self._sum + int.from_bytes(h, "big")) & ((1 << 128) - 1)
+
+    def hexdigest(self) -> str:
+        return f"{self._sum:032x}"
+
+
+def _table_digest(hashes: dict[str, str]) -> str:
+    d = _TableDigest()
+    for k, h in hashes.items():
+        d.add(k, h)
+    return d.hexdigest()
+
+
 def _connect(dsn: str):
     # DictCursor to get column→value mapping
     return psycopg2.connect(dsn, cursor_factory=psycopg2.extras.RealDictCursor)
@@ -62,20 +142,117 @@ def fetch_all(conn, sql: str, params: Optional[tuple[Any, ...]] = None) -> list[
         return [dict(r) for r in rows]
 
 
-def _table_exists(conn, table: str) -> bool:
+def existing_tables(conn, tables: Iterable[str]) -> set[str]:
+    """Which of `tables` exist in schema public (one catalog query)."""
+
     sql = """
-    SELECT 1
+    SELECT table_name
     FROM information_schema.tables
-    WHERE table_schema='public' AND table_name=%s
-    LIMIT 1
+    WHERE table_schema='public' AND table_name = ANY(%s)
+    """
+    return {r["table_name"] for r in fetch_all(conn, sql, (list(tables),))}
+
+
+def primary_keys(conn, tables: Iterable[str]) -> dict[str, list[str]]:
+    """Primary key columns (in key order) of `tables` that have one (one catalog query)."""
+
+    sql = """
+    SELECT kcu.table_name, kcu.column_name
+    FROM information_schema.table_constraints tc
+    JOIN information_schema.key_column_usage kcu
+      ON kcu.constraint_name = tc.constraint_name AND kcu.table_schema = tc.table_schema
+    WHERE tc.constraint_type = 'PRIMARY KEY' AND tc.table_schema = 'public' AND tc.table_name = ANY(%s)
+    ORDER BY kcu.table_name, kcu.ordinal_position
+    """
+    out: dict[str, list[str]] = {}
+    for r in fetch_all(conn, sql, (list(tables),)):
+        out.setdefault(r["table_name"], []).append(r["column_name"])
+    return out
+
+
+def iter_table_rows(conn, table: str, itersize: int = DEFAULT_ITERSIZE) -> Iterator[dict[str, Any]]:
+    """
+    Rows of `table` through a named (server-side) cursor: at most `itersize`
+    rows are held client-side at a time. Plain tuple cursor, one dict per
+    row built on the fly.
+    """
+
+    with conn.cursor(name=f"homiq_export_{table}", cursor_factory=psycopg2.extensions.cursor) as cur:
+        cur.itersize = itersize
+        cur.execute(f'SELECT * FROM "{table}"')
+        cols: Optional[list[str]] = None
+        for row in cur:
+            if cols is None:
+                cols = [d[0] for d in cur.description]
+            yield dict(zip(cols, row))
+
+
+def _cast_or_text(cast: Callable[[str], Any]) -> Callable[[str], Any]:
+    def conv(v: str) -> Any:
+        try:
+            return cast(v)
+        except ValueError:
+            return v
+
+    return conv
+
+
+# type OID → conversion of COPY CSV text back to what psycopg2 would return
+_COPY_CASTS: dict[int, Callable[[str], Any]] = {
+    16: lambda v: v == "t",  # bool
+    20: int,  # int8
+    21: int,  # int2
+    23: int,  # int4
+    114: json.loads,  # json
+    700: float,  # float4
+    701: float,  # float8
+    1700: Decimal,  # numeric
+    3802: json.loads,  # jsonb
+    1082: _cast_or_text(dt.date.fromisoformat),
+    1083: _cast_or_text(dt.time.fromisoformat),
+    1114: _cast_or_text(dt.datetime.fromisoformat),  # timestamp
+    1184: _cast_or_text(dt.datetime.fromisoformat),  # timestamptz
+}
+
+
+_ARRAY_TYPES_SQL = "SELECT oid FROM pg_type WHERE oid = ANY(%s) AND typcategory = 'A'"
+
+
+def iter_table_rows_copy(conn, table: str, itersize: int = DEFAULT_ITERSIZE) -> Iterator[dict[str, Any]]:
     """
-    return len(fetch_all(conn, sql, (table,))) > 0
+    Rows of `table` via COPY ... TO STDOUT (CSV). The COPY stream is spooled
+    to a temporary file and parsed line by line, so memory stays flat.
 
+    Array columns have no cast from COPY text here: a table with one is read
+    through iter_table_rows() instead, so both modes give the same values.
+    """
 
-def _safe_table_dump(conn, table: str) -> list[dict[str, Any]]:
-    if not _table_exists(conn, table):
-        return []
-    return fetch_all(conn, f'SELECT * FROM "{table}"')
+    with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cur:
+        cur.execute(f'SELECT * FROM "{table}" LIMIT 0')
+        cols = [d[0] for d in cur.description]
+        oids = [d[1] for d in cur.description]
+        cur.execute(_ARRAY_TYPES_SQL, (oids,))
+        if not cur.fetchall():
+            casts = [_COPY_CASTS.get(oid) for oid in oids]
+            with tempfile.TemporaryFile("w+b") as spool:
+                cur.copy_expert(f"COPY \"{table}\" TO STDOUT WITH (FORMAT csv, NULL '{_COPY_NULL}')", spool)
+                spool.seek(0)
+                text = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+                try:
+                    for rec in csv.reader(text):
+                        row: dict[str, Any] = {}
+                        for col, cast, v in zip(cols, casts, rec):
+                            if v == _COPY_NULL:
+                                row[col] = None
+                            elif cast is not None:
+                                row[col] = cast(v)
+                            else:
+                                row[col] = v
+                        yield row
+                finally:
+                    text.detach()
+            return
+    yield from iter_table_rows(conn, table, itersize)
 
 
 def _parse_cmd_channel(cmd: str) -> Optional[int]:
@@ -227,41 +404,321 @@ def expand_actions(actions: list[dict[str, Any]]) -> list[dict[str, Any]]:
     return expanded
 
 
-def export_bundle(conn, source: str) -> ExportBundle:
-    # core tables used by legacy and node exporters
-    tables: dict[str, list[dict[str, Any]]] = {}
-    for t in [
-        "masters",
-        "modules",
-        "inputs",
-        "outputs",
-        "action",
-        "macro",
-        "macromacro",
-        "macro_future",
-        "cron",
-        "global",
-    ]:
-        tables[t] = _safe_table_dump(conn, t)
-
-    entities = build_entities(tables["modules"], tables["inputs"], tables["outputs"])
-    # derived/normalized extras for later automation mapping
-    derived = {
-        "actions_expanded": expand_actions(tables["action"]),
+def export_streaming(
+    conn,
+    out_dir: Path,
+    source: str,
+    fmt: str = "json",
+    itersize: int = DEFAULT_ITERSIZE,
+    use_copy: bool = False,
+    single_file: bool = False,
+    pool: Any = None,
+    jobs: int = 1,
+    incremental: bool = False,
+) -> dict[str, Any]:
+    """
+    Write meta.json, entities.json, tables/<t>.json|ndjson,
+    tables/_derived.json and optionally export.json, with every table
+    streamed to its writer.
+
+    All tables are read in one REPEATABLE READ snapshot. With a `pool`
+    (psycopg2 connection pool, at least `jobs` connections) and jobs > 1,
+    `conn` exports the snapshot and `jobs` pooled connections import it and
+    dump tables concurrently.
+
+    Every run writes manifest.json with a digest per table, computed as the
+    rows stream by. With `incremental` it also holds per-row hashes keyed by
+    primary key (memory grows with the row count only then), and the new
+    export is compared with the manifest already in `out_dir`: only changed
+    tables/entities are rewritten and the differences go to changes.json.
+    """
+
+    if fmt not in TABLE_FORMATS:
+        raise ValueError(f"unknown table format: {fmt!r} (expected one of {TABLE_FORMATS})")
+    if single_file and fmt != "json":
+        raise ValueError("single_file needs fmt='json'")
+
+    tables_dir = out_dir / "tables"
+    _mkdir(tables_dir)
+    prev = load_manifest(out_dir) if incremental else None
+    if prev is not None and prev.get("table_format") != fmt:
+        prev = None  # format switch: nothing to compare file-wise, rewrite all
+    kept: dict[str, list[dict[str, Any]]] = {t: [] for t in ENTITY_TABLES}
+    counts: dict[str, int] = {}
+    timings: dict[str, float] = {}
+    digests: dict[str, str] = {}
+    row_hashes: dict[str, dict[str, str]] = {}
+    pks: dict[str, list[str]] = {}
+
+    def export_one(c, t: str, exists: bool) -> None:
+        t0 = time.monotonic()
+        if not exists:
+            rows: Iterable[dict[str, Any]] = ()
+        elif use_copy:
+            rows = iter_table_rows_copy(c, t, itersize)
+        else:
+            rows = iter_table_rows(c, t, itersize)
+        keep = kept.get(t)
+        pk = pks.get(t, [])
+        digest = _TableDigest()
+        hashes: Optional[dict[str, str]] = {} if incremental else None
+        path = tables_dir / f"{t}.{fmt}"
+        with TableWriter(path.with_name(path.name + ".tmp") if prev is not None else path, fmt) as w:
+            for row in rows:
+                w.write(row)
+                key, h = _row_key(row, pk), _digest(row)
+                digest.add(key, h)
+                if hashes is not None:
+                    hashes[key] = h
+                if keep is not None:
+                    keep.append(row)
+        counts[t] = w.rows
+        digests[t] = digest.hexdigest()
+        if hashes is not None:
+            row_hashes[t] = hashes
+        timings[t] = round(time.monotonic() - t0, 3)
+
+    started = time.monotonic()
+    _begin_snapshot(conn)
+    present = existing_tables(conn, CORE_TABLES)
+    pks.update(primary_keys(conn, present))
+    snapshot: Optional[str] = None
+    if pool is None or jobs <= 1:
+        jobs = 1
+        for t in CORE_TABLES:
+            export_one(conn, t, t in present)
+    else:
+        snapshot = fetch_all(conn, "SELECT pg_export_snapshot() AS snapshot")[0]["snapshot"]
+        _export_concurrent(pool, jobs, snapshot, [(t, t in present) for t in CORE_TABLES], export_one)
+    conn.rollback()
+    counts = {t: counts[t] for t in CORE_TABLES}
+    timings = {t: timings[t] for t in CORE_TABLES}
+
+    entities = build_entities(kept["modules"], kept["inputs"], kept["outputs"])
+    derived = {"actions_expanded": expand_actions(kept["action"])}
+    generated_at = dt.datetime.now(dt.timezone.utc)
+    manifest: dict[str, Any] = {
+        "format": "homiq-db-manifest",
+        "format_version": 1,
+        "generated_at": generated_at,
+        "table_format": fmt,
+        "tables": {
+            t: {
+                "file": f"tables/{t}.{fmt}",
+                "primary_key": pks.get(t, []),
+                "rows": counts[t],
+                "digest": digests[t],
+                **({"row_hashes": row_hashes[t]} if incremental else {}),
+            }
+            for t in CORE_TABLES
+        },
+        "entities": {"file": "entities.json", "hashes": {_entity_key(e): _digest(e) for e in entities}},
+        "derived": {"file": "tables/_derived.json", "digest": _digest(derived)},
     }
+    manifest["entities"]["digest"] = _table_digest(manifest["entities"]["hashes"])
 
+    changed: Optional[list[str]] = None
+    if prev is not None:
+        changed = _apply_incremental(out_dir, prev, manifest, entities)["changed"]
     meta = {
         "format": "homiq-db-export",
         "format_version": 1,
-        "generated_at": dt.datetime.now(dt.timezone.utc),
+        "generated_at": generated_at,
         "source": source,
-        "counts": {k: len(v) for k, v in tables.items()},
+        "counts": counts,
         "derived_counts": {k: len(v) for k, v in derived.items()},
+        "export": {
+            "mode": "copy-csv" if use_copy else "cursor",
+            "itersize": itersize,
+            "table_format": fmt,
+            "jobs": jobs,
+            "snapshot": snapshot,
+            "elapsed_s": round(time.monotonic() - started, 3),
+            "table_seconds": timings,
+            "incremental": changed is not None,
+            "changed": changed,
+        },
+    }
+    _write_json(out_dir / "meta.json", meta)
+    if changed is None or "entities" in changed:
+        _write_json(out_dir / "entities.json", entities)
+    if changed is None or "_derived" in changed:
+        _write_json(tables_dir / "_derived.json", derived)
+    _write_json(out_dir / MANIFEST_NAME, manifest)
+
+    if single_file and (changed is None or changed or not (out_dir / "export.json").exists()):
+        _write_single_file(out_dir / "export.json", meta, entities, tables_dir, [*CORE_TABLES, "_derived"])
+    return meta
+
+
+def load_manifest(out_dir: Path) -> Optional[dict[str, Any]]:
+    """manifest.json of a previous export in `out_dir`, or None (missing, unreadable, other format)."""
+
+    try:
+        m = json.loads((out_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(m, dict) or m.get("format") != "homiq-db-manifest" or m.get("format_version") != 1:
+        return None
+    return m
+
+
+def _iter_table_file(path: Path, fmt: str) -> Iterator[dict[str, Any]]:
+    """Rows of a table file written by TableWriter, read line by line (its JSON arrays hold one row per line too)."""
+
+    if not path.exists():
+        return
+    with path.open("r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if fmt == "json":
+                if line in ("[", "]", "[]"):
+                    continue
+                line = line.rstrip(",")
+            if line:
+                yield json.loads(line)
+
+
+def _keyed_diff(
+    old_hashes: dict[str, str],
+    new_hashes: dict[str, str],
+    old_items: Iterable[tuple[str, dict[str, Any]]],
+    new_items: Iterable[tuple[str, dict[str, Any]]],
+) -> dict[str, Any]:
+    """added / removed / modified items between two keyed snapshots, modified with per-field [old, new]."""
+
+    added = new_hashes.keys() - old_hashes.keys()
+    removed = old_hashes.keys() - new_hashes.keys()
+    modified = {k for k in new_hashes.keys() & old_hashes.keys() if new_hashes[k] != old_hashes[k]}
+    old = {k: v for k, v in old_items if k in removed or k in modified}
+    new = {k: v for k, v in new_items if k in added or k in modified}
+    out_modified = []
+    for k in sorted(modified):
+        a, b = old.get(k, {}), new.get(k, {})
+        fields = {c: [a.get(c), b.get(c)] for c in sorted(a.keys() | b.keys()) if a.get(c) != b.get(c)}
+        out_modified.append({"key": k, "changes": fields, "after": b})
+    return {
+        "added": [new[k] for k in sorted(added) if k in new],
+        "removed": [old[k] for k in sorted(removed) if k in old],
+        "modified": out_modified,
+    }
+
+
+def _apply_incremental(out_dir: Path, prev: dict[str, Any], manifest: dict[str, Any], entities: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Compare the fresh export (tables still in *.tmp) with the previous
+    manifest: move changed tables into place, drop unchanged temp files and
+    write changes.json. Returns the changes document.
+    """
+
+    fmt = manifest["table_format"]
+    prev_tables = prev.get("tables", {})
+    changes: dict[str, Any] = {
+        "format": "homiq-db-changes",
+        "format_version": 1,
+        "generated_at": manifest["generated_at"],
+        "previous_generated_at": prev.get("generated_at"),
+        "changed": [],
+        "tables": {},
+        "entities": None,
     }
+    for t, info in manifest["tables"].items():
+        path = out_dir / info["file"]
+        tmp = path.with_name(path.name + ".tmp")
+        old = prev_tables.get(t) or {}
+        if old.get("digest") == info["digest"] and old.get("primary_key", []) == info["primary_key"] and path.exists():
+            tmp.unlink()
+            continue
+        pk = info["primary_key"]
+        old_hashes = old.get("row_hashes")
+        if old_hashes is None or old.get("primary_key", []) != pk:
+            # previous run was not incremental (or keyed differently): hash its file
+            old_hashes = {_row_key(r, pk): _digest(r) for r in _iter_table_file(path, fmt)}
+        changes["tables"][t] = _keyed_diff(
+            old_hashes,
+            info["row_hashes"],
+            ((_row_key(r, pk), r) for r in _iter_table_file(path, fmt)),
+            ((_row_key(r, pk), r) for r in _iter_table_file(tmp, fmt)),
+        )
+        os.replace(tmp, path)
+        changes["changed"].append(t)
+
+    prev_entities = prev.get("entities") or {}
+    if prev_entities.get("digest") != manifest["entities"]["digest"] or not (out_dir / "entities.json").exists():
+        try:
+            old_entities = json.loads((out_dir / "entities.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            old_entities = []
+        # normalize through JSON so old (read back) and new compare alike
+        new_entities = json.loads(_CANON_ENCODER.encode(entities))
+        changes["entities"] = _keyed_diff(
+            prev_entities.get("hashes", {}),
+            manifest["entities"]["hashes"],
+            ((_entity_key(e), e) for e in old_entities),
+            ((_entity_key(e), e) for e in new_entities),
+        )
+        changes["changed"].append("entities")
+    if (prev.get("derived") or {}).get("digest") != manifest["derived"]["digest"]:
+        changes["changed"].append("_derived")
 
-    # Store derived in tables namespace to keep single-file export simple
-    tables["_derived"] = derived  # type: ignore[assignment]
-    return ExportBundle(meta=meta, tables=tables, entities=entities)
+    _write_json(out_dir / CHANGES_NAME, changes)
+    return changes
+
+
+def _begin_snapshot(conn) -> None:
+    conn.rollback()
+    conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+
+
+def _export_concurrent(
+    pool: Any,
+    jobs: int,
+    snapshot: str,
+    work: list[tuple[str, bool]],
+    export_one: Callable[[Any, str, bool], None],
+) -> None:
+    """Run export_one(conn, table, exists) on a thread pool, each worker on a pooled connection in `snapshot`."""
+
+    conns: queue.Queue[Any] = queue.Queue()
+    taken: list[Any] = []
+    try:
+        for _ in range(jobs):
+            c = pool.getconn()
+            taken.append(c)
+            _begin_snapshot(c)
+            with c.cursor() as cur:
+                cur.execute("SET TRANSACTION SNAPSHOT %s", (snapshot,))
+            conns.put(c)
+
+        def run(t: str, exists: bool) -> None:
+            c = conns.get()
+            try:
+                export_one(c, t, exists)
+            finally:
+                conns.put(c)
+
+        with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="homiq-export") as ex:
+            for f in [ex.submit(run, t, exists) for t, exists in work]:
+                f.result()
+    finally:
+        for c in taken:
+            c.rollback()
+            pool.putconn(c)
+
+
+def _write_single_file(path: Path, meta: dict[str, Any], entities: Any, tables_dir: Path, names: list[str]) -> None:
+    """export.json assembled from the per-table files without loading them."""
+
+    def dumps(o: Any) -> str:
+        return json.dumps(o, ensure_ascii=False, indent=2, default=_json_default)
+
+    with path.open("w", encoding="utf-8") as out:
+        out.write('{\n"meta": ' + dumps(meta) + ',\n"entities": ' + dumps(entities) + ',\n"tables": {')
+        for i, name in enumerate(names):
+            out.write(("\n" if not i else ",\n") + json.dumps(name) + ": ")
+            with (tables_dir / f"{name}.json").open("r", encoding="utf-8") as f:
+                shutil.copyfileobj(f, out)
+        out.write("}\n}\n")
 
 
 def main() -> None:
@@ -277,27 +734,58 @@ def main() -> None:
         action="store_true",
         help="Write also a single combined export.json (in addition to per-table JSONs).",
     )
+    p.add_argument(
+        "--format",
+        choices=TABLE_FORMATS,
+        default="json",
+        help="Per-table output: json (streamed array) or ndjson (one row per line).",
+    )
+    p.add_argument(
+        "--itersize",
+        type=int,
+        default=DEFAULT_ITERSIZE,
+        help=f"Rows fetched per round trip from the server-side cursor (default {DEFAULT_ITERSIZE}).",
+    )
+    p.add_argument("--copy", action="store_true", help="Read tables with COPY ... TO STDOUT (CSV) instead of a cursor.")
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Dump tables concurrently over N pooled connections sharing one snapshot (default 1).",
+    )
+    p.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Compare with the previous export in --out: rewrite only changed tables, write changes.json.",
+    )
     args = p.parse_args()
+    if args.single_file and args.format != "json":
+        p.error("--single-file needs --format json")
 
     out_dir = Path(args.out)
     _mkdir(out_dir)
 
-    with _connect(args.dsn) as conn:
-        bundle = export_bundle(conn, source="postgres")
-
-    _write_json(out_dir / "meta.json", bundle.meta)
-    _write_json(out_dir / "entities.json", bundle.entities)
-
-    tables_dir = out_dir / "tables"
-    _mkdir(tables_dir)
-    for name, rows in bundle.tables.items():
-        _write_json(tables_dir / f"{name}.json", rows)
-
-    if args.single_file:
-        _write_json(
-            out_dir / "export.json",
-            {"meta": bundle.meta, "entities": bundle.entities, "tables": bundle.tables},
-        )
+    jobs = max(1, args.jobs)
+    pool = None
+    if jobs > 1:
+        pool = psycopg2.pool.ThreadedConnectionPool(jobs, jobs, args.dsn, cursor_factory=psycopg2.extras.RealDictCursor)
+    try:
+        with _connect(args.dsn) as conn:
+            export_streaming(
+                conn,
+                out_dir,
+                source="postgres",
+                fmt=args.format,
+                itersize=args.itersize,
+                use_copy=args.copy,
+                single_file=args.single_file,
+                pool=pool,
+                jobs=jobs,
+                incremental=args.incremental,
+            )
+    finally:
+        if pool is not None:
+            pool.closeall()
 
     print(f"Wrote: {out_dir}")
 
@@ -8,7 +8,12 @@ This is for backups like:
 Goal:
   - extract table rows from INSERT statements
   - write per-table JSON under an output directory
-  - keep it streaming-friendly (large dumps)
+  - keep it streaming (large dumps): rows go straight to per-table writers,
+    memory does not grow with the dump size
+
+Output formats (--format):
+  - json:   tables/<Table>.json, a JSON array written row by row
+  - ndjson: tables/<Table>.ndjson, one JSON object per line
 
 Supported INSERT forms (common in mysqldump):
   - INSERT INTO `Table` VALUES (...),(...);
@@ -16,6 +21,12 @@ Supported INSERT forms (common in mysqldump):
 
 Notes:
   - This does not execute SQL.
+  - The dump is memory-mapped and split into statements by a quote-aware
+    scan (';' inside strings does not end a statement); only INSERTs of
+    wanted tables (--tables, matched on the raw name bytes) are decoded.
+  - The first run writes a table-of-contents sidecar (<dump>.toc.json, see
+    homiq_sql_toc.py); later runs seek straight to the wanted tables and
+    --list-tables answers from it.
   - Triggers-only dumps can be ignored (no INSERTs).
 """
 
@@ -24,8 +35,22 @@ from __future__ import annotations
 import argparse
 import datetime as dt
 import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Iterable, Optional
+from typing import IO, Any, Callable, Iterable, Iterator, Optional
+
+from homiq_sql_toc import DumpToc, TocEntry, ensure_toc, format_table_list, mapped_dump, toc_path
+
+
+TABLE_FORMATS = ("json", "ndjson")
+# --jobs: statements are grouped into chunks of about this many bytes per task
+CHUNK_BYTES = 4 * 1024 * 1024
 
 
 def _mkdir(p: Path) -> None:
@@ -42,6 +67,61 @@ def _write_json(path: Path, data: Any) -> None:
     path.write_text(json.dumps(data, ensure_ascii=False, indent=2, default=_json_default) + "\n", encoding="utf-8")
 
 
+_ROW_ENCODER = json.JSONEncoder(ensure_ascii=False, default=_json_default)
+
+
+class TableWriter:
+    """Incremental per-table writer: a streamed JSON array or NDJSON lines."""
+
+    def __init__(self, path: Path, fmt: str) -> None:
+        self.fmt = fmt
+        self.rows = 0
+        self._fh: IO[str] = path.open("w", encoding="utf-8")
+        if fmt == "json":
+            self._fh.write("[")
+
+    def write(self, obj: dict[str, Any]) -> None:
+        self.write_encoded([_ROW_ENCODER.encode(obj)])
+
+    def write_encoded(self, rows: list[str]) -> None:
+        """Append rows already encoded with _ROW_ENCODER."""
+
+        if not rows:
+            return
+        if self.fmt == "ndjson":
+            self._fh.write("\n".join(rows) + "\n")
+        else:
+            self._fh.write(("\n  " if not self.rows else ",\n  ") + ",\n  ".join(rows))
+        self.rows += len(rows)
+
+    def close(self) -> None:
+        if self.fmt == "json":
+            self._fh.write("\n]\n" if self.rows else "]\n")
+        self._fh.close()
+
+    def __enter__(self) -> "TableWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+@dataclass
+class ExtractProgress:
+    bytes_read: int
+    bytes_total: int
+    rows: int
+    elapsed_s: float
+
+    def line(self) -> str:
+        el = max(self.elapsed_s, 1e-9)
+        pct = (self.bytes_read * 100.0 / self.bytes_total) if self.bytes_total else 100.0
+        return (
+            f"{pct:5.1f}% {self.bytes_read / 1e6:.1f}/{self.bytes_total / 1e6:.1f} MB"
+            f"  {self.bytes_read / el / 1e6:.1f} MB/s  {self.rows} rows  {self.rows / el:.0f} rows/s"
+        )
+
+
 def _skip_ws(s: str, i: int) -> int:
     while i < len(s) and s[i].isspace():
         i += 1
@@ -57,8 +137,11 @@ def _parse_backticked_ident(s: str, i: int) -> tuple[str, int]:
     return s[start:i], i + 1
 
 
-def _parse_sql_value_list(values_sql: str) -> list[list[Any]]:
+def _parse_sql_value_list_reference(values_sql: str) -> list[list[Any]]:
     """
+    Character-at-a-time parser, kept as the reference for
+    _parse_sql_value_list (tests, tools/bench_mysql_dump_parser.py).
+
     Parse "(...),(...)..." into list of rows, where row is list of python values.
 
     Handles:
@@ -156,6 +239,159 @@ def _parse_sql_value_list(values_sql: str) -> list[list[Any]]:
     return rows
 
 
+# Fast path: one regex matches a whole row of escape-free strings and plain
+# bare tokens (plus the ',' after it); the body is then split on ','.
+_FAST_VALUE = r"(?:\s*'[^'\\]*'\s*|[^,)'(\\]*)"
+_ROW_FAST_RE = re.compile(r"\s*\((" + _FAST_VALUE + r"(?:," + _FAST_VALUE + r")*)\)\s*(,?)")
+# General path: one value inside a row: an escape-free string, the opening
+# quote of a string with escapes, or a bare token up to ',' / ')'.
+_VALUE_RE = re.compile(r"\s*(?:'(?P<s>[^'\\]*)'|(?P<q>')|(?P<b>[^,)]*))\s*(?P<sep>[,)]?)")
+_STR_CHUNK_RE = re.compile(r"[^'\\]*")
+_WS_RE = re.compile(r"\s*")
+_ESCAPES = {"n": "\n", "r": "\r", "t": "\t"}
+
+
+def _bare_value(token: str) -> Any:
+    if token.upper() == "NULL":
+        return None
+    try:
+        if "." in token or "e" in token.lower():
+            return float(token)
+        return int(token)
+    except ValueError:
+        return token
+
+
+def _split_fast_row(body: str) -> Optional[list[Any]]:
+    """Fields of a row body matched by _ROW_FAST_RE; None if a string contains ','."""
+
+    row: list[Any] = []
+    append = row.append
+    for tok in body.split(","):
+        if tok[:1] == "'" and tok[-1:] == "'" and len(tok) > 1:
+            append(tok[1:-1])
+            continue
+        if tok.isdecimal():
+            append(int(tok))
+            continue
+        tok = tok.strip()
+        if tok[:1] == "'":
+            if len(tok) < 2 or tok[-1] != "'":
+                return None  # split inside a quoted string
+            append(tok[1:-1])
+        else:
+            append(_bare_value(tok))
+    return row
+
+
+def _scan_escaped_string(s: str, i: int) -> tuple[str, int]:
+    """s[i] is just past the opening quote; returns (value, index past the closing quote)."""
+
+    n = len(s)
+    parts: list[str] = []
+    chunk = _STR_CHUNK_RE.match
+    while True:
+        j = chunk(s, i).end()
+        if j > i:
+            parts.append(s[i:j])
+        if j >= n:
+            raise ValueError("unterminated string literal")
+        if s[j] == "'":
+            return "".join(parts), j + 1
+        # backslash escape (minimal handling for mysqldump)
+        if j + 1 >= n:
+            raise ValueError("unterminated string literal")
+        esc = s[j + 1]
+        parts.append(_ESCAPES.get(esc, esc))
+        i = j + 2
+
+
+def _parse_row(s: str, i: int) -> tuple[list[Any], int]:
+    """General row parser; s[i] is just past '('. Returns (row, index past ')')."""
+
+    n = len(s)
+    value_match = _VALUE_RE.match
+    ws_end = _WS_RE.match
+    row: list[Any] = []
+    i = ws_end(s, i).end()
+    if i < n and s[i] == ")":
+        return row, i + 1
+    while True:
+        if i >= n:
+            raise ValueError("unexpected end while parsing value")
+        m = value_match(s, i)
+        text = m.group("s")
+        if text is not None:
+            row.append(text)
+            sep = m.group("sep")
+            i = m.end()
+        elif m.group("q") is not None:
+            text, i = _scan_escaped_string(s, m.end("q"))
+            row.append(text)
+            i = ws_end(s, i).end()
+            sep = s[i] if i < n and s[i] in ",)" else ""
+            if sep:
+                i += 1
+        else:
+            row.append(_bare_value(m.group("b").strip()))
+            sep = m.group("sep")
+            i = m.end()
+        if sep == ",":
+            i = ws_end(s, i).end()
+            if i < n and s[i] == ")":
+                return row, i + 1
+            continue
+        if sep == ")":
+            return row, i
+        raise ValueError(f"unexpected char in row at {i}: {s[i:i+10]!r}")
+
+
+def _parse_sql_value_list(values_sql: str) -> list[list[Any]]:
+    """
+    Parse "(...),(...)..." into list of rows, where row is list of python values.
+
+    Same output as _parse_sql_value_list_reference. Rows without backslash
+    escapes are matched by one compiled regex and split on ','; other rows
+    go value by value, scanning escaped strings in chunks between
+    backslashes.
+    """
+
+    rows: list[list[Any]] = []
+    i = 0
+    n = len(values_sql)
+    ws_end = _WS_RE.match
+    row_fast = _ROW_FAST_RE.match
+
+    while i < n:
+        m = row_fast(values_sql, i)
+        if m is not None:
+            body, sep = m.groups()
+            row = _split_fast_row(body) if body.strip() and body.rstrip()[-1] != "," else None
+            if row is not None:
+                rows.append(row)
+                i = m.end()
+                if sep:
+                    continue
+                break
+        # general path: junk between rows, escapes, empty rows, trailing ','
+        i = ws_end(values_sql, i).end()
+        if i >= n:
+            break
+        if values_sql[i] != "(":
+            # e.g. trailing semicolon or whitespace
+            i += 1
+            continue
+        row, i = _parse_row(values_sql, i + 1)
+        rows.append(row)
+        i = ws_end(values_sql, i).end()
+        if i < n and values_sql[i] == ",":
+            i += 1
+            continue
+        break
+
+    return rows
+
+
 def _parse_insert(stmt: str) -> Optional[tuple[str, Optional[list[str]], str]]:
     """
     Return (table_name, columns_or_None, values_sql) or None if not an INSERT.
@@ -215,88 +451,337 @@ def _parse_insert(stmt: str) -> Optional[tuple[str, Optional[list[str]], str]]:
     return table, cols, values_sql
 
 
-def _iter_statements(sql_path: Path) -> Iterable[str]:
+# Statement splitting works on the raw (memory-mapped) bytes of the dump.
+# Leading whitespace and comments ("-- ...", "/* ... */", incl. mysqldump's
+# "/*!40101 ... */;") are skipped; a statement body runs over unquoted bytes
+# and whole '...', "..." (backslash escapes) and `...` tokens up to ';'.
+# Neither regex has a mandatory tail, so they never backtrack.
+_LEAD_RE = re.compile(rb"(?:\s+|--[^\n]*(?:\n|\Z)|/\*.*?(?:\*/|\Z))*", re.S)
+_STMT_BODY_RE = re.compile(rb"""(?:[^;'"`]+|'[^'\\]*(?:\\.[^'\\]*)*'|"[^"\\]*(?:\\.[^"\\]*)*"|`[^`]*`)*""", re.S)
+_INSERT_HEAD_RE = re.compile(rb"INSERT\b.*?INTO\s*`([^`]*)`", re.I | re.S)
+_HEAD_SCAN_BYTES = 4096
+
+
+def _iter_statement_spans(buf: Any) -> Iterator[tuple[int, int]]:
     """
-    Yield SQL statements separated by ';' in a streaming way.
-    We only need INSERT statements; mysqldump places them as single statements.
+    (start, end) byte ranges of SQL statements in `buf`, ';' included.
+    Semicolons inside quoted strings/identifiers do not split; an
+    unterminated quote runs to the end of the input.
     """
 
-    buf: list[str] = []
-    with sql_path.open("r", encoding="utf-8", errors="ignore") as f:
-        for line in f:
-            # skip comments quickly
-            if not buf and (line.startswith("--") or line.startswith("/*") or line.startswith("/*!")):
-                continue
-            buf.append(line)
-            if ";" in line:
-                stmt = "".join(buf)
-                buf = []
-                yield stmt
-    if buf:
-        yield "".join(buf)
+    n = len(buf)
+    lead = _LEAD_RE.match
+    body = _STMT_BODY_RE.match
+    i = 0
+    while i < n:
+        i = lead(buf, i).end()
+        if i >= n:
+            break
+        e = body(buf, i).end()
+        if e < n and buf[e : e + 1] == b";":
+            if e > i:
+                yield i, e + 1
+            i = e + 1
+            continue
+        # unterminated quote or no final ';'
+        yield i, n
+        break
 
 
-def extract_mysql_dump(sql_path: Path, out_dir: Path, only_tables: Optional[set[str]] = None) -> dict[str, Any]:
-    tables: dict[str, list[dict[str, Any]]] = {}
-    counts: dict[str, int] = {}
+def _iter_insert_spans(buf: Any, only_tables: Optional[set[str]] = None) -> Iterator[tuple[int, int]]:
+    """Spans of INSERT statements, whitelist checked on the table-name bytes."""
 
-    for stmt in _iter_statements(sql_path):
-        parsed = _parse_insert(stmt)
-        if not parsed:
+    wanted = {t.encode("utf-8") for t in only_tables} if only_tables else None
+    head = _INSERT_HEAD_RE.match
+    for start, end in _iter_statement_spans(buf):
+        m = head(buf, start, min(end, start + _HEAD_SCAN_BYTES))
+        if m is None:
             continue
-        table, cols, values_sql = parsed
-        if only_tables and table not in only_tables:
+        if wanted is not None and m.group(1) not in wanted:
             continue
+        yield start, end
 
-        rows = _parse_sql_value_list(values_sql)
-        if table not in tables:
-            tables[table] = []
-            counts[table] = 0
 
-        for row in rows:
-            if cols and len(cols) == len(row):
-                obj = {cols[i]: row[i] for i in range(len(cols))}
-            else:
-                # keep as array if we don't know columns
-                obj = {"_values": row}
-            tables[table].append(obj)
-            counts[table] += 1
+_QUOTED_RE = re.compile(rb"'[^'\\]*(?:\\.[^'\\]*)*'|\"[^\"\\]*(?:\\.[^\"\\]*)*\"", re.S)
+_VALUES_KW_RE = re.compile(rb"VALUES", re.I)
+
+
+def _count_tuples(buf: Any, start: int, end: int) -> int:
+    """Rows in an INSERT without parsing them: '(' outside quotes after VALUES."""
+
+    m = _VALUES_KW_RE.search(buf, start, end)
+    if m is None:
+        return 0
+    return _QUOTED_RE.sub(b"''", buf[m.end() : end]).count(b"(")
+
+
+def _scan_toc_entries(buf: Any) -> list[TocEntry]:
+    entries: list[TocEntry] = []
+    head = _INSERT_HEAD_RE.match
+    for start, end in _iter_statement_spans(buf):
+        m = head(buf, start, min(end, start + _HEAD_SCAN_BYTES))
+        if m is None:
+            continue
+        # skip the optional column list so a `values` column is not taken for VALUES
+        i = m.end()
+        while i < end and buf[i : i + 1].isspace():
+            i += 1
+        if buf[i : i + 1] == b"(":
+            i = buf.find(b")", i, end) + 1 or end
+        entries.append(TocEntry(m.group(1).decode("utf-8", errors="ignore"), start, end - start, _count_tuples(buf, i, end)))
+    return entries
+
+
+def dump_toc(
+    sql_path: Path, buf: Any, index_path: Optional[Path] = None, rebuild: bool = False
+) -> tuple[DumpToc, str]:
+    """TOC of the INSERT statements in a mapped dump (sidecar loaded or built)."""
+
+    return ensure_toc(sql_path, buf, "mysql", _scan_toc_entries, index_path, rebuild)
+
+
+def list_tables(sql_path: Path, index_path: Optional[Path] = None) -> DumpToc:
+    with mapped_dump(sql_path) as buf:
+        return dump_toc(sql_path, buf, index_path)[0]
 
+
+def _row_object(cols: Optional[list[str]], row: list[Any]) -> dict[str, Any]:
+    if cols and len(cols) == len(row):
+        return dict(zip(cols, row))
+    # keep as array if we don't know columns
+    return {"_values": row}
+
+
+def _insert_rows(stmt: str) -> Optional[tuple[str, list[str]]]:
+    """(table, rows encoded as JSON) for an INSERT statement, else None."""
+
+    parsed = _parse_insert(stmt)
+    if not parsed:
+        return None
+    table, cols, values_sql = parsed
+    encode = _ROW_ENCODER.encode
+    return table, [encode(_row_object(cols, row)) for row in _parse_sql_value_list(values_sql)]
+
+
+ChunkResult = tuple[list[tuple[str, list[str]]], float, int]
+
+
+def _parse_chunk(sql_path: str, ranges: list[tuple[int, int]]) -> ChunkResult:
+    """Worker: parse INSERT statements at the given byte ranges (in order)."""
+
+    t0 = time.perf_counter()
+    base = ranges[0][0]
+    with open(sql_path, "rb") as f:
+        f.seek(base)
+        data = f.read(ranges[-1][1] - base)
+    out = []
+    for start, end in ranges:
+        r = _insert_rows(data[start - base : end - base].decode("utf-8", errors="ignore"))
+        if r is not None:
+            out.append(r)
+    return out, time.perf_counter() - t0, os.getpid()
+
+
+def _iter_chunks(spans: Iterable[tuple[int, int]], chunk_bytes: int) -> Iterator[list[tuple[int, int]]]:
+    chunk: list[tuple[int, int]] = []
+    for r in spans:
+        chunk.append(r)
+        if r[1] - chunk[0][0] >= chunk_bytes:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iter_parsed_serial(buf: Any, spans: Iterable[tuple[int, int]]) -> Iterator[tuple[list[tuple[str, list[str]]], int]]:
+    view = memoryview(buf)
+    try:
+        for start, end in spans:
+            # only INSERTs of wanted tables are decoded, straight from the map
+            r = _insert_rows(str(view[start:end], "utf-8", "ignore"))
+            yield ([r] if r is not None else []), end
+    finally:
+        view.release()
+
+
+def _iter_parsed_parallel(
+    sql_path: Path,
+    spans: Iterable[tuple[int, int]],
+    jobs: int,
+    chunk_bytes: int,
+    workers: dict[str, dict[str, Any]],
+) -> Iterator[tuple[list[tuple[str, list[str]]], int]]:
+    """
+    Parse chunks in a process pool; results are yielded in dump order. At
+    most 4 chunks per worker are in flight, so memory stays bounded.
+    """
+
+    window: deque[tuple[Future[ChunkResult], int]] = deque()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+
+        def collect() -> tuple[list[tuple[str, list[str]]], int]:
+            fut, end = window.popleft()
+            out, busy_s, pid = fut.result()
+            w = workers.setdefault(str(pid), {"chunks": 0, "busy_s": 0.0, "rows": 0})
+            w["chunks"] += 1
+            w["busy_s"] += busy_s
+            w["rows"] += sum(len(rows) for _t, rows in out)
+            return out, end
+
+        for chunk in _iter_chunks(spans, chunk_bytes):
+            window.append((pool.submit(_parse_chunk, str(sql_path), chunk), chunk[-1][1]))
+            if len(window) >= jobs * 4:
+                yield collect()
+        while window:
+            yield collect()
+    for w in workers.values():
+        w["busy_s"] = round(w["busy_s"], 3)
+
+
+def extract_mysql_dump(
+    sql_path: Path,
+    out_dir: Path,
+    only_tables: Optional[set[str]] = None,
+    fmt: str = "json",
+    progress: Optional[Callable[[ExtractProgress], None]] = None,
+    progress_interval_s: float = 1.0,
+    jobs: int = 1,
+    chunk_bytes: int = CHUNK_BYTES,
+    use_index: bool = True,
+    index_path: Optional[Path] = None,
+) -> dict[str, Any]:
+    """
+    jobs > 1 parses INSERT statements in a process pool; rows are written
+    in the same order as with jobs=1. With use_index the TOC sidecar is
+    loaded (or built on this pass) and only the wanted tables' statements
+    are read.
+    """
+
+    if fmt not in TABLE_FORMATS:
+        raise ValueError(f"unknown table format: {fmt!r} (expected one of {TABLE_FORMATS})")
+    if jobs < 1:
+        raise ValueError("jobs must be >= 1")
+
+    tables_dir = out_dir / "tables"
+    _mkdir(tables_dir)
+    writers: dict[str, TableWriter] = {}
+    counts: dict[str, int] = {}
+    workers: dict[str, dict[str, Any]] = {}
+    total_rows = 0
+    bytes_total = sql_path.stat().st_size
+    pos = 0
+    start = time.monotonic()
+    next_report = start + progress_interval_s
+
+    index: dict[str, Any] = {"state": "disabled"}
+
+    with mapped_dump(sql_path) as buf:
+        if use_index:
+            toc, state = dump_toc(sql_path, buf, index_path)
+            spans = toc.spans(only_tables)
+            index = {"state": state, "path": str(index_path or toc_path(sql_path)), "sha256": toc.sha256}
+        else:
+            spans = list(_iter_insert_spans(buf, only_tables))
+        if jobs > 1:
+            parsed = _iter_parsed_parallel(sql_path, spans, jobs, chunk_bytes, workers)
+        else:
+            parsed = _iter_parsed_serial(buf, spans)
+
+        try:
+            for results, pos in parsed:
+                for table, rows in results:
+                    w = writers.get(table)
+                    if w is None:
+                        w = writers[table] = TableWriter(tables_dir / f"{table}.{fmt}", fmt)
+                        counts[table] = 0
+                    w.write_encoded(rows)
+                    counts[table] += len(rows)
+                    total_rows += len(rows)
+
+                if progress is not None and time.monotonic() >= next_report:
+                    progress(ExtractProgress(pos, bytes_total, total_rows, time.monotonic() - start))
+                    next_report = time.monotonic() + progress_interval_s
+        finally:
+            parsed.close()
+            for w in writers.values():
+                w.close()
+
+    elapsed = time.monotonic() - start
+    if progress is not None:
+        progress(ExtractProgress(bytes_total, bytes_total, total_rows, elapsed))
+
+    stats: dict[str, Any] = {
+        "bytes_in": bytes_total,
+        "rows": total_rows,
+        "elapsed_s": round(elapsed, 3),
+        "jobs": jobs,
+    }
+    if workers:
+        stats["workers"] = workers
     meta = {
         "format": "homiq-mysql-dump-export",
         "format_version": 1,
         "generated_at": dt.datetime.now(dt.timezone.utc).isoformat(),
         "source_file": str(sql_path),
+        "table_format": fmt,
         "counts": counts,
+        "stats": stats,
+        "index": index,
     }
-
-    _mkdir(out_dir)
     _write_json(out_dir / "meta.json", meta)
-
-    tables_dir = out_dir / "tables"
-    _mkdir(tables_dir)
-    for t, rows in tables.items():
-        _write_json(tables_dir / f"{t}.json", rows)
-
     return meta
 
 
 def main() -> None:
     p = argparse.ArgumentParser(description="Extract mysqldump SQL to JSON files (per table).")
     p.add_argument("--in", dest="inp", required=True, help="Path to mysqldump .sql file (e.g. homiqtabdata.sql).")
-    p.add_argument("--out", required=True, help="Output directory (will be created).")
+    p.add_argument("--out", help="Output directory (will be created).")
     p.add_argument(
         "--tables",
         default="",
         help="Optional comma-separated table whitelist (exact names as in dump), e.g. HDevLibIn,HDevLibOut,HWebComboButtons",
     )
+    p.add_argument(
+        "--format",
+        choices=TABLE_FORMATS,
+        default="json",
+        help="Per-table output: json (streamed array, tables/<T>.json) or ndjson (one row per line, tables/<T>.ndjson).",
+    )
+    p.add_argument("--progress", action="store_true", help="Print progress and throughput (MB/s, rows/s) to stderr.")
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Parse INSERT statements in N worker processes (0 = one per CPU). Row order is unchanged.",
+    )
+    p.add_argument("--list-tables", action="store_true", help="List tables (statements, rows, MB) from the index and exit.")
+    p.add_argument("--index", default="", help="TOC sidecar path (default: <dump>.toc.json next to the dump).")
+    p.add_argument("--no-index", action="store_true", help="Do not read or write the TOC sidecar; scan the whole dump.")
     args = p.parse_args()
 
     sql_path = Path(args.inp)
+    index_path = Path(args.index) if args.index else None
+    if args.list_tables:
+        print(format_table_list(list_tables(sql_path, index_path)))
+        return
+    if not args.out:
+        p.error("--out is required (unless --list-tables)")
     out_dir = Path(args.out)
     only_tables = {t.strip() for t in args.tables.split(",") if t.strip()} or None
 
-    extract_mysql_dump(sql_path, out_dir, only_tables=only_tables)
+    def report(pr: ExtractProgress) -> None:
+        print(pr.line(), file=sys.stderr, flush=True)
+
+    extract_mysql_dump(
+        sql_path,
+        out_dir,
+        only_tables=only_tables,
+        fmt=args.format,
+        progress=report if args.progress else None,
+        jobs=args.jobs or os.cpu_count() or 1,
+        use_index=not args.no_index,
+        index_path=index_path,
+    )
     print(f"Wrote: {out_dir}")
 
 
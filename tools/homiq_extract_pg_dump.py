@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Postgres plain-SQL dump (pg_dump -Fp) → JSON extractor, without a database.
+
+For backups like `pg_dump ... > homiq-promienko.sql` (gunzip *.sql.gz first):
+table data is in COPY blocks
+
+  COPY public.modules (m_id, m_master, ...) FROM stdin;
+  1\tHQP\t...
+  \\.
+
+Goal:
+  - per-table JSON under an output directory (same layout as
+    homiq_extract_mysql_dump.py: meta.json + tables/<table>.json|ndjson)
+  - random access: the first run writes a table-of-contents sidecar
+    (<dump>.toc.json, see homiq_sql_toc.py), later runs read only the COPY
+    blocks of the wanted tables; --list-tables answers from it
+
+Notes:
+  - Values are COPY text: \\N → null, escapes decoded, everything else a
+    string (no column types without a database). For typed rows and the
+    normalized entities restore the dump and use homiq_extract_db.py.
+  - Table names drop the "public." schema (modules, inputs, outputs, ...).
+  - INSERT-style dumps (pg_dump --inserts) are not handled.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from homiq_extract_mysql_dump import TABLE_FORMATS, ExtractProgress, TableWriter, _mkdir, _write_json
+from homiq_sql_toc import DumpToc, TocEntry, ensure_toc, format_table_list, mapped_dump, toc_path
+
+
+_COPY_RE = re.compile(rb"^COPY\s+([^\s(]+)\s*(?:\(([^)]*)\))?\s+FROM\s+stdin;\r?\n", re.M)
+_END_OF_DATA = b"\\.\n"
+_COPY_ESCAPE_RE = re.compile(r"\\(?:([0-7]{1,3})|x([0-9A-Fa-f]{1,2})|(.))", re.S)
+_COPY_ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v"}
+_LINES_PER_READ = 4 * 1024 * 1024  # bytes of COPY data decoded at a time
+
+
+def _unquote_ident(s: str) -> str:
+    s = s.strip()
+    if len(s) >= 2 and s[0] == s[-1] == '"':
+        return s[1:-1].replace('""', '"')
+    return s
+
+
+def _table_name(qualified: str) -> str:
+    parts = [_unquote_ident(p) for p in re.findall(r'"(?:[^"]|"")*"|[^.]+', qualified)]
+    if len(parts) == 2 and parts[0] == "public":
+        return parts[1]
+    return ".".join(parts)
+
+
+def _copy_field(f: str) -> Optional[str]:
+    if f == "\\N":
+        return None
+    if "\\" not in f:
+        return f
+    # \ooo / \xhh are bytes in the server encoding (UTF-8), so an escaped
+    # multibyte character is several escapes: collect bytes, decode once
+    out = bytearray()
+    pos = 0
+    for m in _COPY_ESCAPE_RE.finditer(f):
+        out += f[pos : m.start()].encode("utf-8")
+        octal, hexa, ch = m.groups()
+        if octal is not None:
+            out.append(int(octal, 8) & 0xFF)
+        elif hexa is not None:
+            out.append(int(hexa, 16))
+        else:
+            out += _COPY_ESCAPES.get(ch, ch).encode("utf-8")
+        pos = m.end()
+    out += f[pos:].encode("utf-8")
+    return out.decode("utf-8", errors="ignore")
+
+
+def _count_lines(buf: Any, start: int, end: int) -> int:
+    # mmap has no count(); go in slices so a huge block is never copied whole
+    n = 0
+    for i in range(start, end, _LINES_PER_READ):
+        n += buf[i : min(end, i + _LINES_PER_READ)].count(b"\n")
+    return n
+
+
+def _scan_copy_blocks(buf: Any) -> list[TocEntry]:
+    """One TOC entry per COPY block: offset/length cover header through '\\.'."""
+
+    entries: list[TocEntry] = []
+    n = len(buf)
+    pos = 0
+    while True:
+        m = _COPY_RE.search(buf, pos)
+        if m is None:
+            break
+        data_start = m.end()
+        if buf[data_start : data_start + len(_END_OF_DATA)] == _END_OF_DATA:
+            data_end = data_start
+        else:
+            i = buf.find(b"\n" + _END_OF_DATA, data_start - 1)
+            data_end = n if i < 0 else i + 1
+        end = min(n, data_end + len(_END_OF_DATA))
+        table = _table_name(m.group(1).decode("utf-8", errors="ignore"))
+        rows = _count_lines(buf, data_start, data_end)
+        entries.append(TocEntry(table, m.start(), end - m.start(), rows))
+        pos = end
+    return entries
+
+
+def dump_toc(sql_path: Path, buf: Any, index_path: Optional[Path] = None, rebuild: bool = False) -> tuple[DumpToc, str]:
+    return ensure_toc(sql_path, buf, "postgres", _scan_copy_blocks, index_path, rebuild)
+
+
+def list_tables(sql_path: Path, index_path: Optional[Path] = None) -> DumpToc:
+    with mapped_dump(sql_path) as buf:
+        return dump_toc(sql_path, buf, index_path)[0]
+
+
+def _iter_copy_rows(buf: Any, start: int, end: int) -> Iterator[tuple[list[str], list[Optional[str]]]]:
+    """(columns, row) for each data line of the COPY block at [start, end)."""
+
+    m = _COPY_RE.match(buf, start, end)
+    if m is None:
+        return
+    cols = [_unquote_ident(c) for c in m.group(2).decode("utf-8", errors="ignore").split(",")] if m.group(2) else []
+    pos = m.end()
+    while pos < end:
+        stop = min(end, pos + _LINES_PER_READ)
+        if stop < end:
+            nl = buf.rfind(b"\n", pos, stop)
+            stop = nl + 1 if nl >= pos else buf.find(b"\n", stop, end) + 1 or end
+        lines = buf[pos:stop].decode("utf-8", errors="ignore").split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        for line in lines:
+            if line.endswith("\r"):
+                line = line[:-1]
+            if line == "\\.":
+                return
+            yield cols, [_copy_field(f) for f in line.split("\t")]
+        pos = stop
+
+
+def extract_pg_dump(
+    sql_path: Path,
+    out_dir: Path,
+    only_tables: Optional[set[str]] = None,
+    fmt: str = "json",
+    use_index: bool = True,
+    index_path: Optional[Path] = None,
+    progress: Optional[Callable[[ExtractProgress], None]] = None,
+) -> dict[str, Any]:
+    if fmt not in TABLE_FORMATS:
+        raise ValueError(f"unknown table format: {fmt!r} (expected one of {TABLE_FORMATS})")
+
+    tables_dir = out_dir / "tables"
+    _mkdir(tables_dir)
+    writers: dict[str, TableWriter] = {}
+    counts: dict[str, int] = {}
+    total_rows = 0
+    bytes_total = sql_path.stat().st_size
+    start = time.monotonic()
+    index: dict[str, Any] = {"state": "disabled"}
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+
+    with mapped_dump(sql_path) as buf:
+        if use_index:
+            toc, state = dump_toc(sql_path, buf, index_path)
+            entries = toc.entries
+            index = {"state": state, "path": str(index_path or toc_path(sql_path)), "sha256": toc.sha256}
+        else:
+            entries = _scan_copy_blocks(buf)
+        try:
+            for e in entries:
+                if only_tables and e.table not in only_tables:
+                    continue
+                w = writers.get(e.table)
+                if w is None:
+                    w = writers[e.table] = TableWriter(tables_dir / f"{e.table}.{fmt}", fmt)
+                    counts[e.table] = 0
+                batch: list[str] = []
+                for cols, row in _iter_copy_rows(buf, e.offset, e.offset + e.length):
+                    obj = dict(zip(cols, row)) if cols and len(cols) == len(row) else {"_values": row}
+                    batch.append(encode(obj))
+                    if len(batch) >= 4096:
+                        w.write_encoded(batch)
+                        batch = []
+                w.write_encoded(batch)
+                counts[e.table] = w.rows
+                total_rows = sum(counts.values())
+                if progress is not None:
+                    progress(ExtractProgress(e.offset + e.length, bytes_total, total_rows, time.monotonic() - start))
+        finally:
+            for w in writers.values():
+                w.close()
+
+    meta = {
+        "format": "homiq-pg-dump-export",
+        "format_version": 1,
+        "generated_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "source_file": str(sql_path),
+        "table_format": fmt,
+        "counts": counts,
+        "stats": {
+            "bytes_in": bytes_total,
+            "rows": total_rows,
+            "elapsed_s": round(time.monotonic() - start, 3),
+        },
+        "index": index,
+    }
+    _write_json(out_dir / "meta.json", meta)
+    return meta
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Extract a Postgres plain-SQL dump (COPY blocks) to JSON files (per table).")
+    p.add_argument("--in", dest="inp", required=True, help="Path to pg_dump plain .sql file (gunzip *.sql.gz first).")
+    p.add_argument("--out", help="Output directory (will be created).")
+    p.add_argument(
+        "--tables",
+        default="",
+        help="Optional comma-separated table whitelist, e.g. masters,modules,inputs,outputs,action",
+    )
+    p.add_argument("--format", choices=TABLE_FORMATS, default="json", help="Per-table output: json or ndjson.")
+    p.add_argument("--progress", action="store_true", help="Print progress and throughput to stderr.")
+    p.add_argument("--list-tables", action="store_true", help="List tables (COPY blocks, rows, MB) from the index and exit.")
+    p.add_argument("--index", default="", help="TOC sidecar path (default: <dump>.toc.json next to the dump).")
+    p.add_argument("--no-index", action="store_true", help="Do not read or write the TOC sidecar.")
+    args = p.parse_args()
+
+    sql_path = Path(args.inp)
+    index_path = Path(args.index) if args.index else None
+    if args.list_tables:
+        print(format_table_list(list_tables(sql_path, index_path)))
+        return
+    if not args.out:
+        p.error("--out is required (unless --list-tables)")
+    out_dir = Path(args.out)
+    only_tables = {t.strip() for t in args.tables.split(",") if t.strip()} or None
+
+    def report(pr: ExtractProgress) -> None:
+        print(pr.line(), file=sys.stderr, flush=True)
+
+    extract_pg_dump(
+        sql_path,
+        out_dir,
+        only_tables=only_tables,
+        fmt=args.format,
+        use_index=not args.no_index,
+        index_path=index_path,
+        progress=report if args.progress else None,
+    )
+    print(f"Wrote: {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
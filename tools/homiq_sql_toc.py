@@ -0,0 +1,190 @@
+"""
+Table-of-contents (TOC) sidecar for large SQL dumps.
+
+The first pass over a dump records where each table's data lives; later runs
+seek straight to the tables they need and `--list-tables` answers from the
+index without touching the dump.
+
+Sidecar: <dump>.toc.json next to the dump (or an explicit path):
+
+  {
+    "format": "homiq-sql-toc", "format_version": 1,
+    "dialect": "mysql" | "postgres",
+    "source": {"size": ..., "mtime_ns": ..., "quick_hash": ..., "sha256": ...},
+    "entries": [{"table": ..., "offset": ..., "length": ..., "rows": ...}, ...]
+  }
+
+One entry per INSERT statement (mysqldump) or COPY block (pg_dump plain SQL),
+in dump order. The index is used only while size, mtime and quick_hash
+(sha256 of the size plus the first and last MiB) still match; sha256 of the
+whole file is recorded on build for reference.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+
+TOC_FORMAT = "homiq-sql-toc"
+TOC_FORMAT_VERSION = 1
+TOC_SUFFIX = ".toc.json"
+_QUICK_HASH_BYTES = 1024 * 1024
+
+
+@dataclass
+class TocEntry:
+    table: str
+    offset: int
+    length: int
+    rows: int
+
+
+@dataclass
+class DumpToc:
+    dialect: str
+    size: int
+    mtime_ns: int
+    quick_hash: str
+    sha256: str
+    entries: list[TocEntry] = field(default_factory=list)
+
+    def spans(self, only_tables: Optional[set[str]] = None) -> list[tuple[int, int]]:
+        """(start, end) byte ranges of the entries for `only_tables` (all if None)."""
+
+        return [(e.offset, e.offset + e.length) for e in self.entries if not only_tables or e.table in only_tables]
+
+    def tables(self) -> dict[str, dict[str, int]]:
+        """Per table: statements/blocks, data bytes and rows, in dump order."""
+
+        out: dict[str, dict[str, int]] = {}
+        for e in self.entries:
+            t = out.setdefault(e.table, {"statements": 0, "bytes": 0, "rows": 0})
+            t["statements"] += 1
+            t["bytes"] += e.length
+            t["rows"] += e.rows
+        return out
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "format": TOC_FORMAT,
+            "format_version": TOC_FORMAT_VERSION,
+            "dialect": self.dialect,
+            "source": {
+                "size": self.size,
+                "mtime_ns": self.mtime_ns,
+                "quick_hash": self.quick_hash,
+                "sha256": self.sha256,
+            },
+            "entries": [asdict(e) for e in self.entries],
+        }
+
+
+@contextmanager
+def mapped_dump(sql_path: Path) -> Iterator[Any]:
+    """The dump as a read-only mmap (b"" for an empty file)."""
+
+    with sql_path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def toc_path(sql_path: Path) -> Path:
+    return sql_path.with_name(sql_path.name + TOC_SUFFIX)
+
+
+def quick_hash(buf: Any) -> str:
+    n = len(buf)
+    h = hashlib.sha256(str(n).encode("ascii"))
+    h.update(buf[:_QUICK_HASH_BYTES])
+    h.update(buf[max(0, n - _QUICK_HASH_BYTES) :])
+    return h.hexdigest()
+
+
+def new_toc(sql_path: Path, buf: Any, dialect: str, entries: list[TocEntry]) -> DumpToc:
+    st = sql_path.stat()
+    return DumpToc(
+        dialect=dialect,
+        size=st.st_size,
+        mtime_ns=st.st_mtime_ns,
+        quick_hash=quick_hash(buf),
+        sha256=hashlib.sha256(buf).hexdigest(),
+        entries=entries,
+    )
+
+
+def load_toc(sql_path: Path, buf: Any, dialect: str, path: Optional[Path] = None) -> Optional[DumpToc]:
+    """The sidecar for `sql_path` if present and still matching the dump; else None."""
+
+    path = path or toc_path(sql_path)
+    try:
+        d = json.loads(path.read_text(encoding="utf-8"))
+        if d.get("format") != TOC_FORMAT or d.get("format_version") != TOC_FORMAT_VERSION:
+            return None
+        src = d["source"]
+        toc = DumpToc(
+            dialect=d["dialect"],
+            size=int(src["size"]),
+            mtime_ns=int(src["mtime_ns"]),
+            quick_hash=str(src["quick_hash"]),
+            sha256=str(src.get("sha256", "")),
+            entries=[TocEntry(str(e["table"]), int(e["offset"]), int(e["length"]), int(e["rows"])) for e in d["entries"]],
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    st = sql_path.stat()
+    if toc.dialect != dialect or toc.size != st.st_size or toc.mtime_ns != st.st_mtime_ns:
+        return None
+    if toc.quick_hash != quick_hash(buf):
+        return None
+    return toc
+
+
+def save_toc(toc: DumpToc, path: Path) -> bool:
+    """Write the sidecar; False if it cannot be written (e.g. read-only backup dir)."""
+
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        tmp.write_text(json.dumps(toc.to_dict(), separators=(",", ":")) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        return False
+    return True
+
+
+def format_table_list(toc: DumpToc) -> str:
+    lines = [f"{'table':32s} {'stmts':>7s} {'rows':>12s} {'MB':>10s}"]
+    for name, t in toc.tables().items():
+        lines.append(f"{name:32s} {t['statements']:7d} {t['rows']:12d} {t['bytes'] / 1e6:10.2f}")
+    return "\n".join(lines)
+
+
+def ensure_toc(
+    sql_path: Path,
+    buf: Any,
+    dialect: str,
+    scan: Callable[[Any], list[TocEntry]],
+    path: Optional[Path] = None,
+    rebuild: bool = False,
+) -> tuple[DumpToc, str]:
+    """
+    Load the sidecar, or build it with `scan(buf)` and save it.
+    Returns (toc, state) with state "loaded", "built" or "built-unsaved".
+    """
+
+    path = path or toc_path(sql_path)
+    if not rebuild:
+        toc = load_toc(sql_path, buf, dialect, path)
+        if toc is not None:
+            return toc, "loaded"
+    toc = new_toc(sql_path, buf, dialect, scan(buf))
+    return toc, ("built" if save_toc(toc, path) else "built-unsaved")